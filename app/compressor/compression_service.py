@@ -5,16 +5,143 @@ Provides high-level API for GIF compression within the Gifer application.
 Integrates with existing services and provides unified compression interface.
 """
 
+import fnmatch
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 
+import numpy as np
+
 from app.logger import get_logger
-from .gif_optimizer import GifOptimizer, CompressionSettings
+from app.utils.files import link_or_copy
+from .gif_optimizer import GifOptimizer, CompressionSettings, FrameData
 
 logger = get_logger(__name__)
 
 
+# Service reused by every file a batch worker process handles
+_WORKER_SERVICE: Optional["CompressionService"] = None
+
+
+def _worker_init() -> None:
+    """ProcessPoolExecutor initializer: build one CompressionService per worker process."""
+    global _WORKER_SERVICE
+    _WORKER_SERVICE = CompressionService()
+
+
+def _compress_one(
+    input_path: str,
+    output_path: str,
+    max_size_mb: float,
+    now_iso: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Compress a single GIF in a worker process.
+    
+    Module-level so it can be pickled by ProcessPoolExecutor. The worker's service
+    is created once by _worker_init; compress_gif pushes fresh settings onto its
+    optimizer on every call, so no per-file state carries over.
+    """
+    service = _WORKER_SERVICE or CompressionService()
+    return service.compress_gif(
+        input_path,
+        output_path,
+        max_size_mb=max_size_mb,
+        now_iso=now_iso
+    )
+
+
+def _scan_gif_files(input_dir: Path, pattern: str) -> List[Path]:
+    """
+    List files in input_dir whose names match pattern.
+    
+    Flat patterns use a single os.scandir pass, which reads entry types from
+    getdents instead of stat-ing every path like Path.glob; recursive or nested
+    patterns fall back to glob.
+    """
+    if "/" in pattern or os.sep in pattern or "**" in pattern:
+        return sorted(input_dir.glob(pattern))
+    
+    with os.scandir(input_dir) as entries:
+        return sorted(
+            Path(entry.path)
+            for entry in entries
+            if fnmatch.fnmatchcase(entry.name, pattern) and entry.is_file()
+        )
+
+
+# Techniques reported by previews, in column order of analyze_batch's mask
+PREVIEW_TECHNIQUES = (
+    'frame_timing_optimization',
+    'duplicate_frame_removal',
+    'color_reduction',
+    'dimension_reduction'
+)
+
+
+def analyze_batch(
+    frame_counts: np.ndarray,
+    durations_sum: np.ndarray,
+    sizes_mb: np.ndarray
+) -> np.ndarray:
+    """
+    Decide which PREVIEW_TECHNIQUES apply to each of N files.
+    
+    Returns:
+        (N, len(PREVIEW_TECHNIQUES)) boolean mask
+    """
+    avg_durations = np.divide(
+        durations_sum, frame_counts,
+        out=np.zeros(len(frame_counts)),
+        where=frame_counts > 0
+    )
+    
+    return np.column_stack([
+        avg_durations < 0.1,
+        frame_counts > 10,
+        sizes_mb > 20,
+        sizes_mb > 30
+    ])
+
+
+def _apply_preview_estimates(infos: List[Dict[str, Any]]) -> None:
+    """Fill technique and size estimates into preview dicts in place, skipping error entries."""
+    valid = [info for info in infos if 'error' not in info]
+    if not valid:
+        return
+    
+    frame_counts = np.array([info['frame_count'] for info in valid], dtype=np.int64)
+    durations_sum = np.array([info['total_duration'] for info in valid], dtype=np.float64)
+    sizes_mb = np.array([info['file_size_mb'] for info in valid], dtype=np.float64)
+    
+    mask = analyze_batch(frame_counts, durations_sum, sizes_mb)
+    
+    # Rough compression estimate
+    needs_compression = sizes_mb > 14.99
+    reduction = np.where(
+        needs_compression,
+        np.minimum(70, (sizes_mb - 14.99) / np.maximum(sizes_mb, 1e-9) * 100 + 30),
+        0
+    )
+    final_sizes = sizes_mb * (1 - reduction / 100)
+    
+    for row, info in enumerate(valid):
+        info['estimated_techniques'] = [
+            name for name, applies in zip(PREVIEW_TECHNIQUES, mask[row]) if applies
+        ]
+        info['estimated_reduction_percent'] = float(reduction[row])
+        info['estimated_final_size_mb'] = float(final_sizes[row])
+
+
+def _content_hash(path: Path) -> str:
+    """BLAKE2b digest of a file's bytes, used to spot duplicate inputs."""
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16)).hexdigest()
+
+
 class CompressionService:
     """High-level service for GIF compression and optimization."""
     
@@ -27,7 +154,9 @@ class CompressionService:
         output_path: Optional[str] = None,
         target_filename: Optional[str] = None,
         max_size_mb: float = 14.99,
-        settings: Optional[CompressionSettings] = None
+        settings: Optional[CompressionSettings] = None,
+        now_iso: Optional[str] = None,
+        preloaded: Optional[FrameData] = None
     ) -> Dict[str, Any]:
         """
         Compress a GIF file with intelligent optimization.
@@ -38,20 +167,23 @@ class CompressionService:
             target_filename: Optional custom filename (without extension)
             max_size_mb: Maximum file size in MB
             settings: Optional custom compression settings
+            now_iso: Timestamp to record; batch callers pass one for the whole batch
+            preloaded: Already decoded (frames, durations) of input_path, e.g. shared
+                by several compressions of the same file; the frames are not modified
             
         Returns:
             Dictionary with compression results and statistics
         """
-        input_path = Path(input_path)
+        input_file = Path(input_path)
         
-        if not input_path.exists():
-            raise FileNotFoundError(f"Input GIF not found: {input_path}")
+        if not input_file.exists():
+            raise FileNotFoundError(f"Input GIF not found: {input_file}")
         
         # Default output path
         if output_path is None:
-            output_path = input_path.parent / f"{input_path.stem}_compressed.gif"
+            output_file = input_file.parent / f"{input_file.stem}_compressed.gif"
         else:
-            output_path = Path(output_path)
+            output_file = Path(output_path)
         
         # Custom settings if provided
         if settings is None:
@@ -60,22 +192,27 @@ class CompressionService:
         # Update optimizer with new settings
         self.optimizer.settings = settings
         
-        logger.info(f"Starting GIF compression: {input_path.name} → {output_path.name}")
+        logger.info(f"Starting GIF compression: {input_file.name} → {output_file.name}")
         logger.info(f"Target size: {max_size_mb:.2f} MB")
         
+        # Reuse frames decoded by a previous preview; popping caps RSS after compression
+        if preloaded is None:
+            preloaded = self.optimizer.pop_cached_frames(str(input_file))
+        
         # Perform optimization
         try:
             result = self.optimizer.optimize_gif(
-                str(input_path),
-                str(output_path),
-                target_filename
+                str(input_file),
+                str(output_file),
+                target_filename,
+                preloaded=preloaded
             )
             
             # Enhanced result information
             result.update({
-                'input_file': str(input_path),
-                'output_file': result.get('output_path', str(output_path)),
-                'timestamp': datetime.now().isoformat(),
+                'input_file': str(input_file),
+                'output_file': result.get('output_path', str(output_file)),
+                'timestamp': now_iso or datetime.now().isoformat(),
                 'target_size_mb': max_size_mb,
                 'original_size_mb': result['original_size'] / 1024 / 1024,
                 'final_size_mb': result['final_size'] / 1024 / 1024
@@ -95,69 +232,102 @@ class CompressionService:
             return {
                 'success': False,
                 'error': str(e),
-                'input_file': str(input_path),
-                'timestamp': datetime.now().isoformat()
+                'input_file': str(input_file),
+                'timestamp': now_iso or datetime.now().isoformat()
             }
     
-    def get_compression_preview(self, input_path: str) -> Dict[str, Any]:
+    def get_compression_preview(self, input_path: str, preload_frames: bool = False) -> Dict[str, Any]:
         """
         Get information about a GIF file and estimated compression results.
         
+        Metadata comes from GIF headers only, so no pixel data is decoded unless
+        preload_frames is set, which decodes into the optimizer's frame cache for
+        a following compress_gif call.
+        
         Args:
             input_path: Path to GIF file
+            preload_frames: Also decode frames ahead of an expected compress_gif
             
         Returns:
             Dictionary with file information and compression estimates
         """
-        input_path = Path(input_path)
+        gif_file = Path(input_path)
+        
+        if not gif_file.exists():
+            raise FileNotFoundError(f"GIF file not found: {gif_file}")
+        
+        info = self._read_preview_info(gif_file, preload_frames)
+        _apply_preview_estimates([info])
+        return info
+    
+    def get_directory_preview(self, input_dir: str, pattern: str = "*.gif") -> List[Dict[str, Any]]:
+        """
+        Preview every GIF in a directory, e.g. to build a catalog.
         
-        if not input_path.exists():
-            raise FileNotFoundError(f"GIF file not found: {input_path}")
+        Headers are read per file, then technique and size estimates are computed
+        for the whole batch in one vectorized pass.
         
+        Args:
+            input_dir: Directory containing GIF files
+            pattern: File pattern to match (default: *.gif)
+            
+        Returns:
+            List of preview dictionaries, one per matching file
+        """
+        input_folder = Path(input_dir)
+        
+        if not input_folder.exists():
+            raise FileNotFoundError(f"Input directory not found: {input_folder}")
+        
+        infos = [self._read_preview_info(gif_file) for gif_file in _scan_gif_files(input_folder, pattern)]
+        _apply_preview_estimates(infos)
+        return infos
+    
+    def _duplicate_result(
+        self,
+        primary_result: Dict[str, Any],
+        input_path: Path,
+        output_path: Path
+    ) -> Dict[str, Any]:
+        """Result for a batch input identical to one already compressed, linking its output."""
+        result = dict(primary_result, input_file=str(input_path), duplicate_of=primary_result.get('input_file'))
+        
+        primary_output = Path(primary_result.get('output_file', ''))
+        if primary_result.get('success') and primary_output.is_file():
+            try:
+                link_or_copy(primary_output, output_path)
+                result['output_file'] = str(output_path)
+            except OSError as e:
+                logger.error(f"Failed to link duplicate {input_path.name}: {e}")
+                result.update({'success': False, 'error': str(e)})
+        
+        return result
+    
+    def _read_preview_info(self, input_path: Path, preload_frames: bool = False) -> Dict[str, Any]:
+        """Collect header metadata for one GIF, or an error entry if it can't be read."""
         # Get basic file info
         file_size = input_path.stat().st_size
         size_mb = file_size / 1024 / 1024
         
         # Load GIF to analyze
         try:
-            frames, durations = self.optimizer._load_gif_frames(str(input_path))
+            frame_count, durations, dimensions = self.optimizer._quick_gif_info(str(input_path))
+            
+            if preload_frames:
+                self.optimizer.load_gif_frames_cached(str(input_path))
             
-            info = {
+            return {
                 'filename': input_path.name,
                 'file_size_bytes': file_size,
                 'file_size_mb': size_mb,
-                'frame_count': len(frames),
+                'frame_count': frame_count,
                 'total_duration': sum(durations),
                 'avg_frame_duration': sum(durations) / len(durations) if durations else 0,
-                'dimensions': frames[0].size if frames else (0, 0),
+                'dimensions': dimensions if frame_count else (0, 0),
                 'needs_compression': size_mb > 14.99,
                 'estimated_techniques': []
             }
             
-            # Estimate which compression techniques would be beneficial
-            if info['avg_frame_duration'] < 0.1:
-                info['estimated_techniques'].append('frame_timing_optimization')
-            
-            if len(frames) > 10:
-                info['estimated_techniques'].append('duplicate_frame_removal')
-            
-            if size_mb > 20:
-                info['estimated_techniques'].append('color_reduction')
-            
-            if size_mb > 30:
-                info['estimated_techniques'].append('dimension_reduction')
-            
-            # Rough compression estimate
-            if size_mb > 14.99:
-                estimated_reduction = min(70, (size_mb - 14.99) / size_mb * 100 + 30)
-                info['estimated_reduction_percent'] = estimated_reduction
-                info['estimated_final_size_mb'] = size_mb * (1 - estimated_reduction / 100)
-            else:
-                info['estimated_reduction_percent'] = 0
-                info['estimated_final_size_mb'] = size_mb
-            
-            return info
-            
         except Exception as e:
             logger.error(f"Failed to analyze GIF: {e}")
             return {
@@ -172,7 +342,8 @@ class CompressionService:
         input_dir: str,
         output_dir: Optional[str] = None,
         pattern: str = "*.gif",
-        max_size_mb: float = 14.99
+        max_size_mb: float = 14.99,
+        max_workers: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Compress all GIF files in a directory.
@@ -182,25 +353,26 @@ class CompressionService:
             output_dir: Output directory (defaults to input_dir/compressed)
             pattern: File pattern to match (default: *.gif)
             max_size_mb: Maximum file size in MB
+            max_workers: Worker process count (defaults to CPU count)
             
         Returns:
             Dictionary with batch compression results
         """
-        input_dir = Path(input_dir)
+        input_folder = Path(input_dir)
         
-        if not input_dir.exists():
-            raise FileNotFoundError(f"Input directory not found: {input_dir}")
+        if not input_folder.exists():
+            raise FileNotFoundError(f"Input directory not found: {input_folder}")
         
         # Default output directory
         if output_dir is None:
-            output_dir = input_dir / "compressed"
+            output_folder = input_folder / "compressed"
         else:
-            output_dir = Path(output_dir)
+            output_folder = Path(output_dir)
         
-        output_dir.mkdir(parents=True, exist_ok=True)
+        output_folder.mkdir(parents=True, exist_ok=True)
         
         # Find all GIF files
-        gif_files = list(input_dir.glob(pattern))
+        gif_files = _scan_gif_files(input_folder, pattern)
         
         if not gif_files:
             return {
@@ -211,45 +383,93 @@ class CompressionService:
         
         logger.info(f"Found {len(gif_files)} GIF files to compress")
         
-        # Process each file
-        results = {
-            'success': True,
-            'processed_count': 0,
-            'successful_count': 0,
-            'failed_count': 0,
-            'total_size_before_mb': 0,
-            'total_size_after_mb': 0,
-            'file_results': []
-        }
+        # Per-file outcomes are written by index and reduced once at the end
+        file_count = len(gif_files)
+        file_results: list = [None] * file_count
+        processed = np.zeros(file_count, dtype=bool)
+        succeeded = np.zeros(file_count, dtype=bool)
+        sizes_before_mb = np.zeros(file_count)
+        sizes_after_mb = np.zeros(file_count)
         
-        for gif_file in gif_files:
+        def record(index: int, result: Dict[str, Any]) -> None:
+            file_results[index] = result
+            processed[index] = True
+            if result['success']:
+                succeeded[index] = True
+                sizes_before_mb[index] = result['original_size_mb']
+                sizes_after_mb[index] = result['final_size_mb']
+        
+        # Identical inputs are compressed once; the other copies are linked to its output
+        primary_by_hash: Dict[str, int] = {}
+        duplicates: Dict[int, List[int]] = {}
+        for index, gif_file in enumerate(gif_files):
             try:
-                output_path = output_dir / gif_file.name
+                digest = _content_hash(gif_file)
+            except OSError:
+                digest = f"unreadable:{index}"  # Let compression report the error
+            
+            if digest in primary_by_hash:
+                duplicates[primary_by_hash[digest]].append(index)
+            else:
+                primary_by_hash[digest] = index
+                duplicates[index] = []
+        
+        if len(duplicates) < file_count:
+            logger.info(f"Skipping {file_count - len(duplicates)} duplicate GIF files")
+        
+        # Compress files in parallel; each worker decodes one GIF at a time
+        workers = max_workers or os.cpu_count() or 1
+        batch_timestamp = datetime.now().isoformat()
+        
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(duplicates)),
+            initializer=_worker_init
+        ) as executor:
+            futures = {
+                executor.submit(
+                    _compress_one,
+                    str(gif_files[index]),
+                    str(output_folder / gif_files[index].name),
+                    max_size_mb,
+                    batch_timestamp
+                ): index
+                for index in duplicates
+            }
+            
+            for future in as_completed(futures):
+                index = futures[future]
+                gif_file = gif_files[index]
                 
-                result = self.compress_gif(
-                    str(gif_file),
-                    str(output_path),
-                    max_size_mb=max_size_mb
-                )
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Failed to compress {gif_file.name}: {e}")
+                    file_results[index] = {
+                        'success': False,
+                        'error': str(e),
+                        'input_file': str(gif_file)
+                    }
+                    for duplicate in duplicates[index]:
+                        file_results[duplicate] = dict(file_results[index], input_file=str(gif_files[duplicate]))
+                    continue
                 
-                results['file_results'].append(result)
-                results['processed_count'] += 1
+                record(index, result)
                 
-                if result['success']:
-                    results['successful_count'] += 1
-                    results['total_size_before_mb'] += result['original_size_mb']
-                    results['total_size_after_mb'] += result['final_size_mb']
-                else:
-                    results['failed_count'] += 1
-                    
-            except Exception as e:
-                logger.error(f"Failed to compress {gif_file.name}: {e}")
-                results['failed_count'] += 1
-                results['file_results'].append({
-                    'success': False,
-                    'error': str(e),
-                    'input_file': str(gif_file)
-                })
+                for duplicate in duplicates[index]:
+                    record(duplicate, self._duplicate_result(
+                        result, gif_files[duplicate], output_folder / gif_files[duplicate].name
+                    ))
+        
+        # Keep per-file results in the same order as the input listing
+        results: Dict[str, Any] = {
+            'success': True,
+            'processed_count': int(processed.sum()),
+            'successful_count': int(succeeded.sum()),
+            'failed_count': int(file_count - succeeded.sum()),
+            'total_size_before_mb': float(sizes_before_mb.sum()),
+            'total_size_after_mb': float(sizes_after_mb.sum()),
+            'file_results': file_results
+        }
         
         # Calculate overall statistics
         if results['successful_count'] > 0:
@@ -5,18 +5,143 @@ Integrates state-of-the-art GIF optimization tools like Gifsicle and Gifski
 for superior quality and compression compared to pure Python approaches.
 """
 
+import asyncio
+import math
 import subprocess
 import shutil
 import tempfile
+import threading
+import time
 import os
 from pathlib import Path
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Optional, List, Sequence, Tuple, Iterable
 from dataclasses import dataclass
+from PIL import Image
 
+from app.config import settings as app_settings
 from app.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Detection results shared by every ExternalToolManager in this process,
+# keyed by the configured (gifsicle_path, gifski_path) pair
+_GLOBAL_TOOL_CACHE: Dict[Tuple[Optional[str], Optional[str]], Dict[str, Any]] = {}
+_GLOBAL_TOOL_CACHE_LOCK = threading.Lock()
+
+# Only the end of a tool's stderr is kept for error reporting
+STDERR_TAIL_BYTES = 4096
+
+
+def _run_with_stderr_tail(
+    cmd: List[str],
+    timeout: float,
+    cwd: Optional[Path] = None
+) -> Tuple[int, str]:
+    """
+    Run a command, discarding stdout and keeping only the tail of stderr.
+    
+    stderr is spooled to an anonymous temp file instead of a pipe buffer, so
+    verbose warning streams never sit in memory.
+    
+    Returns:
+        Tuple of (return code, last STDERR_TAIL_BYTES of stderr)
+    """
+    with tempfile.TemporaryFile() as stderr_file:
+        result = subprocess.run(
+            cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=stderr_file,
+            timeout=timeout,
+            cwd=cwd
+        )
+        
+        stderr_file.seek(0, os.SEEK_END)
+        stderr_file.seek(max(0, stderr_file.tell() - STDERR_TAIL_BYTES))
+        stderr_tail = stderr_file.read().decode(errors="replace")
+    
+    return result.returncode, stderr_tail
+
+
+# Gifsicle accepts lossy levels in this range
+GIFSICLE_LOSSY_MIN = 20
+GIFSICLE_LOSSY_MAX = 200
+
+
+def _predict_lossy(attempts: List[Tuple[int, int]], target_bytes: float) -> Optional[int]:
+    """
+    Predict the lossy level at which output reaches target_bytes.
+    
+    Fits log(size) linearly against lossy through the two latest attempts (a secant
+    step) and solves for a point 2% under the target, staying strictly between the
+    most aggressive level known to be too large and the mildest level known to fit.
+    
+    Args:
+        attempts: (lossy, size_bytes) pairs in the order they were tried
+        target_bytes: Size budget
+        
+    Returns:
+        Next lossy level to try, or None when the search can't make progress
+    """
+    too_large = [lossy for lossy, size in attempts if size > target_bytes]
+    fitting = [lossy for lossy, size in attempts if size <= target_bytes]
+    lower = max(too_large) + 1 if too_large else GIFSICLE_LOSSY_MIN
+    upper = min(fitting) - 1 if fitting else GIFSICLE_LOSSY_MAX
+    
+    if lower > upper:
+        return None
+    
+    if len(attempts) < 2:
+        return None
+    
+    (prev_lossy, prev_size), (last_lossy, last_size) = attempts[-2], attempts[-1]
+    if prev_lossy == last_lossy:
+        return None
+    
+    slope = (math.log(last_size) - math.log(prev_size)) / (last_lossy - prev_lossy)
+    if slope >= 0:
+        # More loss isn't shrinking the file, so further attempts won't help
+        return None
+    
+    predicted = last_lossy + (math.log(target_bytes * 0.98) - math.log(last_size)) / slope
+    return int(min(max(round(predicted), lower), upper))
+
+
+def _advise_sequential_read(path: Path, size: int) -> None:
+    """
+    Hint the kernel to read a file ahead in full before a tool reads it sequentially.
+    
+    No-op where posix_fadvise is unavailable (e.g. Windows, macOS). The hints are
+    separate advice values, not flags, so each is issued on its own.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    
+    try:
+        os.posix_fadvise(fd, 0, size, os.POSIX_FADV_SEQUENTIAL)
+        os.posix_fadvise(fd, 0, size, os.POSIX_FADV_WILLNEED)
+    except OSError as e:
+        logger.debug(f"posix_fadvise failed for {path}: {e}")
+    finally:
+        os.close(fd)
+
+
+def _gifsicle_search_concurrency() -> int:
+    """Concurrent Gifsicle variants per file; half the cores leaves room for batch workers."""
+    return max(1, (os.cpu_count() or 1) // 2)
+
+
+def _fast_temp_dir() -> Optional[str]:
+    """Return a RAM-backed temp directory (tmpfs) when available, else the default."""
+    shm = "/dev/shm"
+    if os.path.isdir(shm) and os.access(shm, os.W_OK):
+        return shm
+    return None
+
 
 @dataclass
 class ExternalToolSettings:
@@ -43,22 +168,48 @@ class ExternalToolManager:
     
     def __init__(self, settings: Optional[ExternalToolSettings] = None):
         self.settings = settings or ExternalToolSettings()
-        self._tool_cache = {}  # Cache tool availability
+        self._tool_cache: Dict[str, str] = {}  # Cache tool availability
         
     def detect_tools(self) -> Dict[str, bool]:
         """
         Detect which external tools are available on the system.
         
+        Results are cached process-wide for TOOL_DETECT_TTL_S seconds so repeated
+        managers (one per file in batch mode) don't re-run the --version probes.
+        
         Returns:
             Dictionary mapping tool names to availability status
         """
+        cache_key = (self.settings.gifsicle_path, self.settings.gifski_path)
+        
+        with _GLOBAL_TOOL_CACHE_LOCK:
+            cached = _GLOBAL_TOOL_CACHE.get(cache_key)
+            if cached and time.monotonic() - cached["detected_at"] < app_settings.TOOL_DETECT_TTL_S:
+                self._tool_cache.update(cached["paths"])
+                return dict(cached["tools"])
+            
+            tools, paths = self._probe_tools()
+            _GLOBAL_TOOL_CACHE[cache_key] = {
+                "tools": tools,
+                "paths": paths,
+                "detected_at": time.monotonic()
+            }
+        
+        self._tool_cache.update(paths)
+        return dict(tools)
+    
+    def _probe_tools(self) -> Tuple[Dict[str, bool], Dict[str, str]]:
+        """Locate and test each tool, returning (availability, executable paths)."""
         tools = {}
+        paths = {}
+        # Deployers who know their tool paths can skip the --version probes
+        skip_probe = app_settings.GIFER_SKIP_TOOL_DETECT
         
         # Check Gifsicle
         gifsicle_path = self.settings.gifsicle_path or self._find_executable("gifsicle")
-        if gifsicle_path and self._test_gifsicle(gifsicle_path):
+        if gifsicle_path and (skip_probe or self._test_gifsicle(gifsicle_path)):
             tools["gifsicle"] = True
-            self._tool_cache["gifsicle_path"] = gifsicle_path
+            paths["gifsicle_path"] = gifsicle_path
             logger.info(f"✅ Gifsicle detected at: {gifsicle_path}")
         else:
             tools["gifsicle"] = False
@@ -66,15 +217,15 @@ class ExternalToolManager:
         
         # Check Gifski
         gifski_path = self.settings.gifski_path or self._find_executable("gifski")
-        if gifski_path and self._test_gifski(gifski_path):
+        if gifski_path and (skip_probe or self._test_gifski(gifski_path)):
             tools["gifski"] = True
-            self._tool_cache["gifski_path"] = gifski_path
+            paths["gifski_path"] = gifski_path
             logger.info(f"✅ Gifski detected at: {gifski_path}")
         else:
             tools["gifski"] = False
             logger.info("⚠️ Gifski not found. Install from: https://gif.ski/")
         
-        return tools
+        return tools, paths
     
     def optimize_with_gifsicle(
         self, 
@@ -100,13 +251,19 @@ class ExternalToolManager:
                 return {"success": False, "error": "Gifsicle not available"}
             gifsicle_path = self._tool_cache["gifsicle_path"]
         
-        input_path = Path(input_path)
-        output_path = Path(output_path)
+        input_file = Path(input_path)
+        output_file = Path(output_path)
+        
+        if not input_file.exists():
+            return {"success": False, "error": f"Input file not found: {input_file}"}
         
-        if not input_path.exists():
-            return {"success": False, "error": f"Input file not found: {input_path}"}
+        original_size = input_file.stat().st_size
         
-        original_size = input_path.stat().st_size
+        # Every attempt below re-reads the whole input, so prime the page cache once
+        _advise_sequential_read(input_file, original_size)
+        
+        # Convert once here rather than on every attempt's argv
+        input_path_str = str(input_file)
         
         try:
             # Start with base settings
@@ -117,56 +274,50 @@ class ExternalToolManager:
             # Progressive optimization if target size specified
             if target_size_mb:
                 target_bytes = target_size_mb * 1024 * 1024
-                attempts = []
                 
-                # Try different lossy levels
-                for lossy in [60, 80, 100, 120, 150]:
-                    result = self._run_gifsicle(
-                        gifsicle_path, input_path, output_path,
-                        lossy_level=lossy,
-                        optimize_level=optimize_level,
-                        color_limit=color_limit
+                # Output size shrinks monotonically with lossy level: with spare cores run
+                # the whole ladder at once, otherwise predict the level from a size fit
+                if self._can_search_in_parallel():
+                    search = self._parallel_gifsicle
+                    lossy_variants = [(lossy, color_limit) for lossy in [60, 80, 100, 120, 150]]
+                    chosen = search(
+                        gifsicle_path, input_path_str, output_file,
+                        lossy_variants, target_bytes, optimize_level
+                    )
+                    chosen_lossy = lossy_variants[chosen][0] if chosen is not None else None
+                else:
+                    search = self._bisect_gifsicle
+                    chosen_lossy = self._regress_gifsicle_lossy(
+                        gifsicle_path, input_path_str, output_file,
+                        target_bytes, optimize_level, color_limit
                     )
-                    
-                    if result["success"] and output_path.exists():
-                        file_size = output_path.stat().st_size
-                        attempts.append({
-                            "lossy": lossy,
-                            "size": file_size,
-                            "under_target": file_size <= target_bytes
-                        })
-                        
-                        if file_size <= target_bytes:
-                            logger.info(f"✅ Gifsicle achieved target size with lossy={lossy}")
-                            break
                 
-                # If still too large, try with color reduction
-                if not attempts or not attempts[-1]["under_target"]:
-                    for colors in [128, 96, 64, 48]:
-                        result = self._run_gifsicle(
-                            gifsicle_path, input_path, output_path,
-                            lossy_level=150,  # High lossy with color limit
-                            optimize_level=optimize_level,
-                            color_limit=colors
-                        )
-                        
-                        if result["success"] and output_path.exists():
-                            file_size = output_path.stat().st_size
-                            if file_size <= target_bytes:
-                                logger.info(f"✅ Gifsicle achieved target size with {colors} colors")
-                                break
+                if chosen_lossy is not None:
+                    lossy_level = chosen_lossy
+                    logger.info(f"✅ Gifsicle achieved target size with lossy={lossy_level}")
+                else:
+                    # If still too large, try with color reduction
+                    color_variants = [(150, colors) for colors in [128, 96, 64, 48]]  # High lossy with color limit
+                    chosen = search(
+                        gifsicle_path, input_path_str, output_file,
+                        color_variants, target_bytes, optimize_level
+                    )
+                    
+                    if chosen is not None:
+                        lossy_level, color_limit = color_variants[chosen]
+                        logger.info(f"✅ Gifsicle achieved target size with {color_limit} colors")
             else:
-                # Single optimization attempt
-                result = self._run_gifsicle(
-                    gifsicle_path, input_path, output_path,
+                # Single optimization attempt; success shows up as the output file
+                self._run_gifsicle(
+                    gifsicle_path, input_path_str, output_file,
                     lossy_level=lossy_level,
                     optimize_level=optimize_level,
                     color_limit=color_limit
                 )
             
             # Final results
-            if output_path.exists():
-                final_size = output_path.stat().st_size
+            if output_file.exists():
+                final_size = output_file.stat().st_size
                 compression_ratio = (original_size - final_size) / original_size * 100
                 
                 return {
@@ -188,6 +339,44 @@ class ExternalToolManager:
             logger.error(f"Gifsicle optimization failed: {e}")
             return {"success": False, "error": str(e)}
     
+    def optimize_gif_bytes(self, data: bytes, lossy: Optional[int] = None) -> Optional[bytes]:
+        """
+        Re-optimize an in-memory GIF with Gifsicle over stdin/stdout.
+        
+        Runs a pass at the configured -O level (inter-frame diffing and
+        transparency elimination), lossless unless a lossy level is given; the
+        size-targeted lossy search stays with optimize_with_gifsicle.
+        
+        Args:
+            data: Encoded GIF bytes
+            lossy: Optional --lossy level (None or 0 keeps the pass lossless)
+            
+        Returns:
+            Optimized GIF bytes, or None if Gifsicle is unavailable or fails
+        """
+        gifsicle_path = self._tool_cache.get("gifsicle_path")
+        if not gifsicle_path:
+            if not self.detect_tools().get("gifsicle"):
+                return None
+            gifsicle_path = self._tool_cache["gifsicle_path"]
+        
+        cmd = [gifsicle_path, f"-O{self.settings.gifsicle_optimize}", "--no-warnings"]
+        if lossy:
+            cmd.append(f"--lossy={lossy}")
+        
+        try:
+            result = subprocess.run(cmd, input=data, capture_output=True, timeout=120)
+        except (subprocess.TimeoutExpired, OSError) as e:
+            logger.warning(f"Gifsicle stream optimization failed: {e}")
+            return None
+        
+        if result.returncode != 0 or not result.stdout:
+            stderr_tail = result.stderr[-STDERR_TAIL_BYTES:].decode("utf-8", errors="replace").strip()
+            logger.warning(f"Gifsicle stream optimization failed: {stderr_tail or 'no output'}")
+            return None
+        
+        return result.stdout
+    
     def optimize_with_gifski(
         self,
         frames_dir: str,
@@ -214,41 +403,45 @@ class ExternalToolManager:
                 return {"success": False, "error": "Gifski not available"}
             gifski_path = self._tool_cache["gifski_path"]
         
-        frames_dir = Path(frames_dir)
-        output_path = Path(output_path)
+        frames_folder = Path(frames_dir)
+        output_file = Path(output_path)
         
-        if not frames_dir.exists():
-            return {"success": False, "error": f"Frames directory not found: {frames_dir}"}
+        if not frames_folder.exists():
+            return {"success": False, "error": f"Frames directory not found: {frames_folder}"}
         
         # Find PNG frames
-        frame_files = sorted(frames_dir.glob("*.png"))
+        frame_files = sorted(frames_folder.glob("*.png"))
         if not frame_files:
             return {"success": False, "error": "No PNG frames found"}
         
         try:
+            # Gifski runs inside frames_dir, so anything else on the command line must be absolute
+            if os.sep in gifski_path:
+                gifski_path = os.path.abspath(gifski_path)
+            
             # Build Gifski command
             cmd = [
                 str(gifski_path),
-                "-o", str(output_path),
+                "-o", str(output_file.resolve()),
                 "--fps", str(fps),
                 "--quality", str(quality),
                 "--quiet"
             ]
             
-            # Add frame files
-            cmd.extend([str(f) for f in frame_files])
+            # Add frame files by bare name; full paths for thousands of frames can
+            # overflow ARG_MAX (E2BIG)
+            cmd.extend(f.name for f in frame_files)
             
             logger.info(f"Running Gifski with {len(frame_files)} frames at {fps} FPS, quality {quality}")
             
-            result = subprocess.run(
+            returncode, stderr_tail = _run_with_stderr_tail(
                 cmd,
-                capture_output=True,
-                text=True,
-                timeout=300  # 5 minute timeout
+                timeout=300,  # 5 minute timeout
+                cwd=frames_folder
             )
             
-            if result.returncode == 0 and output_path.exists():
-                file_size = output_path.stat().st_size
+            if returncode == 0 and output_file.exists():
+                file_size = output_file.stat().st_size
                 logger.info(f"✅ Gifski created GIF: {file_size / 1024 / 1024:.2f} MB")
                 
                 return {
@@ -262,7 +455,7 @@ class ExternalToolManager:
                     }
                 }
             else:
-                error_msg = result.stderr or "Unknown error"
+                error_msg = stderr_tail or "Unknown error"
                 logger.error(f"Gifski failed: {error_msg}")
                 return {"success": False, "error": f"Gifski failed: {error_msg}"}
                 
@@ -272,6 +465,34 @@ class ExternalToolManager:
             logger.error(f"Gifski execution failed: {e}")
             return {"success": False, "error": str(e)}
     
+    def optimize_with_gifski_frames(
+        self,
+        frames: Iterable[Image.Image],
+        output_path: str,
+        fps: float = 3.33,
+        quality: int = 90
+    ) -> Dict[str, Any]:
+        """
+        Create GIF using Gifski from in-memory frames.
+        
+        Frames are staged as uncompressed PNGs on tmpfs (when available) so the
+        hand-off to Gifski skips deflate and never touches disk.
+        
+        Args:
+            frames: Frames in playback order
+            output_path: Output GIF path
+            fps: Frames per second
+            quality: Quality level (1-100)
+            
+        Returns:
+            Results dictionary
+        """
+        with tempfile.TemporaryDirectory(prefix="gifski_", dir=_fast_temp_dir()) as frames_dir:
+            for index, frame in enumerate(frames):
+                frame.save(Path(frames_dir) / f"{index:06d}.png", compress_level=0)
+            
+            return self.optimize_with_gifski(frames_dir, output_path, fps, quality)
+    
     def _find_executable(self, name: str) -> Optional[str]:
         """Find executable in system PATH."""
         return shutil.which(name)
@@ -281,8 +502,8 @@ class ExternalToolManager:
         try:
             result = subprocess.run(
                 [path, "--version"],
-                capture_output=True,
-                text=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
                 timeout=10
             )
             return result.returncode == 0
@@ -294,26 +515,255 @@ class ExternalToolManager:
         try:
             result = subprocess.run(
                 [path, "--version"],
-                capture_output=True,
-                text=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
                 timeout=10
             )
             return result.returncode == 0
         except:
             return False
     
-    def _run_gifsicle(
+    def _regress_gifsicle_lossy(
+        self,
+        gifsicle_path: str,
+        input_path: str,
+        output_path: Path,
+        target_bytes: float,
+        optimize_level: int = 3,
+        color_limit: Optional[int] = None,
+        start_lossy: int = 60,
+        max_attempts: int = 5
+    ) -> Optional[int]:
+        """
+        Find a lossy level that fits target_bytes using _predict_lossy between attempts.
+        
+        Stops early once a fitting result is within 5% of the target. Returns the
+        mildest fitting lossy level found, leaving its output at output_path. If none
+        fit, returns None and output_path holds the most aggressive attempt.
+        """
+        trial_path = output_path.with_name(f"{output_path.stem}.trial{output_path.suffix}")
+        attempts: List[Tuple[int, int]] = []
+        chosen = None
+        lossy: Optional[int] = start_lossy
+        
+        try:
+            while lossy is not None and len(attempts) < max_attempts:
+                result = self._run_gifsicle(
+                    gifsicle_path, input_path, trial_path,
+                    lossy_level=lossy,
+                    optimize_level=optimize_level,
+                    color_limit=color_limit
+                )
+                
+                if not (result["success"] and trial_path.exists()):
+                    break
+                
+                file_size = trial_path.stat().st_size
+                attempts.append((lossy, file_size))
+                logger.debug(f"Gifsicle lossy={lossy}: {file_size / 1024 / 1024:.2f} MB")
+                
+                if file_size <= target_bytes:
+                    if chosen is None or lossy < chosen:
+                        chosen = lossy
+                        os.replace(trial_path, output_path)
+                    if file_size >= target_bytes * 0.95:
+                        break  # Close enough that a milder level buys little quality
+                elif chosen is None and lossy == max(level for level, _ in attempts):
+                    # Keep the most aggressive attempt so far as the fallback output
+                    os.replace(trial_path, output_path)
+                
+                if len(attempts) == 1:
+                    # A second point is needed before the size curve can be fitted
+                    lossy = min(lossy + 40, GIFSICLE_LOSSY_MAX) if file_size > target_bytes else None
+                else:
+                    lossy = _predict_lossy(attempts, target_bytes)
+                
+                if lossy is not None and any(lossy == level for level, _ in attempts):
+                    break
+        finally:
+            if trial_path.exists():
+                trial_path.unlink()
+        
+        return chosen
+    
+    def _bisect_gifsicle(
+        self,
+        gifsicle_path: str,
+        input_path: str,
+        output_path: Path,
+        variants: Sequence[Tuple[int, Optional[int]]],
+        target_bytes: float,
+        optimize_level: int = 3
+    ) -> Optional[int]:
+        """
+        Binary-search (lossy, colors) variants ordered from mildest to most aggressive.
+        
+        Returns the index of the mildest variant that fits the target, leaving its
+        output at output_path. If none fit, returns None and output_path holds the
+        most aggressive variant tried.
+        """
+        trial_path = output_path.with_name(f"{output_path.stem}.trial{output_path.suffix}")
+        chosen = None
+        lo, hi = 0, len(variants) - 1
+        
+        try:
+            while lo <= hi:
+                mid = (lo + hi) // 2
+                lossy, colors = variants[mid]
+                result = self._run_gifsicle(
+                    gifsicle_path, input_path, trial_path,
+                    lossy_level=lossy,
+                    optimize_level=optimize_level,
+                    color_limit=colors
+                )
+                
+                if not (result["success"] and trial_path.exists()):
+                    break
+                
+                file_size = trial_path.stat().st_size
+                logger.debug(f"Gifsicle lossy={lossy} colors={colors}: {file_size / 1024 / 1024:.2f} MB")
+                
+                if file_size <= target_bytes:
+                    chosen = mid
+                    os.replace(trial_path, output_path)
+                    hi = mid - 1
+                else:
+                    if chosen is None:
+                        # Keep the most aggressive attempt so far as the fallback output
+                        os.replace(trial_path, output_path)
+                    lo = mid + 1
+        finally:
+            if trial_path.exists():
+                trial_path.unlink()
+        
+        return chosen
+    
+    def _can_search_in_parallel(self) -> bool:
+        """Parallel search needs spare cores and must not nest inside a running event loop."""
+        if _gifsicle_search_concurrency() < 2:
+            return False
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return True
+        return False
+    
+    def _parallel_gifsicle(
         self,
         gifsicle_path: str,
-        input_path: Path,
+        input_path: str,
+        output_path: Path,
+        variants: Sequence[Tuple[int, Optional[int]]],
+        target_bytes: float,
+        optimize_level: int = 3
+    ) -> Optional[int]:
+        """
+        Run all (lossy, colors) variants concurrently; same contract as _bisect_gifsicle.
+        
+        Returns the index of the mildest variant that fits the target, leaving its
+        output at output_path. If none fit, returns None and output_path holds the
+        most aggressive variant that succeeded.
+        """
+        with tempfile.TemporaryDirectory(prefix="gifsicle_", dir=_fast_temp_dir()) as work_dir:
+            trial_paths = [Path(work_dir) / f"variant_{index}.gif" for index in range(len(variants))]
+            
+            succeeded = asyncio.run(self._run_gifsicle_variants(
+                gifsicle_path, input_path, trial_paths, variants, optimize_level
+            ))
+            
+            sizes = [
+                path.stat().st_size if ok and path.exists() else None
+                for ok, path in zip(succeeded, trial_paths)
+            ]
+            for (lossy, colors), size in zip(variants, sizes):
+                if size is not None:
+                    logger.debug(f"Gifsicle lossy={lossy} colors={colors}: {size / 1024 / 1024:.2f} MB")
+            
+            fitting = [index for index, size in enumerate(sizes) if size is not None and size <= target_bytes]
+            produced = [index for index, size in enumerate(sizes) if size is not None]
+            
+            chosen = fitting[0] if fitting else None
+            keep = chosen if chosen is not None else (produced[-1] if produced else None)
+            
+            if keep is not None:
+                # tmpfs may be a different filesystem, so move rather than rename
+                shutil.move(str(trial_paths[keep]), str(output_path))
+        
+        return chosen
+    
+    async def _run_gifsicle_variants(
+        self,
+        gifsicle_path: str,
+        input_path: str,
+        trial_paths: List[Path],
+        variants: Sequence[Tuple[int, Optional[int]]],
+        optimize_level: int
+    ) -> List[bool]:
+        """Run one Gifsicle process per variant, bounded by _gifsicle_search_concurrency."""
+        semaphore = asyncio.Semaphore(_gifsicle_search_concurrency())
+        
+        async def run_variant(trial_path: Path, lossy: int, colors: Optional[int]) -> bool:
+            async with semaphore:
+                return await self._run_gifsicle_async(
+                    gifsicle_path, input_path, trial_path,
+                    lossy_level=lossy,
+                    optimize_level=optimize_level,
+                    color_limit=colors
+                )
+        
+        return list(await asyncio.gather(*(
+            run_variant(trial_path, lossy, colors)
+            for trial_path, (lossy, colors) in zip(trial_paths, variants)
+        )))
+    
+    async def _run_gifsicle_async(
+        self,
+        gifsicle_path: str,
+        input_path: str,
         output_path: Path,
         lossy_level: int = 80,
         optimize_level: int = 3,
         color_limit: Optional[int] = None
-    ) -> Dict[str, Any]:
-        """Execute Gifsicle with specified settings."""
+    ) -> bool:
+        """Async counterpart of _run_gifsicle; returns whether output was produced."""
+        cmd = self._gifsicle_command(
+            gifsicle_path, input_path, output_path,
+            lossy_level, optimize_level, color_limit
+        )
+        
+        try:
+            logger.debug(f"Running: {' '.join(cmd)}")
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+            try:
+                returncode = await asyncio.wait_for(process.wait(), timeout=120)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                logger.warning(f"Gifsicle timed out with lossy={lossy_level}")
+                return False
+        except Exception as e:
+            logger.warning(f"Gifsicle failed with lossy={lossy_level}: {e}")
+            return False
+        
+        # Gifsicle sometimes returns non-zero but still creates valid output
+        return returncode == 0 or output_path.exists()
+    
+    def _gifsicle_command(
+        self,
+        gifsicle_path: str,
+        input_path: str,
+        output_path: Path,
+        lossy_level: int = 80,
+        optimize_level: int = 3,
+        color_limit: Optional[int] = None
+    ) -> List[str]:
+        """Build the Gifsicle argv for one variant; paths that don't vary arrive as str."""
         cmd = [
-            str(gifsicle_path),
+            gifsicle_path,
             f"-O{optimize_level}",
             f"--lossy={lossy_level}",
             "--no-warnings"
@@ -322,21 +772,32 @@ class ExternalToolManager:
         if color_limit:
             cmd.append(f"--colors={color_limit}")
         
-        cmd.extend([str(input_path), "-o", str(output_path)])
+        cmd.extend([input_path, "-o", str(output_path)])
+        return cmd
+    
+    def _run_gifsicle(
+        self,
+        gifsicle_path: str,
+        input_path: str,
+        output_path: Path,
+        lossy_level: int = 80,
+        optimize_level: int = 3,
+        color_limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Execute Gifsicle with specified settings."""
+        cmd = self._gifsicle_command(
+            gifsicle_path, input_path, output_path,
+            lossy_level, optimize_level, color_limit
+        )
         
         try:
             logger.debug(f"Running: {' '.join(cmd)}")
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=120
-            )
+            returncode, stderr_tail = _run_with_stderr_tail(cmd, timeout=120)
             
-            if result.returncode == 0:
+            if returncode == 0:
                 return {"success": True}
             else:
-                error_msg = result.stderr or "Unknown error"
+                error_msg = stderr_tail or "Unknown error"
                 logger.warning(f"Gifsicle warning/error: {error_msg}")
                 # Gifsicle sometimes returns non-zero but still creates valid output
                 return {"success": output_path.exists()}
@@ -9,14 +9,21 @@ Implements 2025 best practices for GIF compression:
 - Target file size management (14.99MB max)
 """
 
+import io
 import os
 import tempfile
-import shutil
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Tuple, List
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, List
 from dataclasses import dataclass
+import numpy as np
 from PIL import Image, ImageSequence
-import imageio
+
+try:
+    import imagequant
+except ImportError:  # pragma: no cover - fall back to Pillow's quantizer
+    imagequant = None
 
 from app.logger import get_logger
 from .external_tools import ExternalToolManager, ExternalToolSettings
@@ -34,10 +41,12 @@ class CompressionSettings:
     # Color optimization
     max_colors: int = 256  # Start with full palette, reduce if needed
     min_colors: int = 32   # Minimum colors to maintain quality
+    palette_sampling_factor: int = 3  # Palette trains on every Nth pixel of every Nth row (1 = all)
     
     # Frame optimization
     min_frame_duration: float = 0.1  # Minimum seconds per frame (max 10 FPS)
     duplicate_threshold: float = 0.95  # Similarity threshold for duplicate detection
+    cache_frame_hashes: bool = True  # Keep frame hashes in <input>.hashes.npz for repeat runs
     
     # Quality settings
     enable_lossy: bool = True
@@ -58,38 +67,108 @@ class CompressionSettings:
     max_height: int = 1080
 
 
+FrameData = Tuple[List[Image.Image], List[float]]
+
+# Palette sizes tried by the color search, largest first
+COLOR_LADDER = (256, 192, 128, 96, 64, 48, 32, 24, 16)
+
+# Bits in a frame's difference hash (8×8 comparisons)
+HASH_BITS = 64
+
+
+# Frame delay Pillow reports when a GIF carries no Graphic Control Extension
+DEFAULT_FRAME_DELAY_MS = 100
+
+
+def _scan_gif_blocks(data: bytes) -> Tuple[List[int], Tuple[int, int]]:
+    """
+    Walk a GIF's block structure and return (frame delays in ms, (width, height)).
+    
+    Image data sub-blocks are skipped by their length bytes, so no frame is
+    LZW-decoded. Each delay comes from the Graphic Control Extension before
+    the frame; frames without one repeat the previous delay.
+    """
+    if data[:6] not in (b"GIF87a", b"GIF89a"):
+        raise ValueError("Not a GIF file")
+    width = int.from_bytes(data[6:8], "little")
+    height = int.from_bytes(data[8:10], "little")
+    packed = data[10]
+    pos = 13
+    if packed & 0x80:
+        pos += 3 << ((packed & 0x07) + 1)  # Global color table
+    
+    delays: List[int] = []
+    delay_ms = DEFAULT_FRAME_DELAY_MS
+    end = len(data)
+    while pos < end:
+        block = data[pos]
+        if block == 0x3B:  # Trailer
+            break
+        if block == 0x21:  # Extension: label, then sub-blocks
+            if data[pos + 1] == 0xF9 and data[pos + 2] >= 4:
+                delay_ms = int.from_bytes(data[pos + 4:pos + 6], "little") * 10
+            pos += 2
+        elif block == 0x2C:  # Image descriptor, optional local table, LZW code size
+            local_packed = data[pos + 9]
+            pos += 10
+            if local_packed & 0x80:
+                pos += 3 << ((local_packed & 0x07) + 1)
+            pos += 1
+            delays.append(delay_ms)
+        else:
+            raise ValueError(f"Unexpected GIF block 0x{block:02x} at offset {pos}")
+        
+        # Skip the sub-block chain up to its zero-length terminator
+        while pos < end and data[pos]:
+            pos += data[pos] + 1
+        pos += 1
+    
+    if pos > end:
+        raise ValueError("Truncated GIF")
+    return delays, (width, height)
+
+
 class GifOptimizer:
     """Advanced GIF compression with intelligent quality preservation."""
     
+    # Decoded GIFs are large, so only keep a couple around
+    FRAME_CACHE_SIZE = 2
+    
     def __init__(self, settings: Optional[CompressionSettings] = None):
         self.settings = settings or CompressionSettings()
         self.external_tools = ExternalToolManager(self.settings.external_tool_settings)
+        self._frame_cache: "OrderedDict[Tuple[str, int, int], FrameData]" = OrderedDict()
+        self._frame_pool: Optional[ThreadPoolExecutor] = None
         
     def optimize_gif(
         self, 
         input_path: str, 
         output_path: str,
-        target_filename: Optional[str] = None
+        target_filename: Optional[str] = None,
+        preloaded: Optional[FrameData] = None
     ) -> dict:
         """
         Optimize GIF file size while maintaining quality.
         
+        If preloaded (frames, durations) are given they are used instead of
+        decoding input_path again.
+        
         Returns compression statistics and success status.
         """
-        input_path = Path(input_path)
-        output_path = Path(output_path)
+        input_file = Path(input_path)
+        output_file = Path(output_path)
         
-        if not input_path.exists():
-            raise FileNotFoundError(f"Input GIF not found: {input_path}")
+        if not input_file.exists():
+            raise FileNotFoundError(f"Input GIF not found: {input_file}")
         
         # Get original file info
-        original_size = input_path.stat().st_size
-        logger.info(f"Starting optimization of {input_path.name} ({original_size / 1024 / 1024:.2f} MB)")
+        original_size = input_file.stat().st_size
+        logger.info(f"Starting optimization of {input_file.name} ({original_size / 1024 / 1024:.2f} MB)")
         
         # Create output directory if needed
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
         
-        stats = {
+        stats: Dict[str, Any] = {
             'original_size': original_size,
             'target_size': self.settings.max_file_size,
             'techniques_used': [],
@@ -99,53 +178,35 @@ class GifOptimizer:
         }
         
         try:
-            # Load GIF frames
-            frames, durations = self._load_gif_frames(str(input_path))
-            original_frame_count = len(frames)
+            # Load GIF frames; Step 1 (duplicate removal) runs while decoding
+            # so duplicate frames are never held in memory
+            if preloaded is not None:
+                frames, durations = preloaded
+                original_frame_count = len(frames)
+                if self.settings.remove_duplicates:
+                    frames, durations = self._remove_duplicates(frames, durations)
+            elif self.settings.remove_duplicates:
+                frames, durations, original_frame_count = self._load_unique_frames(str(input_file))
+            else:
+                frames, durations = self._load_gif_frames(str(input_file))
+                original_frame_count = len(frames)
+            
+            logger.info(f"Loaded {original_frame_count} frames from original GIF")
             
-            logger.info(f"Loaded {len(frames)} frames from original GIF")
+            if len(frames) < original_frame_count:
+                stats['techniques_used'].append(f'duplicate_removal ({original_frame_count} → {len(frames)} frames)')
             
             # Progressive optimization until target size is reached
             optimized_frames = frames
             optimized_durations = durations
             
-            # Step 1: Remove duplicate frames
-            if self.settings.remove_duplicates:
-                optimized_frames, optimized_durations = self._remove_duplicates(
-                    optimized_frames, optimized_durations
-                )
-                if len(optimized_frames) < len(frames):
-                    stats['techniques_used'].append(f'duplicate_removal ({len(frames)} → {len(optimized_frames)} frames)')
-            
             # Step 2: Optimize frame timing
             if min(optimized_durations) < self.settings.min_frame_duration:
                 optimized_durations = self._optimize_frame_timing(optimized_durations)
                 stats['techniques_used'].append('frame_timing_optimization')
             
-            # Step 3: Progressive color reduction with quality check
-            best_colors = self.settings.max_colors
-            for colors in [256, 192, 128, 96, 64, 48, 32, 24, 16]:
-                if colors < self.settings.min_colors:
-                    break
-                    
-                # Test with this color count
-                test_path = self._create_test_gif(
-                    optimized_frames, 
-                    optimized_durations, 
-                    colors
-                )
-                
-                test_size = Path(test_path).stat().st_size
-                logger.debug(f"Testing with {colors} colors: {test_size / 1024 / 1024:.2f} MB")
-                
-                if test_size <= self.settings.max_file_size:
-                    best_colors = colors
-                    # Clean up test file
-                    os.unlink(test_path)
-                    break
-                    
-                # Clean up test file
-                os.unlink(test_path)
+            # Step 3: Find the largest palette that fits, encoding in memory
+            best_colors, best_gif = self._search_colors(optimized_frames, optimized_durations)
             
             if best_colors < self.settings.max_colors:
                 stats['techniques_used'].append(f'color_reduction (to {best_colors} colors)')
@@ -157,73 +218,58 @@ class GifOptimizer:
             # Step 4: Try frame subsampling before reducing quality
             if (len(optimized_frames) > 10 and 
                 self.settings.enable_frame_subsampling and
-                best_colors == self.settings.min_colors):
+                best_colors == self.settings.min_colors and
+                len(best_gif) > self.settings.max_file_size):
                 
                 # Estimate if frame dropping would help
                 test_frames = optimized_frames[::2]  # Every other frame
                 test_durations = [d * 2 for d in optimized_durations[::2]]  # Double duration
                 
-                test_path = self._create_test_gif(test_frames, test_durations, best_colors)
-                test_size = Path(test_path).stat().st_size
+                test_gif = self._encode_gif(
+                    self._quantize_frames(test_frames, best_colors),
+                    test_durations
+                )
                 
-                if test_size <= self.settings.max_file_size:
+                if len(test_gif) <= self.settings.max_file_size:
                     optimized_frames = test_frames
                     optimized_durations = test_durations
-                    stats['techniques_used'].append(f'frame_subsampling ({len(frames)} → {len(optimized_frames)} frames)')
-                    logger.info(f"Frame subsampling successful: {len(frames)} → {len(optimized_frames)} frames")
-                
-                os.unlink(test_path)
-            
-            # Step 5: Create optimized GIF
-            temp_path = self._create_optimized_gif(
-                optimized_frames,
-                optimized_durations,
-                best_colors
-            )
+                    best_gif = test_gif
+                    stats['techniques_used'].append(f'frame_subsampling ({original_frame_count} → {len(optimized_frames)} frames)')
+                    logger.info(f"Frame subsampling successful: {original_frame_count} → {len(optimized_frames)} frames")
             
-            temp_size = Path(temp_path).stat().st_size
+            # Step 5: Keep working on the chosen encode in memory
+            current_gif = best_gif
             
             # Step 6: Try external tool optimization (Gifsicle) for high-quality compression
-            if (temp_size > self.settings.max_file_size and 
+            if (len(current_gif) > self.settings.max_file_size and 
                 self.settings.use_external_tools):
                 
-                external_result = self.external_tools.optimize_with_gifsicle(
-                    temp_path,
-                    temp_path + "_gifsicle.gif",
-                    target_size_mb=self.settings.max_file_size / 1024 / 1024
-                )
+                external_gif, external_result = self._optimize_with_gifsicle(current_gif)
                 
-                if external_result.get("success"):
-                    external_path = temp_path + "_gifsicle.gif"
-                    external_size = Path(external_path).stat().st_size
-                    
-                    if external_size < temp_size:
-                        os.unlink(temp_path)  # Remove original
-                        shutil.move(external_path, temp_path)  # Use optimized version
-                        temp_size = external_size
-                        stats['techniques_used'].append(f'gifsicle_optimization (lossy={external_result.get("settings_used", {}).get("lossy", "auto")})')
-                        logger.info(f"Gifsicle optimization successful: {external_result['compression_ratio']:.1f}% additional reduction")
+                if external_gif is not None and len(external_gif) < len(current_gif):
+                    current_gif = external_gif
+                    stats['techniques_used'].append(f'gifsicle_optimization (lossy={external_result.get("settings_used", {}).get("lossy", "auto")})')
+                    logger.info(f"Gifsicle optimization successful: {external_result['compression_ratio']:.1f}% additional reduction")
             
             # Step 7: If still too large, try resizing (last resort)
-            if temp_size > self.settings.max_file_size and self.settings.allow_resize:
-                resized_path = self._resize_gif_if_needed(temp_path, temp_size)
-                if resized_path != temp_path:
-                    os.unlink(temp_path)
-                    temp_path = resized_path
-                    temp_size = Path(temp_path).stat().st_size
+            if len(current_gif) > self.settings.max_file_size and self.settings.allow_resize:
+                resized_gif = self._resize_gif_if_needed(
+                    optimized_frames, optimized_durations, len(current_gif), best_colors
+                )
+                if resized_gif is not None:
+                    current_gif = resized_gif
                     stats['techniques_used'].append('dimension_reduction')
             
             # Apply custom filename if requested
-            final_output_path = output_path
+            final_output_path = output_file
             if target_filename:
                 # Replace the filename part but keep the directory
-                final_output_path = output_path.parent / f"{target_filename}.gif"
+                final_output_path = output_file.parent / f"{target_filename}.gif"
             
-            # Move optimized file to final location
-            import shutil
-            shutil.move(temp_path, final_output_path)
+            # The only disk write of the optimized GIF
+            final_output_path.write_bytes(current_gif)
             
-            final_size = final_output_path.stat().st_size
+            final_size = len(current_gif)
             compression_ratio = (original_size - final_size) / original_size * 100
             
             stats.update({
@@ -245,22 +291,174 @@ class GifOptimizer:
             stats['error'] = str(e)
             return stats
     
+    def _iter_gif_frames(self, gif_path: str) -> Iterator[Tuple[Image.Image, float]]:
+        """Yield each frame as RGB with its duration in seconds, decoding lazily."""
+        with Image.open(gif_path) as img:
+            for frame in ImageSequence.Iterator(img):
+                # convert() returns a new image, so no copy of the decoder frame is needed
+                duration = frame.info.get('duration', 100) / 1000.0  # Convert ms to seconds
+                yield frame.convert('RGB'), duration
+    
     def _load_gif_frames(self, gif_path: str) -> Tuple[List[Image.Image], List[float]]:
         """Load all frames and their durations from a GIF file."""
         frames = []
         durations = []
         
+        for frame, duration in self._iter_gif_frames(gif_path):
+            frames.append(frame)
+            durations.append(duration)
+        
+        return frames, durations
+    
+    def _load_unique_frames(self, gif_path: str) -> Tuple[List[Image.Image], List[float], int]:
+        """
+        Decode a GIF keeping only frames that differ from their predecessor.
+        
+        Applies the same rule as _remove_duplicates one frame at a time, so a
+        duplicate is dropped as soon as it is decoded. Frame hashes are kept in
+        a sidecar file so later runs on the same input skip hashing and never
+        convert duplicate frames. Returns (frames, durations, original_frame_count).
+        """
+        cached_hashes = self._read_hash_cache(gif_path) if self.settings.cache_frame_hashes else None
+        if cached_hashes is not None:
+            return self._load_frames_with_mask(gif_path, self._keep_mask(cached_hashes))
+        
+        max_differing_bits = self._max_differing_bits()
+        frames: List[Image.Image] = []
+        durations: List[float] = []
+        hashes: List[np.uint64] = []
+        
+        for frame, duration in self._iter_gif_frames(gif_path):
+            frame_hash = self._frame_hashes([frame])[0]
+            
+            if hashes and np.bitwise_count(frame_hash ^ hashes[-1]) <= max_differing_bits:
+                # Frame is very similar, merge duration with previous
+                durations[-1] += duration
+            else:
+                frames.append(frame)
+                durations.append(duration)
+            hashes.append(frame_hash)
+        
+        if self.settings.cache_frame_hashes:
+            self._write_hash_cache(gif_path, np.array(hashes, dtype=np.uint64))
+        
+        return frames, durations, len(hashes)
+    
+    def _load_frames_with_mask(
+        self,
+        gif_path: str,
+        keep: np.ndarray
+    ) -> Tuple[List[Image.Image], List[float], int]:
+        """Decode a GIF converting only the frames flagged in keep; dropped frames merge durations."""
+        frames: List[Image.Image] = []
+        durations: List[float] = []
+        frame_count = 0
+        
         with Image.open(gif_path) as img:
-            for frame in ImageSequence.Iterator(img):
-                # Convert to RGB for consistency
-                frame_rgb = frame.convert('RGB')
-                frames.append(frame_rgb.copy())
-                
-                # Get frame duration (in seconds)
+            for index, frame in enumerate(ImageSequence.Iterator(img)):
+                frame_count += 1
                 duration = frame.info.get('duration', 100) / 1000.0  # Convert ms to seconds
-                durations.append(duration)
+                
+                if not frames or index >= len(keep) or keep[index]:
+                    frames.append(frame.convert('RGB'))
+                    durations.append(duration)
+                else:
+                    durations[-1] += duration
         
-        return frames, durations
+        return frames, durations, frame_count
+    
+    def _sample_grid(self, frame: Image.Image, step: int) -> Image.Image:
+        """
+        Every step-th pixel of every step-th row of an RGB frame, picked in C.
+        
+        The stratified grid covers the whole frame with 1/step² of its pixels.
+        NEAREST resampling copies only the sampled pixels, where np.asarray on
+        the full frame would copy all of them before slicing.
+        """
+        # Decoded frames are already RGB; convert() would copy them regardless
+        rgb = frame if frame.mode == 'RGB' else frame.convert('RGB')
+        if step == 1:
+            return rgb
+        return rgb.resize(
+            (max(1, rgb.width // step), max(1, rgb.height // step)),
+            Image.Resampling.NEAREST
+        )
+    
+    def _hash_cache_path(self, gif_path: str) -> Path:
+        """Sidecar file holding a GIF's frame hashes, e.g. clip.gif.hashes.npz."""
+        path = Path(gif_path)
+        return path.with_name(path.name + '.hashes.npz')
+    
+    def _read_hash_cache(self, gif_path: str) -> Optional[np.ndarray]:
+        """Return cached frame hashes if the sidecar matches the file's size and mtime."""
+        cache_path = self._hash_cache_path(gif_path)
+        if not cache_path.exists():
+            return None
+        
+        try:
+            stat = os.stat(gif_path)
+            with np.load(cache_path) as cached:
+                if (int(cached['st_size']) != stat.st_size or
+                        int(cached['st_mtime_ns']) != stat.st_mtime_ns):
+                    return None
+                return cached['hashes'].astype(np.uint64)
+        except Exception as e:
+            logger.debug(f"Ignoring unreadable hash cache {cache_path.name}: {e}")
+            return None
+    
+    def _write_hash_cache(self, gif_path: str, hashes: np.ndarray) -> None:
+        """Store frame hashes next to the GIF; read-only directories are skipped silently."""
+        cache_path = self._hash_cache_path(gif_path)
+        try:
+            stat = os.stat(gif_path)
+            np.savez_compressed(
+                cache_path,
+                st_size=stat.st_size,
+                st_mtime_ns=stat.st_mtime_ns,
+                hashes=hashes
+            )
+        except OSError as e:
+            logger.debug(f"Could not write hash cache {cache_path.name}: {e}")
+    
+    def _quick_gif_info(self, gif_path: str) -> Tuple[int, List[float], Tuple[int, int]]:
+        """
+        Read frame count, durations and size from GIF headers without decoding pixels.
+        
+        Pillow's seek() decodes every preceding frame, so the blocks are
+        scanned directly instead.
+        
+        Returns (frame_count, durations_in_seconds, (width, height)).
+        """
+        delays, size = _scan_gif_blocks(Path(gif_path).read_bytes())
+        return len(delays), [delay / 1000.0 for delay in delays], size
+    
+    def _frame_cache_key(self, gif_path: str) -> Tuple[str, int, int]:
+        """Cache key that changes whenever the file on disk changes."""
+        stat = os.stat(gif_path)
+        return (str(Path(gif_path).resolve()), stat.st_mtime_ns, stat.st_size)
+    
+    def load_gif_frames_cached(self, gif_path: str) -> FrameData:
+        """Load frames through a small LRU cache keyed by path, mtime and size."""
+        key = self._frame_cache_key(gif_path)
+        
+        if key in self._frame_cache:
+            self._frame_cache.move_to_end(key)
+            return self._frame_cache[key]
+        
+        data = self._load_gif_frames(gif_path)
+        self._frame_cache[key] = data
+        while len(self._frame_cache) > self.FRAME_CACHE_SIZE:
+            self._frame_cache.popitem(last=False)
+        
+        return data
+    
+    def pop_cached_frames(self, gif_path: str) -> Optional[FrameData]:
+        """Remove and return cached frames for a file, if still current."""
+        try:
+            key = self._frame_cache_key(gif_path)
+        except OSError:
+            return None
+        return self._frame_cache.pop(key, None)
     
     def _remove_duplicates(
         self, 
@@ -271,121 +469,234 @@ class GifOptimizer:
         if len(frames) <= 1:
             return frames, durations
         
-        optimized_frames = [frames[0]]
-        optimized_durations = [durations[0]]
+        keep = self._keep_mask(self._frame_hashes(frames))
+        kept_indices = np.flatnonzero(keep)
         
-        for i in range(1, len(frames)):
-            # Compare with previous frame
-            similarity = self._calculate_frame_similarity(frames[i-1], frames[i])
-            
-            if similarity < self.settings.duplicate_threshold:
-                # Frame is different enough, keep it
-                optimized_frames.append(frames[i])
-                optimized_durations.append(durations[i])
-            else:
-                # Frame is very similar, merge duration with previous
-                optimized_durations[-1] += durations[i]
+        optimized_frames = [frames[index] for index in kept_indices]
+        # Each dropped frame's duration merges into the kept frame before it
+        optimized_durations = np.add.reduceat(
+            np.asarray(durations, dtype=np.float64), kept_indices
+        ).tolist()
         
         return optimized_frames, optimized_durations
     
-    def _calculate_frame_similarity(self, frame1: Image.Image, frame2: Image.Image) -> float:
-        """Calculate similarity between two frames (0.0 = identical, 1.0 = completely different)."""
-        # Simple pixel-based comparison
-        # For performance, resize to small size for comparison
-        f1_small = frame1.resize((64, 64))
-        f2_small = frame2.resize((64, 64))
-        
-        import numpy as np
-        
-        arr1 = np.array(f1_small)
-        arr2 = np.array(f2_small)
-        
-        # Calculate normalized root mean square error
-        mse = np.mean((arr1 - arr2) ** 2)
-        max_possible_mse = 255 ** 2  # Max MSE for 8-bit images
+    def _keep_mask(self, hashes: np.ndarray) -> np.ndarray:
+        """Boolean mask of frames that differ enough from their predecessor to keep."""
+        # Compare every consecutive pair in one vectorized pass
+        differing_bits = np.bitwise_count(hashes[1:] ^ hashes[:-1])
+        return np.concatenate(([True], differing_bits > self._max_differing_bits()))
+    
+    def _max_differing_bits(self) -> int:
+        """Frames are duplicates when at least duplicate_threshold of their hash bits match."""
+        return int((1 - self.settings.duplicate_threshold) * HASH_BITS)
+    
+    def _thumbnail_stack(self, frames: List[Image.Image]) -> np.ndarray:
+        """Stack 9×8 grayscale thumbnails of all frames into an (N, 8, 9) uint8 array."""
+        return np.stack([
+            np.asarray(frame.convert('L').resize((9, 8), Image.Resampling.BILINEAR))
+            for frame in frames
+        ])
+    
+    def _frame_hashes(self, frames: List[Image.Image]) -> np.ndarray:
+        """
+        64-bit difference hashes (dHash) of all frames as a uint64 array.
         
-        return mse / max_possible_mse
+        Each bit records whether a thumbnail pixel is brighter than its right-hand
+        neighbour, so small color shifts barely change the hash.
+        """
+        thumbs = self._thumbnail_stack(frames)
+        bits = (thumbs[:, :, 1:] > thumbs[:, :, :-1]).reshape(len(frames), HASH_BITS)
+        return np.packbits(bits, axis=1).view('>u8').ravel().astype(np.uint64)
     
     def _optimize_frame_timing(self, durations: List[float]) -> List[float]:
         """Ensure minimum frame duration for smooth playback."""
         return [max(d, self.settings.min_frame_duration) for d in durations]
     
-    def _create_test_gif(
-        self, 
-        frames: List[Image.Image], 
-        durations: List[float], 
-        colors: int
-    ) -> str:
-        """Create a test GIF with specified settings to check file size."""
-        temp_fd, temp_path = tempfile.mkstemp(suffix='.gif')
-        os.close(temp_fd)
-        
-        # Convert durations to milliseconds for imageio
-        duration_ms = [d * 1000 for d in durations]
-        
-        # Quantize frames to specified color count
-        quantized_frames = []
-        for frame in frames:
-            quantized = frame.quantize(colors=colors, dither=Image.FLOYDSTEINBERG)
-            quantized_frames.append(quantized.convert('RGB'))
-        
-        # Save as GIF
-        imageio.mimsave(
-            temp_path,
-            quantized_frames,
-            duration=duration_ms,
-            loop=0  # Infinite loop
-        )
+    def _map_frames(
+        self,
+        func: Callable[[Image.Image], Image.Image],
+        frames: List[Image.Image]
+    ) -> List[Image.Image]:
+        """
+        Apply func to every frame, in order, across a shared thread pool.
         
-        return temp_path
+        Pillow releases the GIL inside resize/quantize, so threads scale with
+        cores without pickling frames to worker processes.
+        """
+        workers = os.cpu_count() or 1
+        if workers == 1 or len(frames) < 2:
+            return [func(frame) for frame in frames]
+        
+        if self._frame_pool is None:
+            self._frame_pool = ThreadPoolExecutor(
+                max_workers=workers,
+                thread_name_prefix="gif-frames"
+            )
+        return list(self._frame_pool.map(func, frames))
+    
+    def _color_ladder(self) -> List[int]:
+        """Palette sizes to try, largest first, within the configured bounds."""
+        ladder = [c for c in COLOR_LADDER if self.settings.min_colors <= c <= self.settings.max_colors]
+        return ladder or [self.settings.max_colors]
     
-    def _create_optimized_gif(
+    def _search_colors(
         self,
         frames: List[Image.Image],
-        durations: List[float],
-        colors: int
-    ) -> str:
-        """Create the final optimized GIF."""
-        temp_fd, temp_path = tempfile.mkstemp(suffix='.gif')
-        os.close(temp_fd)
+        durations: List[float]
+    ) -> Tuple[int, bytes]:
+        """
+        Pick the largest palette whose encoded GIF fits the size limit.
         
-        # Apply optimizations
-        optimized_frames = []
+        Tries the full palette first, then bisects the color ladder. Returns
+        (colors, encoded_gif); when nothing fits this is the smallest palette.
+        """
+        ladder = self._color_ladder()
+        encoded = {}
+        
+        def size_at(index: int) -> int:
+            colors = ladder[index]
+            encoded[colors] = self._encode_gif(self._quantize_frames(frames, colors), durations)
+            logger.debug(f"Testing with {colors} colors: {len(encoded[colors]) / 1024 / 1024:.2f} MB")
+            return len(encoded[colors])
+        
+        if size_at(0) <= self.settings.max_file_size:
+            return ladder[0], encoded[ladder[0]]
+        
+        # ladder[low] is known too large; find the first index that fits
+        low, high = 0, len(ladder)
+        while high - low > 1:
+            mid = (low + high) // 2
+            if size_at(mid) <= self.settings.max_file_size:
+                high = mid
+            else:
+                low = mid
+        
+        colors = ladder[min(high, len(ladder) - 1)]
+        if colors not in encoded:
+            size_at(ladder.index(colors))
+        return colors, encoded[colors]
+    
+    def _quantize_frames(self, frames: List[Image.Image], colors: int) -> List[Image.Image]:
+        """
+        Remap every frame onto one shared palette of at most `colors` entries.
+        
+        A single global palette lets the GIF skip per-frame color tables and
+        keeps LZW codes stable between frames.
+        """
+        palette_image = self._build_global_palette(frames, colors)
+        return self._map_frames(
+            lambda frame: frame.quantize(palette=palette_image, dither=Image.FLOYDSTEINBERG),
+            frames
+        )
+    
+    def _build_global_palette(self, frames: List[Image.Image], colors: int) -> Image.Image:
+        """Quantize a strided pixel sample from all frames into a palette image."""
+        step = max(1, self.settings.palette_sampling_factor)
+        sample = np.concatenate([
+            np.asarray(self._sample_grid(frame, step)).reshape(-1, 3)
+            for frame in frames
+        ])
+        
+        if imagequant is not None:
+            rgba = np.concatenate([sample, np.full((len(sample), 1), 255, dtype=np.uint8)], axis=1)
+            _, raw_palette = imagequant.quantize_raw_rgba_bytes(
+                rgba.tobytes(), len(sample), 1, max_colors=colors
+            )
+            # libimagequant returns 256 RGBA entries, unused ones fully transparent
+            entries = np.asarray(raw_palette, dtype=np.uint8).reshape(-1, 4)
+            rgb_palette = entries[entries[:, 3] > 0, :3]
+        else:
+            sample_image = Image.fromarray(sample.reshape(1, -1, 3))
+            quantized = sample_image.quantize(colors=colors, method=Image.Quantize.MEDIANCUT)
+            palette_values = quantized.getpalette()
+            if palette_values is None:  # quantize() always attaches one
+                raise ValueError("Quantized palette sample has no palette")
+            rgb_palette = np.array(palette_values, dtype=np.uint8).reshape(-1, 3)[:colors]
+        
+        # Pillow pads short palettes with black, which frames could then map
+        # onto; pad with a repeat of the first entry instead
+        padding = np.repeat(rgb_palette[:1], 256 - len(rgb_palette), axis=0)
+        palette_image = Image.new('P', (1, 1))
+        palette_image.putpalette(np.concatenate([rgb_palette, padding]).tobytes())
+        return palette_image
+    
+    def _encode_gif(self, frames: List[Image.Image], durations: List[float]) -> bytes:
+        """
+        Encode palette frames as an animated GIF in memory.
         
-        for frame in frames:
-            # Quantize with dithering for best quality
-            quantized = frame.quantize(colors=colors, dither=Image.FLOYDSTEINBERG)
-            optimized_frames.append(quantized.convert('P'))  # Keep as palette mode
+        Pillow writes the stream; when external tools are enabled and Gifsicle
+        is installed its -O3 pass replaces Pillow's output if smaller.
+        """
+        data = self._encode_with_pillow(frames, durations)
         
+        if self.settings.use_external_tools:
+            optimized = self.external_tools.optimize_gif_bytes(data)
+            if optimized and len(optimized) < len(data):
+                return optimized
+        
+        return data
+    
+    def _encode_with_pillow(self, frames: List[Image.Image], durations: List[float]) -> bytes:
+        """Encode palette frames with Pillow's GIF writer."""
         # Convert durations to milliseconds
         duration_ms = [max(int(d * 1000), 100) for d in durations]  # Min 100ms
         
-        # Save optimized GIF
-        optimized_frames[0].save(
-            temp_path,
+        buffer = io.BytesIO()
+        frames[0].save(
+            buffer,
             format='GIF',
             save_all=True,
-            append_images=optimized_frames[1:],
+            append_images=frames[1:],
             duration=duration_ms,
             loop=0,  # Infinite loop
             optimize=True  # Enable PIL's built-in optimization
         )
+        return buffer.getvalue()
+    
+    def _optimize_with_gifsicle(self, data: bytes) -> Tuple[Optional[bytes], dict]:
+        """
+        Run the lossy Gifsicle search on an in-memory GIF.
         
-        return temp_path
+        Gifsicle's parallel ladder works on files, so the GIF is staged in a
+        temp directory that is removed afterwards. Returns (optimized_bytes or
+        None, tool result).
+        """
+        with tempfile.TemporaryDirectory(prefix="gifer-") as temp_dir:
+            source_path = Path(temp_dir) / "source.gif"
+            result_path = Path(temp_dir) / "gifsicle.gif"
+            source_path.write_bytes(data)
+            
+            result = self.external_tools.optimize_with_gifsicle(
+                str(source_path),
+                str(result_path),
+                target_size_mb=self.settings.max_file_size / 1024 / 1024
+            )
+            
+            if not result.get("success") or not result_path.exists():
+                return None, result
+            return result_path.read_bytes(), result
     
-    def _resize_gif_if_needed(self, gif_path: str, current_size: int) -> str:
-        """Resize GIF if it's still too large after other optimizations."""
+    def _resize_gif_if_needed(
+        self,
+        frames: List[Image.Image],
+        durations: List[float],
+        current_size: int,
+        colors: int
+    ) -> Optional[bytes]:
+        """
+        Downscale the frames and re-encode them if the GIF is still too large.
+        
+        Works from the in-memory frames rather than decoding the oversized
+        output again. Returns the resized encode, or None if no resize is needed.
+        """
         if current_size <= self.settings.max_file_size:
-            return gif_path
+            return None
         
         # Calculate resize ratio to reach target size
         # Rough estimate: file size scales with pixel count
         target_ratio = self.settings.max_file_size / current_size
         scale_factor = target_ratio ** 0.5  # Square root because area = width * height
         
-        # Load and resize
-        frames, durations = self._load_gif_frames(gif_path)
-        
         # Get new dimensions
         original_width, original_height = frames[0].size
         new_width = min(int(original_width * scale_factor), self.settings.max_width)
@@ -399,24 +710,13 @@ class GifOptimizer:
             new_height = int(new_width / aspect_ratio)
         
         # Resize all frames
-        resized_frames = []
-        for frame in frames:
-            resized = frame.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            resized_frames.append(resized)
-        
-        # Create resized GIF
-        temp_fd, temp_path = tempfile.mkstemp(suffix='.gif')
-        os.close(temp_fd)
-        
-        duration_ms = [max(int(d * 1000), 100) for d in durations]
-        
-        imageio.mimsave(
-            temp_path,
-            resized_frames,
-            duration=duration_ms,
-            loop=0
+        resized_frames = self._map_frames(
+            lambda frame: frame.resize((new_width, new_height), Image.Resampling.LANCZOS),
+            frames
         )
         
+        resized_gif = self._encode_gif(self._quantize_frames(resized_frames, colors), durations)
+        
         logger.info(f"Resized GIF from {original_width}×{original_height} to {new_width}×{new_height}")
         
-        return temp_path
+        return resized_gif
@@ -18,6 +18,10 @@ class Settings(BaseSettings):
     RESULT_GIFS_DIR: str = "results/gifs"
     RESULT_VIDEOS_DIR: str = "results/videos"
 
+    # External compression tools (gifsicle/gifski)
+    GIFER_SKIP_TOOL_DETECT: bool = False
+    TOOL_DETECT_TTL_S: int = 300
+
     # Google Drive (optional)
     GOOGLE_DRIVE_ENABLED: bool = False
     GOOGLE_DRIVE_CREDENTIALS_JSON: str = "/app/creds/drive-creds.json"
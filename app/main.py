@@ -1,3 +1,4 @@
+import PIL
 from fastapi import FastAPI, Depends
 from app.logger import setup_logging, get_logger
 from app.routers import screenshots, convert
@@ -5,6 +6,10 @@ from app.security import get_api_key
 
 setup_logging()
 logger = get_logger(__name__)
+# Pillow-SIMD releases carry a ".postN" suffix on the upstream version
+logger.info(
+    f"Pillow {PIL.__version__} ({'SIMD' if '.post' in PIL.__version__ else 'stock'} build)"
+)
 
 app = FastAPI(
     title="Screenshot to GIF/Video Service",
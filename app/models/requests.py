@@ -10,9 +10,10 @@ class Viewport(BaseModel):
 
 
 class RenderWait(BaseModel):
-    wait_until: List[str] = ["domcontentloaded", "networkidle"]
+    wait_until: List[str] = ["domcontentloaded"]
     ensure_images_loaded: bool = True
     ensure_fonts_loaded: bool = True
+    ensure_map_ready: bool = False
     extra_wait_ms: int = 300
     timeout_ms: int = 30000
 
@@ -1,4 +1,6 @@
+import asyncio
 from pathlib import Path
+from typing import Any, Callable
 from fastapi import APIRouter, HTTPException
 from app.models.requests import GifJobRequest, VideoJobRequest
 from app.models.responses import ConvertGifResponse, ConvertVideoResponse
@@ -6,6 +8,7 @@ from app.services.gif_service import GifAgent
 from app.services.video_service import VideoAgent
 from app.services.ordering import order_images
 from app.utils.files import list_images
+from app.config import settings
 from app.logger import get_logger
 from app.services.drive_service import GoogleDriveUploader
 
@@ -14,6 +17,17 @@ logger = get_logger(__name__)
 
 IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".bmp")
 
+# Encoding jobs are CPU/subprocess heavy; cap how many run at once
+_render_slots = asyncio.Semaphore(settings.CONCURRENCY_MAX)
+
+
+async def _run_render(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Runs a blocking render job in a worker thread so the event loop keeps serving.
+    """
+    async with _render_slots:
+        return await asyncio.to_thread(func, *args)
+
 
 @router.post("/convert/gif", response_model=ConvertGifResponse)
 async def create_gif_job(request: GifJobRequest):
@@ -32,7 +46,8 @@ async def create_gif_job(request: GifJobRequest):
     )
 
     agent = GifAgent()
-    gif_path = agent.build_gif(
+    gif_path = await _run_render(
+        agent.build_gif,
         ordered,
         Path(request.output_path),
         request.seconds_per_image,
@@ -43,7 +58,8 @@ async def create_gif_job(request: GifJobRequest):
     drive_file_id = None
     if request.drive_upload.enabled:
         uploader = GoogleDriveUploader()
-        drive_file_id = uploader.upload(
+        drive_file_id = await asyncio.to_thread(
+            uploader.upload,
             gif_path,
             request.drive_upload.folder_id,
             request.drive_upload.make_anyone_with_link_reader,
@@ -74,7 +90,8 @@ async def create_video_job(request: VideoJobRequest):
     )
 
     agent = VideoAgent()
-    video_path = agent.build_video(
+    video_path = await _run_render(
+        agent.build_video,
         ordered,
         Path(request.output_path),
         request.seconds_per_image,
@@ -88,7 +105,8 @@ async def create_video_job(request: VideoJobRequest):
     drive_file_id = None
     if request.drive_upload.enabled:
         uploader = GoogleDriveUploader()
-        drive_file_id = uploader.upload(
+        drive_file_id = await asyncio.to_thread(
+            uploader.upload,
             video_path,
             request.drive_upload.folder_id,
             request.drive_upload.make_anyone_with_link_reader,
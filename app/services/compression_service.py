@@ -5,11 +5,18 @@ Provides compression capabilities integrated with the main Gifer services.
 This service acts as a bridge between the core app services and the compression module.
 """
 
-from typing import Optional, Dict, Any
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional, Dict, Any
 from pathlib import Path
 
 from app.logger import get_logger
-from app.compressor import CompressionService as CoreCompressionService, CompressionSettings
+from app.utils.files import link_or_copy
+
+# app.compressor pulls in numpy/Pillow/imagequant; it is imported on first use
+# so that importing this module stays cheap for callers that never compress.
+if TYPE_CHECKING:
+    from app.compressor import CompressionSettings
+    from app.compressor.gif_optimizer import FrameData
 
 logger = get_logger(__name__)
 
@@ -22,6 +29,8 @@ class CompressionService:
     """
     
     def __init__(self):
+        from app.compressor import CompressionService as CoreCompressionService
+        
         self._core_service = CoreCompressionService()
     
     def compress_gif_file(
@@ -31,30 +40,34 @@ class CompressionService:
         target_filename: Optional[str] = None,
         max_size_mb: float = 14.99,
         custom_settings: Optional[Dict[str, Any]] = None,
-        force_compression: bool = False
+        force_compression: bool = False,
+        preloaded_frames: Optional["FrameData"] = None
     ) -> Dict[str, Any]:
         """
         Compress a GIF file with optional custom settings.
         
         This is the main entry point for GIF compression within the application.
+        preloaded_frames, if given, are the input's decoded (frames, durations)
+        and are used instead of decoding the file again.
         """
         try:
             # Adaptive compression: Check if compression is actually needed
-            input_file_size = Path(input_path).stat().st_size
+            source = Path(input_path)
+            input_file_size = source.stat().st_size
+            input_size_mb = input_file_size / 1024 / 1024
             target_size_bytes = max_size_mb * 1024 * 1024
             
             if not force_compression and input_file_size <= target_size_bytes:
-                logger.info(f"🎯 Input GIF ({input_file_size / 1024 / 1024:.2f} MB) is already under target size ({max_size_mb:.2f} MB)")
+                logger.info(f"🎯 Input GIF ({input_size_mb:.2f} MB) is already under target size ({max_size_mb:.2f} MB)")
                 logger.info("Skipping compression to preserve maximum quality")
                 
                 # Just copy/rename the file if needed
-                final_output_path = output_path or str(Path(input_path).with_name(f"{Path(input_path).stem}_optimized.gif"))
+                final_output_path = output_path or str(source.with_name(f"{source.stem}_optimized.gif"))
                 if target_filename:
                     final_output_path = str(Path(final_output_path).parent / f"{target_filename}.gif")
                 
-                if str(input_path) != str(final_output_path):
-                    import shutil
-                    shutil.copy2(input_path, final_output_path)
+                # Hardlink where possible so no bytes are copied
+                link_or_copy(source, Path(final_output_path))
                 
                 return {
                     'success': True,
@@ -64,21 +77,23 @@ class CompressionService:
                     'output_file': final_output_path,
                     'original_size': input_file_size,
                     'final_size': input_file_size,
-                    'original_size_mb': input_file_size / 1024 / 1024,
-                    'final_size_mb': input_file_size / 1024 / 1024,
+                    'original_size_mb': input_size_mb,
+                    'final_size_mb': input_size_mb,
                     'compression_ratio': 0.0,
                     'techniques_used': ['no_compression_needed']
                 }
             
             # Proceed with compression
-            logger.info(f"📊 Input GIF ({input_file_size / 1024 / 1024:.2f} MB) exceeds target ({max_size_mb:.2f} MB)")
+            logger.info(f"📊 Input GIF ({input_size_mb:.2f} MB) exceeds target ({max_size_mb:.2f} MB)")
             logger.info("Applying intelligent compression techniques...")
             
             # Create custom compression settings if provided
             settings = None
             if custom_settings:
+                from app.compressor import CompressionSettings
+                
                 settings = CompressionSettings(
-                    max_file_size=int(custom_settings.get('max_file_size', max_size_mb * 1024 * 1024)),
+                    max_file_size=int(custom_settings.get('max_file_size', target_size_bytes)),
                     max_colors=custom_settings.get('max_colors', 256),
                     min_colors=custom_settings.get('min_colors', 32),
                     min_frame_duration=custom_settings.get('min_frame_duration', 0.1),
@@ -95,7 +110,8 @@ class CompressionService:
                 output_path=output_path,
                 target_filename=target_filename,
                 max_size_mb=max_size_mb,
-                settings=settings
+                settings=settings,
+                preloaded=preloaded_frames
             )
             
             # Log results
@@ -127,10 +143,12 @@ class CompressionService:
                 'filename': Path(input_path).name if input_path else 'unknown'
             }
     
-    def get_optimal_settings_for_target_size(self, target_size_mb: float) -> CompressionSettings:
+    def get_optimal_settings_for_target_size(self, target_size_mb: float) -> "CompressionSettings":
         """
         Get optimal compression settings for a target file size.
         """
+        from app.compressor import CompressionSettings
+        
         if target_size_mb <= 5:
             # Aggressive compression for very small targets
             return CompressionSettings(
@@ -163,3 +181,11 @@ class CompressionService:
                 enable_lossy=False,
                 allow_resize=True
             )
+
+
+@lru_cache(maxsize=1)
+def get_compression_service() -> CompressionService:
+    """
+    Returns the process-wide CompressionService, building it on first call.
+    """
+    return CompressionService()
@@ -1,7 +1,12 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Any, List, Optional, Sequence
 
+import httplib2
 from google.oauth2 import service_account
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
 from app.config import settings
@@ -11,23 +16,98 @@ logger = get_logger(__name__)
 
 SCOPES = ["https://www.googleapis.com/auth/drive.file"]
 
+# Files below this go up in a single request; larger ones use resumable chunks
+SIMPLE_UPLOAD_MAX_BYTES = 5 * 1024 * 1024
+UPLOAD_CHUNK_BYTES = 8 * 1024 * 1024
+
+# Socket timeout for the pinned keep-alive connection, and how many times the
+# client retries a request on 5xx/429 or connection errors
+HTTP_TIMEOUT_SECONDS = 30
+EXECUTE_RETRIES = 3
+
+# Parallel uploads for upload_many; per-file API latency dominates for GIF
+# sized files, but Drive rate-limits bursts, so keep this small
+UPLOAD_CONCURRENCY = 4
+
+# Uploads run on worker threads and httplib2 connections aren't thread-safe,
+# so each thread keeps its own Drive client
+_thread_state = threading.local()
+
+
+@lru_cache(maxsize=4)
+def _load_credentials(credentials_path: str) -> service_account.Credentials:
+    """
+    Parses the service-account key file once per process.
+    """
+    return service_account.Credentials.from_service_account_file(
+        credentials_path, scopes=SCOPES
+    )
+
+
+def _build_drive_service(credentials_path: str) -> Any:
+    """
+    Returns this thread's Drive client, building it on first use.
+
+    static_discovery reads the bundled discovery document instead of
+    fetching it over HTTP. The client holds one authorized keep-alive
+    connection, so repeated uploads skip the TLS handshake.
+    """
+    services = getattr(_thread_state, "services", None)
+    if services is None:
+        services = _thread_state.services = {}
+
+    if credentials_path not in services:
+        http = AuthorizedHttp(
+            _load_credentials(credentials_path),
+            http=httplib2.Http(timeout=HTTP_TIMEOUT_SECONDS),
+        )
+        services[credentials_path] = build(
+            "drive",
+            "v3",
+            http=http,
+            cache_discovery=False,
+            static_discovery=True,
+        )
+    return services[credentials_path]
+
+
+def _media_for(local_path: Path) -> MediaFileUpload:
+    """
+    Picks a single-request upload for small files and chunked resumable otherwise.
+    """
+    path = str(local_path)
+    if local_path.stat().st_size < SIMPLE_UPLOAD_MAX_BYTES:
+        return MediaFileUpload(path, resumable=False)
+    return MediaFileUpload(path, resumable=True, chunksize=UPLOAD_CHUNK_BYTES)
+
 
 class GoogleDriveUploader:
     def __init__(self, credentials_path: str = settings.GOOGLE_DRIVE_CREDENTIALS_JSON):
+        self.credentials_path = credentials_path
+        self._available = False
         try:
-            creds = service_account.Credentials.from_service_account_file(
-                credentials_path, scopes=SCOPES
-            )
-            self.service = build("drive", "v3", credentials=creds)
+            _load_credentials(credentials_path)
+            self._available = True
         except FileNotFoundError:
             logger.error(
                 "Google Drive credentials file not found.",
                 path=credentials_path,
             )
-            self.service = None
         except Exception as e:
             logger.error("Failed to initialize Google Drive service.", error=e)
-            self.service = None
+
+    @property
+    def service(self) -> Optional[Any]:
+        """
+        The Drive client for the calling thread, or None if unavailable.
+        """
+        if not self._available:
+            return None
+        try:
+            return _build_drive_service(self.credentials_path)
+        except Exception as e:
+            logger.error("Failed to initialize Google Drive service.", error=e)
+            return None
 
     def upload(
         self,
@@ -35,7 +115,8 @@ class GoogleDriveUploader:
         folder_id: Optional[str] = None,
         share_anyone_reader: bool = False,
     ) -> Optional[str]:
-        if not self.service:
+        service = self.service
+        if not service:
             logger.warning("Google Drive service not available. Skipping upload.")
             return None
 
@@ -43,20 +124,20 @@ class GoogleDriveUploader:
         if folder_id:
             file_metadata["parents"] = [folder_id]
 
-        media = MediaFileUpload(local_path, resumable=True)
+        media = _media_for(local_path)
 
         try:
             file = (
-                self.service.files()
+                service.files()
                 .create(body=file_metadata, media_body=media, fields="id")
-                .execute()
+                .execute(num_retries=EXECUTE_RETRIES)
             )
             file_id = file.get("id")
 
             if share_anyone_reader:
-                self.service.permissions().create(
+                service.permissions().create(
                     fileId=file_id, body={"role": "reader", "type": "anyone"}
-                ).execute()
+                ).execute(num_retries=EXECUTE_RETRIES)
 
             logger.info("File uploaded to Google Drive", file_id=file_id)
             return file_id
@@ -64,4 +145,28 @@ class GoogleDriveUploader:
             logger.error("Failed to upload file to Google Drive", error=e)
             return None
 
+    def upload_many(
+        self,
+        local_paths: Sequence[Path],
+        folder_id: Optional[str] = None,
+        share_anyone_reader: bool = False,
+        max_workers: int = UPLOAD_CONCURRENCY,
+    ) -> List[Optional[str]]:
+        """
+        Uploads several files concurrently; returns file ids in input order.
+
+        Each worker thread uses its own Drive client, and 429/5xx responses are
+        retried with the client's exponential backoff.
+        """
+        if not local_paths:
+            return []
+        if not self._available:
+            logger.warning("Google Drive service not available. Skipping upload.")
+            return [None] * len(local_paths)
 
+        workers = max(1, min(max_workers, len(local_paths)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="drive-upload") as pool:
+            return list(pool.map(
+                lambda path: self.upload(Path(path), folder_id, share_anyone_reader),
+                local_paths,
+            ))
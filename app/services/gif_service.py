@@ -1,36 +1,201 @@
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import List
-import imageio.v2 as imageio
+from typing import Callable, Deque, Iterator, Optional, Sequence, Union
+import numpy as np
 from PIL import Image
+from app.logger import get_logger
 from app.utils.files import exif_autorotate
 
+logger = get_logger(__name__)
+
+# Shared palette: built once from a strided pixel sample of up to
+# PALETTE_SAMPLE_FRAMES evenly spaced frames, then every frame is mapped onto it
+PALETTE_SAMPLE_FRAMES = 8
+PALETTE_SAMPLE_STEP = 4
+# One index is left free: Pillow's writer crops each frame to the box that
+# changed and, given a spare index, marks unchanged pixels inside it as
+# transparent so they cost next to nothing to encode
+PALETTE_COLORS = 255
+
+# Per-frame hook run on the decode threads, e.g. to watermark each frame
+FramePrep = Callable[[Path, Image.Image], Image.Image]
+
+
+def _decode_frame(
+    source: Union[Path, Image.Image],
+    prepare: Optional[FramePrep] = None,
+    palette: Optional[Image.Image] = None,
+) -> Image.Image:
+    """
+    Decodes one source image to an EXIF-rotated RGB frame and closes the file.
+
+    In-memory images are used as they are, only converted to RGB. With a
+    palette, the frame is returned mapped onto it in P mode.
+    """
+    if isinstance(source, Image.Image):
+        frame = source if source.mode == "RGB" else source.convert("RGB")
+    else:
+        with Image.open(source) as img:
+            # Screenshots may be RGBA/P; GIF encoding quantizes from RGB
+            frame = exif_autorotate(img).convert("RGB")
+        if prepare:
+            frame = prepare(source, frame)
+
+    if palette is not None:
+        # Undithered, like Pillow's own adaptive conversion on save
+        frame = frame.quantize(palette=palette, dither=Image.Dither.NONE)
+    return frame
+
+
+def _build_shared_palette(
+    images: Sequence[Union[Path, Image.Image]],
+    prepare: Optional[FramePrep] = None,
+    colors: int = PALETTE_COLORS,
+) -> Image.Image:
+    """
+    Median-cut palette image for a whole frame sequence.
+
+    Consecutive screenshots share their base map, so a sample of a few frames
+    covers the colors of all of them; mapping a frame onto a fixed palette is
+    far cheaper than Pillow quantizing each frame from scratch.
+    """
+    count = len(images)
+    picks = min(PALETTE_SAMPLE_FRAMES, count)
+    indices = sorted({round(i * (count - 1) / max(1, picks - 1)) for i in range(picks)})
+    step = PALETTE_SAMPLE_STEP
+    sample = np.concatenate(
+        [
+            np.asarray(_decode_frame(images[index], prepare))[::step, ::step].reshape(
+                -1, 3
+            )
+            for index in indices
+        ]
+    )
+
+    quantized = Image.fromarray(sample.reshape(1, -1, 3)).quantize(
+        colors=colors, method=Image.Quantize.MEDIANCUT
+    )
+    palette_values = quantized.getpalette()
+    if palette_values is None:  # quantize() always attaches one
+        raise ValueError("Quantized palette sample has no palette")
+    rgb_palette = np.array(palette_values, dtype=np.uint8).reshape(-1, 3)[:colors]
+
+    # Pillow pads short palettes with black, which frames could then map
+    # onto; pad with a repeat of the first entry instead
+    padding = np.repeat(rgb_palette[:1], 256 - len(rgb_palette), axis=0)
+    palette_image = Image.new("P", (1, 1))
+    palette_image.putpalette(np.concatenate([rgb_palette, padding]).tobytes())
+    return palette_image
+
 
 class GifAgent:
+    # Decoded frames queued ahead of the writer
+    PREFETCH_FRAMES = 4
+
     def build_gif(
         self,
-        images: List[Path],
+        images: Sequence[Union[Path, Image.Image]],
         output_path: Path,
         seconds_per_image: float = 0.5,
         loop: int = 0,
         optimize: bool = True,
+        prepare_frame: Optional[FramePrep] = None,
+        lossy: Optional[int] = None,
+        shared_palette: bool = True,
     ) -> Path:
         """
-        Builds a GIF from a list of images.
+        Builds a GIF from a list of image paths or in-memory images.
+
+        prepare_frame(path, frame) runs on each decoded file frame before it
+        is encoded, so per-frame edits need no temporary files. With optimize,
+        Pillow's output is passed through gifsicle when it is installed;
+        lossy sets gifsicle's --lossy level (None keeps it lossless).
+
+        With shared_palette, one palette sampled from the sequence is applied
+        to every frame on the decode threads; otherwise Pillow quantizes each
+        RGB frame on its own while writing.
         """
         output_path.parent.mkdir(parents=True, exist_ok=True)
 
-        writer = imageio.get_writer(
+        palette = (
+            _build_shared_palette(images, prepare_frame) if shared_palette else None
+        )
+
+        # Decode lazily: Pillow's writer pulls one frame at a time and keeps
+        # only its palette-mode copy, so the RGB bitmaps never pile up
+        frames = self._iter_frames(images, prepare_frame, palette)
+        first_frame = next(frames)
+
+        first_frame.save(
             output_path,
-            mode="I",
-            duration=seconds_per_image * 1000,  # imageio expects duration in ms
+            format="GIF",
+            save_all=True,
+            append_images=frames,
+            duration=int(seconds_per_image * 1000),  # Pillow expects duration in ms
             loop=loop,
-            # optimize=optimize, # Note: optimize is handled differently in imageio v3+
+            optimize=optimize,
         )
 
-        for image_path in images:
-            img = Image.open(image_path)
-            rotated_img = exif_autorotate(img)
-            writer.append_data(rotated_img)
-
-        writer.close()
+        if optimize:
+            self._optimize_with_gifsicle(output_path, lossy)
         return output_path
+
+    def _optimize_with_gifsicle(self, output_path: Path, lossy: Optional[int]) -> bool:
+        """
+        Rewrites the GIF in place with gifsicle through ExternalToolManager;
+        keeps Pillow's file when gifsicle is missing, fails or doesn't shrink it.
+
+        Screenshot sequences are mostly static between frames, which Pillow
+        re-encodes in full and gifsicle's inter-frame optimization drops.
+        """
+        # app.compressor pulls in imagequant; only load it when a GIF is written
+        from app.compressor.external_tools import ExternalToolManager
+
+        original = output_path.read_bytes()
+        optimized = ExternalToolManager().optimize_gif_bytes(original, lossy=lossy)
+        if optimized is None or len(optimized) >= len(original):
+            return False
+
+        # Write beside the output and swap, so a crash never leaves half a GIF
+        optimized_path = output_path.with_name(output_path.name + ".tmp")
+        try:
+            optimized_path.write_bytes(optimized)
+            os.replace(optimized_path, output_path)
+        except OSError as e:
+            logger.warning(f"gifsicle optimization failed, keeping Pillow output: {e}")
+            optimized_path.unlink(missing_ok=True)
+            return False
+        return True
+
+    def _iter_frames(
+        self,
+        images: Sequence[Union[Path, Image.Image]],
+        prepare: Optional[FramePrep] = None,
+        palette: Optional[Image.Image] = None,
+    ) -> Iterator[Image.Image]:
+        """
+        Yields EXIF-rotated RGB frames in order, decoding ahead on worker threads;
+        with a palette, the frames come out already mapped onto it.
+
+        Pillow releases the GIL while decoding, so the next few images are read
+        while the writer encodes the current one. At most PREFETCH_FRAMES
+        decoded frames wait in the queue.
+        """
+        workers = min(self.PREFETCH_FRAMES, os.cpu_count() or 1)
+        if workers == 1:
+            for image in images:
+                yield _decode_frame(image, prepare, palette)
+            return
+
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="gif-decode"
+        ) as pool:
+            pending: Deque[Future[Image.Image]] = deque()
+            for image_path in images:
+                pending.append(pool.submit(_decode_frame, image_path, prepare, palette))
+                if len(pending) >= self.PREFETCH_FRAMES:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
@@ -3,12 +3,15 @@ from datetime import date
 from pathlib import Path
 from typing import List, Literal, Optional, Tuple
 
+_DATE_RE = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+_NUM_SPLIT_RE = re.compile(r"([0-9]+)")
+
 
 def detect_date_from_name(name: str) -> Optional[date]:
     """
     Detects a date from a string like 'YYYY-MM-DD.png'.
     """
-    match = re.search(r"(\d{4})-(\d{2})-(\d{2})", name)
+    match = _DATE_RE.search(name)
     if match:
         try:
             return date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
@@ -21,7 +24,10 @@ def natural_key(s: str) -> Tuple:
     """
     A key for natural sorting (e.g., "file2.txt" before "file10.txt").
     """
-    return tuple(int(c) if c.isdigit() else c.lower() for c in re.split("([0-9]+)", s))
+    # split() alternates text and digit runs, so the digit runs are the odd slots
+    parts = _NUM_SPLIT_RE.split(s.lower())
+    parts[1::2] = map(int, parts[1::2])
+    return tuple(parts)
 
 
 def order_images(
@@ -37,10 +43,17 @@ def order_images(
 
     if strategy == "auto":
         # If all images have a date in their name, use date ordering. Otherwise, use natural.
-        if all(detect_date_from_name(p.name) for p in images):
-            strategy_to_use = "date"
+        dates = []
+        for p in images:
+            parsed = detect_date_from_name(p.name)
+            if parsed is None:
+                # One undated name decides it; don't parse the rest
+                break
+            dates.append(parsed)
         else:
-            strategy_to_use = "natural"
+            # Reuse the parsed dates rather than matching every name again
+            return [p for _, p in sorted(zip(dates, images), key=lambda pair: pair[0])]
+        strategy_to_use = "natural"
     else:
         strategy_to_use = strategy
 
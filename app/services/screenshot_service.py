@@ -1,17 +1,14 @@
 import asyncio
+import io
+import math
+import time
+from collections import deque
 from datetime import date
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 
 import tenacity
 from aiolimiter import AsyncLimiter
-from playwright.async_api import (
-    async_playwright,
-    Browser,
-    BrowserContext,
-    Page,
-    Playwright,
-)
 from PIL import Image
 from app.logger import get_logger
 from app.utils.dates import inclusive_date_range
@@ -21,8 +18,86 @@ from app.utils.url import ensure_date_param
 from app.utils.render_wait import comprehensive_render_wait
 from app.utils.gpsjam_handler import is_gpsjam_domain, handle_gpsjam_page
 
+# Playwright is imported when a browser is launched, not at module load
+if TYPE_CHECKING:
+    from playwright.async_api import BrowserContext
+
 logger = get_logger(__name__)
 
+# Pages that poll in the background never go network-idle, so the opt-in idle
+# wait is capped and treated as best-effort
+NETWORK_IDLE_TIMEOUT_MS = 5000
+
+# Adaptive tab concurrency: page loads are timed over a rolling window, the
+# first full window sets the baseline P95, and the limit is halved when P95
+# degrades by LOAD_P95_DEGRADE_RATIO or grows by one every
+# LOAD_INCREASE_EVERY fast loads, up to the agent's concurrency
+LOAD_WINDOW = 8
+LOAD_INCREASE_EVERY = 4
+LOAD_P95_DEGRADE_RATIO = 1.5
+
+
+class AdaptiveLimit:
+    """
+    An async concurrency limit that adjusts itself from page-load latency (AIMD).
+
+    More tabs raise throughput until Chromium's renderers start contending,
+    after which loads only get slower; the limit backs off at that point
+    instead of holding a fixed tab count.
+    """
+
+    def __init__(self, maximum: int, initial: Optional[int] = None):
+        self.maximum = max(1, maximum)
+        self.limit = min(self.maximum, initial or self.maximum)
+        self.baseline_p95: Optional[float] = None
+        self._in_flight = 0
+        self._fast_loads = 0
+        self._samples: deque = deque(maxlen=LOAD_WINDOW)
+        self._changed = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        async with self._changed:
+            self._in_flight -= 1
+            self._changed.notify_all()
+
+    def _p95(self) -> float:
+        ordered = sorted(self._samples)
+        return ordered[math.ceil(0.95 * len(ordered)) - 1]
+
+    async def record(self, seconds: float) -> None:
+        """
+        Feeds one page-load duration into the controller.
+        """
+        self._samples.append(seconds)
+        if len(self._samples) < LOAD_WINDOW:
+            return
+
+        p95 = self._p95()
+        if self.baseline_p95 is None:
+            self.baseline_p95 = p95
+        elif p95 > self.baseline_p95 * LOAD_P95_DEGRADE_RATIO:
+            self.limit = max(1, self.limit // 2)
+            self._fast_loads = 0
+            # Judge the new limit on loads made under it
+            self._samples.clear()
+            logger.info(f"Page loads slowed (P95 {p95:.2f}s), concurrency now {self.limit}")
+            return
+
+        self._fast_loads += 1
+        if self._fast_loads >= LOAD_INCREASE_EVERY and self.limit < self.maximum:
+            self.limit += 1
+            self._fast_loads = 0
+            logger.debug(f"Page loads steady, concurrency now {self.limit}")
+            async with self._changed:
+                self._changed.notify_all()
+
+
 class ScreenshotAgent:
     def __init__(
         self,
@@ -33,15 +108,24 @@ class ScreenshotAgent:
     ):
         self.headless = headless
         self.timeout_ms = timeout_ms
-        self.semaphore = asyncio.Semaphore(concurrency)
+        self.concurrency = concurrency
+        # Starts at the configured concurrency and only drops below it once
+        # page loads actually slow down
+        self.limiter = AdaptiveLimit(concurrency)
         self.rate_limiter = AsyncLimiter(rps, 1)
+        self._context: Optional["BrowserContext"] = None
 
     async def __aenter__(self):
+        from playwright.async_api import async_playwright
+
         self.playwright = await async_playwright().start()
         self.browser = await self.playwright.chromium.launch(headless=self.headless)
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._context is not None:
+            await self._context.close()
+            self._context = None
         await self.browser.close()
         await self.playwright.stop()
 
@@ -52,7 +136,7 @@ class ScreenshotAgent:
     )
     async def _take_screenshot(
         self,
-        context: BrowserContext,
+        context: "BrowserContext",
         url: str,
         output_path: Path,
         full_page: bool,
@@ -64,18 +148,32 @@ class ScreenshotAgent:
         page = await context.new_page()
         try:
             # Stage 1: Initial page load with basic wait conditions
-            wait_until_conditions = ["domcontentloaded", "networkidle"]
+            wait_until_conditions = ["domcontentloaded"]
             if render_wait_config and "wait_until" in render_wait_config:
                 wait_until_conditions = render_wait_config["wait_until"]
             
             # Load page with progressive wait strategy
             logger.debug(f"Loading page: {url}")
-            await page.goto(url, timeout=self.timeout_ms, wait_until="domcontentloaded")
+            load_started = time.perf_counter()
+            try:
+                await page.goto(url, timeout=self.timeout_ms, wait_until="domcontentloaded")
+            except Exception:
+                # Timeouts are the clearest overload signal; count any failed
+                # load as a full timeout before tenacity retries it
+                await self.limiter.record(self.timeout_ms / 1000)
+                raise
+            await self.limiter.record(time.perf_counter() - load_started)
             
             # Wait for network idle if specified
             if "networkidle" in wait_until_conditions:
                 logger.debug("Waiting for network idle...")
-                await page.wait_for_load_state("networkidle", timeout=self.timeout_ms)
+                try:
+                    await page.wait_for_load_state(
+                        "networkidle",
+                        timeout=min(self.timeout_ms, NETWORK_IDLE_TIMEOUT_MS),
+                    )
+                except Exception as e:
+                    logger.debug(f"Network never went idle, continuing: {e}")
             
             # Stage 2: GPSJAM-specific handling (if applicable)
             gpsjam_results = None
@@ -94,38 +192,49 @@ class ScreenshotAgent:
             
             # Stage 4: Take screenshot
             logger.debug("Taking screenshot...")
-            screenshot_bytes = await page.screenshot(
-                path=str(output_path), full_page=full_page
-            )
-
-            # Stage 5: Post-processing
             if crop_box or watermark:
+                # Post-process from memory so the PNG is decoded and written once
+                screenshot_bytes = await page.screenshot(full_page=full_page)
+                
+                # Stage 5: Post-processing
                 logger.debug("Applying post-processing...")
-                img = Image.open(output_path)
+                img = Image.open(io.BytesIO(screenshot_bytes))
                 if crop_box:
                     img = crop_image(img, crop_box)
                 if watermark:
                     img = watermark_text(img, **watermark)
-                img.save(output_path)
+                img.save(output_path, format="PNG", optimize=False)
+            else:
+                await page.screenshot(path=str(output_path), full_page=full_page)
                 
             logger.debug(f"Screenshot saved: {output_path}")
             
         finally:
             await page.close()
 
-    async def _capture_one_date(self, browser: Browser, url: str, dt: date, **kwargs):
-        async with self.semaphore:
+    async def _open_context(self, **kwargs) -> "BrowserContext":
+        """
+        Opens the one browser context every date's page is created in.
+
+        Concurrent captures are pages of this context, so they share its HTTP
+        cache: scripts, styles and base-map tiles are fetched once per run
+        rather than once per worker.
+        """
+        self._context = await self.browser.new_context(
+            viewport=kwargs.get("viewport"),
+            device_scale_factor=kwargs.get("device_scale_factor"),
+        )
+        return self._context
+
+    async def _capture_one_date(self, url: str, dt: date, **kwargs):
+        # Skip before taking a worker slot or a rate-limit token
+        output_path = Path(kwargs["out_dir"]) / f"{dt.isoformat()}.png"
+        if not kwargs.get("overwrite", False) and output_path.exists():
+            logger.info("File exists, skipping", path=str(output_path))
+            return
+
+        async with self.limiter:
             async with self.rate_limiter:
-                output_path = Path(kwargs["out_dir"]) / f"{dt.isoformat()}.png"
-                if not kwargs.get("overwrite", False) and output_path.exists():
-                    logger.info("File exists, skipping", path=str(output_path))
-                    return
-
-                context = await browser.new_context(
-                    viewport=kwargs.get("viewport"),
-                    device_scale_factor=kwargs.get("device_scale_factor"),
-                )
-                
                 request_url = ensure_date_param(
                     url,
                     kwargs["date_param_name"],
@@ -136,7 +245,7 @@ class ScreenshotAgent:
 
                 try:
                     await self._take_screenshot(
-                        context,
+                        self._context,
                         request_url,
                         output_path,
                         kwargs.get("full_page", True),
@@ -147,8 +256,6 @@ class ScreenshotAgent:
                     )
                 except Exception as e:
                     logger.error("Failed to capture screenshot", url=request_url, error=e)
-                finally:
-                    await context.close()
 
     async def capture_date_range(self, **kwargs) -> List[Path]:
         ensure_dir(Path(kwargs["out_dir"]))
@@ -158,8 +265,9 @@ class ScreenshotAgent:
         url = kwargs.pop("url")
         
         async with self as agent:
+            await agent._open_context(**kwargs)
             tasks = [
-                agent._capture_one_date(agent.browser, url, dt, **kwargs)
+                agent._capture_one_date(url, dt, **kwargs)
                 for dt in dates
             ]
             await asyncio.gather(*tasks)
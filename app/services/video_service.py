@@ -1,3 +1,4 @@
+import os
 import shutil
 import subprocess
 import tempfile
@@ -9,6 +10,24 @@ from app.logger import get_logger
 logger = get_logger(__name__)
 
 
+def _link_frame(source: Path, destination: Path) -> None:
+    """
+    Exposes source under destination without copying pixels where possible.
+
+    Tries a symlink, then a hardlink (e.g. Windows without symlink rights),
+    and copies only as a last resort.
+    """
+    try:
+        os.symlink(source.resolve(), destination)
+        return
+    except OSError:
+        pass
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy(source, destination)
+
+
 class VideoAgent:
     def build_video(
         self,
@@ -29,10 +48,10 @@ class VideoAgent:
         with tempfile.TemporaryDirectory() as temp_dir:
             temp_path = Path(temp_dir)
 
-            # Create sequentially named copies of images
+            # Link images under sequential names for FFmpeg's %06d pattern
             for i, img_path in enumerate(images):
                 link_path = temp_path / f"{i:06d}{img_path.suffix}"
-                shutil.copy(img_path, link_path)
+                _link_frame(img_path, link_path)
 
             framerate = 1 / seconds_per_image
 
@@ -51,8 +70,13 @@ class VideoAgent:
                 preset,
                 "-pix_fmt",
                 pix_fmt,
-                str(output_path),
+                "-threads",
+                "0",  # Let the encoder use every core
             ]
+            if codec == "libx264":
+                # Each image is held for many frames; x264 has a tune for that
+                command += ["-tune", "stillimage"]
+            command.append(str(output_path))
 
             try:
                 subprocess.run(command, check=True, capture_output=True, text=True)
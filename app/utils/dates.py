@@ -1,6 +1,8 @@
-from datetime import date, timedelta
+from datetime import date
 from typing import List
 
+import numpy as np
+
 
 def inclusive_date_range(start_date: date, end_date: date) -> List[date]:
     """
@@ -9,8 +11,13 @@ def inclusive_date_range(start_date: date, end_date: date) -> List[date]:
     if start_date > end_date:
         return []
 
-    delta = end_date - start_date
-    return [start_date + timedelta(days=i) for i in range(delta.days + 1)]
+    # One contiguous datetime64 array; tolist() yields datetime.date objects
+    days = np.arange(
+        np.datetime64(start_date, "D"),
+        np.datetime64(end_date, "D") + np.timedelta64(1, "D"),
+        dtype="datetime64[D]",
+    )
+    return days.tolist()
 
 
 # Note: The 'to_tz' function specified in the plan (def to_tz(d: date, tz: str) -> date)
@@ -0,0 +1,22 @@
+import asyncio
+from typing import Any, Coroutine, TypeVar
+
+try:
+    import uvloop
+except ImportError:  # pragma: no cover - Windows, where uvloop isn't installed
+    uvloop = None  # type: ignore[assignment]
+
+T = TypeVar("T")
+
+
+def run(main: Coroutine[Any, Any, T]) -> T:
+    """
+    Runs a script's entry coroutine, on uvloop when it is installed.
+
+    uvloop (listed in requirements.txt for Linux/macOS) schedules callbacks
+    and socket reads faster than the stdlib loop, which is what Playwright's
+    driver connection spends its time on. Without it this is asyncio.run.
+    """
+    loop_factory = uvloop.new_event_loop if uvloop is not None else None
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        return runner.run(main)
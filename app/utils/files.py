@@ -1,4 +1,7 @@
+import fnmatch
 import glob
+import os
+import shutil
 from pathlib import Path
 from typing import List, Tuple
 from PIL import Image, ImageOps
@@ -14,9 +17,35 @@ def ensure_dir(path: Path) -> None:
 def list_images(glob_pattern: str, exts: Tuple[str, ...]) -> List[Path]:
     """
     Lists images matching a glob pattern and specific extensions.
+
+    Patterns whose directory part is literal (e.g. "converter/images/x/*.png")
+    are served by one os.scandir pass, which reads entry types without a stat
+    per file; recursive or wildcard-directory patterns fall back to glob.
     """
-    files = glob.glob(glob_pattern, recursive=True)
-    return [Path(f) for f in files if f.lower().endswith(exts)]
+    # str.endswith(tuple) runs in C; os.path.splitext is ~5x slower per name
+    exts_lower = tuple(ext.lower() for ext in exts)
+    directory, name_pattern = os.path.split(glob_pattern)
+
+    if glob.has_magic(directory) or "**" in name_pattern:
+        files = glob.glob(glob_pattern, recursive=True)
+        return [Path(f) for f in files if f.lower().endswith(exts_lower)]
+
+    # Like glob, leave dotfiles out unless the pattern asks for them
+    include_hidden = name_pattern.startswith(".")
+    # The common "dir/*" listing needs no per-name fnmatch
+    match_all = name_pattern == "*"
+    try:
+        with os.scandir(directory or ".") as entries:
+            return [
+                Path(directory, entry.name)
+                for entry in entries
+                if (include_hidden or not entry.name.startswith("."))
+                and entry.name.lower().endswith(exts_lower)
+                and (match_all or fnmatch.fnmatch(entry.name, name_pattern))
+                and entry.is_file()
+            ]
+    except (FileNotFoundError, NotADirectoryError):
+        return []
 
 
 def exif_autorotate(img: Image.Image) -> Image.Image:
@@ -24,3 +53,23 @@ def exif_autorotate(img: Image.Image) -> Image.Image:
     Applies EXIF orientation to an image.
     """
     return ImageOps.exif_transpose(img)
+
+
+def link_or_copy(source: Path, destination: Path) -> None:
+    """
+    Hardlinks destination to source, copying when a link isn't possible.
+
+    A link moves no file bytes at all; the copy fallback (other filesystem,
+    no link support) goes through shutil, which uses sendfile on Linux.
+    """
+    source, destination = Path(source), Path(destination)
+    if destination.exists():
+        # Same path, or already linked to the source
+        if os.path.samefile(source, destination):
+            return
+        destination.unlink()
+
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
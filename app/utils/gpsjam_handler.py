@@ -2,14 +2,130 @@
 GPSJAM-specific page handling utilities for reliable screenshot capture.
 """
 
+from __future__ import annotations
+
 import asyncio
-from typing import Optional
-from urllib.parse import urlparse
-from playwright.async_api import Page
+import re
+from typing import TYPE_CHECKING, Optional
 from app.logger import get_logger
 
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
 logger = get_logger(__name__)
 
+GPSJAM_DOMAIN = "gpsjam.org"
+_GPSJAM_SUBDOMAIN_SUFFIX = "." + GPSJAM_DOMAIN
+
+# Common selectors for the "More" button, matched as a single selector list
+MORE_BUTTON_SELECTOR = ", ".join([
+    'button:has-text("More")',
+    'a:has-text("More")',
+    '[data-testid*="more"]',
+    '.more-button',
+    '#more-button',
+    'button[class*="more"]',
+    'a[class*="more"]',
+])
+# Without this, a selector list only checks its first match in document
+# order, so one hidden match earlier in the page would stall the wait
+MORE_BUTTON_VISIBLE_SELECTOR = f"{MORE_BUTTON_SELECTOR} >> visible=true"
+
+# JavaScript to check for hexagon paths in Leaflet overlay
+HEXAGON_CHECK_JS = """
+() => {
+    // Look for hexagon paths in Leaflet overlay pane
+    const overlayPane = document.querySelector('.leaflet-overlay-pane');
+    if (!overlayPane) return { ready: false, count: 0, reason: 'No overlay pane found' };
+
+    const paths = overlayPane.querySelectorAll('path');
+    const pathCount = paths.length;
+
+    // Check if we have a reasonable number of hexagons
+    if (pathCount === 0) {
+        return { ready: false, count: pathCount, reason: 'No paths found' };
+    }
+
+    // Check if paths have proper attributes (indicating they're rendered hexagons)
+    let validPaths = 0;
+    for (const path of paths) {
+        const d = path.getAttribute('d');
+        const style = window.getComputedStyle(path);
+
+        // Valid hexagon should have path data and be visible
+        if (d && d.length > 10 && style.display !== 'none' && style.opacity !== '0') {
+            validPaths++;
+        }
+    }
+
+    // Consider ready if we have at least some valid hexagons
+    const ready = validPaths >= Math.min(5, pathCount * 0.8);
+
+    return { 
+        ready: ready, 
+        count: pathCount, 
+        validCount: validPaths,
+        reason: ready ? 'Hexagons loaded' : `Only ${validPaths}/${pathCount} valid paths`
+    };
+}
+"""
+
+# Hexagons count as settled once ready, or once the valid count has not
+# changed for HEXAGON_STABLE_MS; the last count and when it stopped changing
+# live on window between polls. Built once at import.
+HEXAGON_STABLE_MS = 3000  # 3 seconds
+HEXAGON_POLL_MS = 500     # 0.5 seconds
+HEXAGONS_SETTLED_JS = f"""
+(stableMs) => {{
+    const result = ({HEXAGON_CHECK_JS})();
+    if (result.count === 0) return false;
+    if (result.ready) return true;
+
+    const state = window.__gpsjam_state__ || (window.__gpsjam_state__ = {{ lastCount: -1, stableSince: null }});
+    const currentCount = result.validCount || 0;
+    if (currentCount === state.lastCount && currentCount > 0) {{
+        if (state.stableSince === null) {{
+            state.stableSince = performance.now();
+        }} else if (performance.now() - state.stableSince >= stableMs) {{
+            return true;
+        }}
+    }} else {{
+        state.stableSince = null;
+        state.lastCount = currentCount;
+    }}
+    return false;
+}}
+"""
+
+# Button text that might trigger layer loading, for the generic fallback
+GENERIC_BUTTON_TEXT = re.compile(r"more|show|load|data|layer", re.IGNORECASE)
+
+# GPSJAM/Leaflet UI chrome hidden before the screenshot
+HIDDEN_UI_SELECTORS = (
+    # Common sidebar/panel selectors
+    '.sidebar',
+    '.panel',
+    '.more-panel',
+    '.info-panel',
+    '.control-panel',
+    '.leaflet-control-container .leaflet-right',
+    '.leaflet-control-container .leaflet-left',
+    
+    # Modal/popup selectors
+    '.modal',
+    '.popup',
+    '.overlay',
+    '.tooltip',
+    
+    # Navigation/menu selectors
+    '.navbar',
+    '.menu',
+    '.navigation',
+    
+    # Attribution that might be large
+    '.leaflet-control-attribution',
+)
+
 
 def is_gpsjam_domain(url: str) -> bool:
     """
@@ -21,13 +137,18 @@ def is_gpsjam_domain(url: str) -> bool:
     Returns:
         bool: True if URL contains gpsjam domain
     """
-    try:
-        parsed = urlparse(url)
-        domain = parsed.netloc.lower()
-        # More specific check: domain should end with gpsjam.org or be exactly gpsjam.org
-        return domain == "gpsjam.org" or domain.endswith(".gpsjam.org")
-    except Exception:
+    # Only the host matters, so slice it out instead of running urlparse
+    scheme_end = url.find("://")
+    if scheme_end < 0:
         return False
+    
+    authority = url[scheme_end + 3:]
+    for delimiter in "/?#":
+        authority = authority.split(delimiter, 1)[0]
+    host = authority.rpartition("@")[2].split(":", 1)[0].lower()
+    
+    # More specific check: domain should end with gpsjam.org or be exactly gpsjam.org
+    return host == GPSJAM_DOMAIN or host.endswith(_GPSJAM_SUBDOMAIN_SUFFIX)
 
 
 async def click_more_button(page: Page, timeout_ms: int = 10000) -> bool:
@@ -44,56 +165,40 @@ async def click_more_button(page: Page, timeout_ms: int = 10000) -> bool:
     try:
         logger.debug("Looking for GPSJAM 'More' button...")
         
-        # Common selectors for the "More" button
-        more_button_selectors = [
-            'button:has-text("More")',
-            'a:has-text("More")',
-            '[data-testid*="more"]',
-            '.more-button',
-            '#more-button',
-            'button[class*="more"]',
-            'a[class*="more"]'
-        ]
-        
-        # Try each selector until we find the button
-        for selector in more_button_selectors:
+        # One union wait instead of probing each selector in turn
+        try:
+            button = await page.wait_for_selector(
+                MORE_BUTTON_VISIBLE_SELECTOR, state="visible", timeout=timeout_ms
+            )
             try:
-                logger.debug(f"Trying selector: {selector}")
-                
-                # Wait for the button to be visible and clickable
-                await page.wait_for_selector(selector, timeout=timeout_ms // len(more_button_selectors))
-                
-                # Check if button is visible and enabled
-                is_visible = await page.is_visible(selector)
-                is_enabled = await page.is_enabled(selector)
-                
-                if is_visible and is_enabled:
-                    logger.debug(f"Found 'More' button with selector: {selector}")
-                    await page.click(selector)
-                    logger.info("Successfully clicked 'More' button")
-                    
-                    # Small wait after clicking to allow UI updates
-                    await asyncio.sleep(0.5)
-                    return True
-                    
+                if button is None:
+                    raise LookupError("'More' button detached before the click")
+                # Already visible: a DOM click on the matched element is one
+                # round-trip and skips Playwright's actionability checks
+                await button.evaluate("el => el.click()")
             except Exception as e:
-                logger.debug(f"Selector {selector} failed: {e}")
-                continue
+                # click() auto-waits for the element to be enabled
+                logger.debug(f"Direct click failed, using page.click: {e}")
+                await page.click(MORE_BUTTON_VISIBLE_SELECTOR)
+            logger.info("Successfully clicked 'More' button")
+            # No settle sleep: wait_for_gpsjam_hexagons waits for the layer
+            # the click loads
+            return True
+        except Exception as e:
+            logger.debug(f"'More' button selectors failed: {e}")
         
         # If no button found with text selectors, try generic approach
         logger.debug("Trying generic button detection...")
         try:
-            # Look for any button/link that might trigger layer loading
-            buttons = await page.query_selector_all('button, a[role="button"], .btn')
-            
-            for button in buttons:
-                text = await button.inner_text()
-                if text and any(keyword in text.lower() for keyword in ['more', 'show', 'load', 'data', 'layer']):
-                    logger.debug(f"Found potential button: {text}")
-                    await button.click()
-                    logger.info(f"Clicked button: {text}")
-                    await asyncio.sleep(0.5)
-                    return True
+            # Look for any button/link that might trigger layer loading; the
+            # text filter runs in the page instead of one inner_text() per button
+            candidates = page.locator('button, a[role="button"], .btn').filter(
+                has_text=GENERIC_BUTTON_TEXT
+            )
+            if await candidates.count():
+                await candidates.first.click()
+                logger.info("Clicked generic layer-loading button")
+                return True
                     
         except Exception as e:
             logger.debug(f"Generic button detection failed: {e}")
@@ -120,100 +225,21 @@ async def wait_for_gpsjam_hexagons(page: Page, timeout_ms: int = 30000) -> bool:
     try:
         logger.debug("Waiting for GPSJAM hexagonal overlay to load...")
         
-        # JavaScript to check for hexagon paths in Leaflet overlay
-        js_check_hexagons = """
-        () => {
-            // Look for hexagon paths in Leaflet overlay pane
-            const overlayPane = document.querySelector('.leaflet-overlay-pane');
-            if (!overlayPane) return { ready: false, count: 0, reason: 'No overlay pane found' };
-            
-            const paths = overlayPane.querySelectorAll('path');
-            const pathCount = paths.length;
-            
-            // Check if we have a reasonable number of hexagons
-            if (pathCount === 0) {
-                return { ready: false, count: pathCount, reason: 'No paths found' };
-            }
-            
-            // Check if paths have proper attributes (indicating they're rendered hexagons)
-            let validPaths = 0;
-            for (const path of paths) {
-                const d = path.getAttribute('d');
-                const style = window.getComputedStyle(path);
-                
-                // Valid hexagon should have path data and be visible
-                if (d && d.length > 10 && style.display !== 'none' && style.opacity !== '0') {
-                    validPaths++;
-                }
-            }
-            
-            // Consider ready if we have at least some valid hexagons
-            const ready = validPaths >= Math.min(5, pathCount * 0.8);
-            
-            return { 
-                ready: ready, 
-                count: pathCount, 
-                validCount: validPaths,
-                reason: ready ? 'Hexagons loaded' : `Only ${validPaths}/${pathCount} valid paths`
-            };
-        }
-        """
-        
-        # Wait for initial hexagons to appear
-        logger.debug("Waiting for hexagons to appear...")
+        # One page-side wait covers both "hexagons appeared" and "count stable
+        # for 3 seconds"; Playwright polls it in the browser, so there are no
+        # Python round-trips per check
         await page.wait_for_function(
-            f"() => {{ const result = ({js_check_hexagons})(); return result.count > 0; }}",
-            timeout=timeout_ms // 2
+            HEXAGONS_SETTLED_JS,
+            arg=HEXAGON_STABLE_MS,
+            polling=HEXAGON_POLL_MS,
+            timeout=timeout_ms
         )
         
-        logger.debug("Initial hexagons detected, waiting for stabilization...")
-        
-        # Wait for hexagon count to stabilize (no new hexagons added for 3 seconds)
-        stable_duration = 3000  # 3 seconds
-        check_interval = 500    # 0.5 seconds
-        last_count = -1  # Initialize to -1 to ensure first comparison works
-        stable_start = None
-        max_iterations = (timeout_ms // 2) // check_interval
-        
-        for i in range(max_iterations):
-            try:
-                result = await page.evaluate(js_check_hexagons)
-                current_count = result.get('validCount', 0)
-                
-                logger.debug(f"Hexagon check: {result}")
-                
-                if result.get('ready', False):
-                    logger.info(f"GPSJAM hexagons ready: {current_count} valid hexagons")
-                    return True
-                
-                # Check if count is stable
-                if current_count == last_count and current_count > 0:
-                    if stable_start is None:
-                        stable_start = asyncio.get_event_loop().time()
-                    elif (asyncio.get_event_loop().time() - stable_start) * 1000 >= stable_duration:
-                        logger.info(f"GPSJAM hexagons stabilized: {current_count} hexagons")
-                        return True
-                else:
-                    stable_start = None
-                    last_count = current_count
-                
-                await asyncio.sleep(check_interval / 1000)
-                
-            except Exception as e:
-                logger.debug(f"Error in hexagon check iteration {i}: {e}")
-                break
-        
-        # Final check
-        final_result = await page.evaluate(js_check_hexagons)
-        if final_result.get('ready', False) or final_result.get('validCount', 0) > 0:
-            logger.info(f"GPSJAM hexagons loaded (final): {final_result}")
-            return True
-        
-        logger.warning(f"GPSJAM hexagons failed to load within timeout: {final_result}")
-        return False
+        logger.info("GPSJAM hexagons ready")
+        return True
         
     except Exception as e:
-        logger.error(f"Error waiting for GPSJAM hexagons: {e}")
+        logger.warning(f"GPSJAM hexagons failed to load within timeout: {e}")
         return False
 
 
@@ -221,6 +247,10 @@ async def hide_gpsjam_ui_elements(page: Page) -> bool:
     """
     Hide GPSJAM UI elements that might obstruct the map view.
     
+    display:none applies synchronously and skips CSS transitions, so there is
+    nothing to wait for afterwards; the injected stylesheet also hides
+    matching elements the page adds later.
+    
     Args:
         page: Playwright page object
         
@@ -230,66 +260,39 @@ async def hide_gpsjam_ui_elements(page: Page) -> bool:
     try:
         logger.debug("Hiding GPSJAM UI elements...")
         
-        # JavaScript to hide common UI elements
+        # Known UI chrome is hidden with one stylesheet, so the browser does a
+        # single style/layout pass instead of one per element
+        await page.add_style_tag(
+            content=f"{', '.join(HIDDEN_UI_SELECTORS)} {{ display: none !important; }}"
+        )
+        
+        # The "more" overlay heuristic needs runtime content inspection
         js_hide_ui = """
         () => {
-            const elementsToHide = [
-                // Common sidebar/panel selectors
-                '.sidebar',
-                '.panel',
-                '.more-panel',
-                '.info-panel',
-                '.control-panel',
-                '.leaflet-control-container .leaflet-right',
-                '.leaflet-control-container .leaflet-left',
-                
-                // Modal/popup selectors
-                '.modal',
-                '.popup',
-                '.overlay',
-                '.tooltip',
-                
-                // Navigation/menu selectors
-                '.navbar',
-                '.menu',
-                '.navigation',
-                
-                // Attribution that might be large
-                '.leaflet-control-attribution'
-            ];
-            
             let hiddenCount = 0;
             
-            elementsToHide.forEach(selector => {
-                try {
-                    const elements = document.querySelectorAll(selector);
-                    elements.forEach(el => {
-                        // Only hide if element is visible and takes up significant space
-                        const rect = el.getBoundingClientRect();
-                        if (rect.width > 100 || rect.height > 100) {
-                            el.style.display = 'none';
-                            hiddenCount++;
-                        }
-                    });
-                } catch (e) {
-                    // Ignore individual selector errors
-                }
-            });
-            
             // Special handling for GPSJAM-specific elements
             try {
-                // Hide any element containing "more" text that's positioned over the map
-                const moreElements = document.querySelectorAll('*');
-                for (const el of moreElements) {
-                    const text = el.textContent || '';
-                    if (text.toLowerCase().includes('more') && 
-                        el.offsetWidth > 50 && el.offsetHeight > 20) {
-                        const rect = el.getBoundingClientRect();
-                        // If positioned over the main map area
-                        if (rect.left < window.innerWidth / 2 && rect.top < window.innerHeight / 2) {
-                            el.style.display = 'none';
-                            hiddenCount++;
+                // Hide leaf elements whose own text says "more" and that sit over
+                // the map. The walker skips SVG subtrees (the hexagon layer) and
+                // only reads textContent of childless elements.
+                const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_ELEMENT, {
+                    acceptNode: el => {
+                        if (el instanceof SVGElement) return NodeFilter.FILTER_REJECT;
+                        if (el.childElementCount === 0 && /more/i.test(el.textContent || '')) {
+                            return NodeFilter.FILTER_ACCEPT;
                         }
+                        return NodeFilter.FILTER_SKIP;
+                    }
+                });
+                let el;
+                while ((el = walker.nextNode())) {
+                    const rect = el.getBoundingClientRect();
+                    // If positioned over the main map area
+                    if (rect.width > 50 && rect.height > 20 &&
+                        rect.left < window.innerWidth / 2 && rect.top < window.innerHeight / 2) {
+                        el.style.display = 'none';
+                        hiddenCount++;
                     }
                 }
             } catch (e) {
@@ -304,12 +307,9 @@ async def hide_gpsjam_ui_elements(page: Page) -> bool:
         hidden_count = result.get('hiddenCount', 0)
         
         if hidden_count > 0:
-            logger.info(f"Hidden {hidden_count} GPSJAM UI elements")
+            logger.info(f"Hid GPSJAM UI chrome and {hidden_count} 'more' overlays")
         else:
-            logger.debug("No GPSJAM UI elements needed hiding")
-        
-        # Small wait for any CSS transitions
-        await asyncio.sleep(0.3)
+            logger.debug("Hid GPSJAM UI chrome; no 'more' overlays found")
         
         return True
         
@@ -330,13 +330,13 @@ async def handle_gpsjam_page(page: Page, timeout_ms: int = 30000) -> dict:
         dict: Results of each operation
     """
     import time
-    start_time = time.time()
+    start_time = time.perf_counter()
     
     results = {
         'more_button_clicked': False,
         'hexagons_loaded': False,
         'ui_hidden': False,
-        'total_time_ms': 0
+        'total_time_ms': 0.0
     }
     
     try:
@@ -349,13 +349,14 @@ async def handle_gpsjam_page(page: Page, timeout_ms: int = 30000) -> dict:
         if not results['more_button_clicked']:
             logger.warning("Failed to click 'More' button, proceeding anyway...")
         
-        # Step 2: Wait for hexagonal overlay to load
-        logger.debug("Step 2: Waiting for hexagons...")
-        results['hexagons_loaded'] = await wait_for_gpsjam_hexagons(page, timeout_ms * 2 // 3)
-        
-        # Step 3: Hide UI elements
-        logger.debug("Step 3: Hiding UI elements...")
-        results['ui_hidden'] = await hide_gpsjam_ui_elements(page)
+        # Steps 2 and 3 don't depend on each other: hide the UI while the
+        # hexagonal overlay loads
+        logger.debug("Steps 2-3: Waiting for hexagons while hiding UI elements...")
+        hide_task = asyncio.create_task(hide_gpsjam_ui_elements(page))
+        try:
+            results['hexagons_loaded'] = await wait_for_gpsjam_hexagons(page, timeout_ms * 2 // 3)
+        finally:
+            results['ui_hidden'] = await hide_task
         
         return results
         
@@ -365,7 +366,8 @@ async def handle_gpsjam_page(page: Page, timeout_ms: int = 30000) -> dict:
     
     finally:
         # Calculate total time
-        results['total_time_ms'] = int((time.time() - start_time) * 1000)
+        # perf_counter keeps sub-millisecond runs from reporting 0
+        results['total_time_ms'] = (time.perf_counter() - start_time) * 1000
         
         success_count = sum([results['more_button_clicked'], results['hexagons_loaded'], results['ui_hidden']])
-        logger.info(f"GPSJAM handling completed: {success_count}/3 operations successful in {results['total_time_ms']}ms")
+        logger.info(f"GPSJAM handling completed: {success_count}/3 operations successful in {results['total_time_ms']:.0f}ms")
@@ -1,10 +1,136 @@
-from typing import Dict, Literal
+import math
+from functools import lru_cache
+from typing import Dict, Literal, Optional, Tuple
 from PIL import Image, ImageDraw, ImageFont
 
 # TODO: Add a font file to this path
 FONT_PATH = "app/assets/fonts/DejaVuSans.ttf"
 
 
+@lru_cache(maxsize=32)
+def _get_font(size: int) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
+    """
+    Loads the watermark font once per size, falling back to Pillow's default.
+    """
+    try:
+        return ImageFont.truetype(FONT_PATH, size)
+    except IOError:
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=128)
+def _text_bbox(text: str, size: int) -> Tuple[float, float, float, float]:
+    """
+    Measures text at a font size; the result doesn't depend on the image.
+    """
+    font = _get_font(size)
+    if "\n" not in text:
+        # Same box as ImageDraw.textbbox at (0, 0), without a throwaway Draw
+        return font.getbbox(text)
+    measure = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    return measure.textbbox((0, 0), text, font=font)
+
+
+@lru_cache(maxsize=128)
+def _watermark_layout(
+    size: Tuple[int, int],
+    text: str,
+    font_size: int,
+    pos: str,
+    margin_px: int,
+    stroke_width: int,
+) -> Tuple[Tuple[int, int], Tuple[float, float]]:
+    """
+    Places a watermark on an image of the given size.
+
+    Returns the integer origin of the watermark tile on the image and the
+    (possibly fractional) text position inside that tile.
+    """
+    width, height = size
+    text_bbox = _text_bbox(text, font_size)
+    text_width = text_bbox[2] - text_bbox[0]
+    text_height = text_bbox[3] - text_bbox[1]
+
+    # Calculate position with improved centering and margins
+    if pos == "center":
+        # Perfect center with slight bias to avoid critical map elements
+        x = (width - text_width) / 2
+        y = (height - text_height) / 2
+        # Add subtle offset if needed to avoid covering central features
+        # For maps, slightly lower is often better than dead center
+        y += text_height * 0.1  # Slight downward bias
+    elif pos == "top-left":
+        x, y = margin_px, margin_px
+    elif pos == "top-right":
+        x, y = width - text_width - margin_px, margin_px
+    elif pos == "bottom-left":
+        x, y = margin_px, height - text_height - margin_px
+    elif pos == "bottom-right":
+        x, y = (
+            width - text_width - margin_px,
+            height - text_height - margin_px,
+        )
+    else:
+        # Default to center if position not recognized
+        x, y = (width - text_width) / 2, (height - text_height) / 2
+
+    pad = stroke_width + 1
+    origin_x = int(math.floor(x + text_bbox[0])) - pad
+    origin_y = int(math.floor(y + text_bbox[1])) - pad
+    return (origin_x, origin_y), (x - origin_x, y - origin_y)
+
+
+@lru_cache(maxsize=16)
+def _watermark_tile(
+    text: str,
+    size: int,
+    offset: Tuple[float, float],
+    fill_opacity: int,
+    stroke_width: int,
+    stroke_color: Tuple[int, int, int],
+) -> Image.Image:
+    """
+    Rasterizes a watermark into a transparent tile drawn at offset.
+
+    Frames that share a watermark (same text, size and sub-pixel offset)
+    reuse one rasterization. Callers only read the tile.
+    """
+    bbox = _text_bbox(text, size)
+    pad = stroke_width + 1
+    tile = Image.new(
+        "RGBA",
+        (
+            math.ceil(bbox[2] - bbox[0]) + 2 * pad + 1,
+            math.ceil(bbox[3] - bbox[1]) + 2 * pad + 1,
+        ),
+        (255, 255, 255, 0),
+    )
+    
+    # Pillow rasterizes the outline and the fill in one pass
+    ImageDraw.Draw(tile).text(
+        offset,
+        text,
+        font=_get_font(size),
+        fill=(255, 255, 255, fill_opacity),
+        stroke_width=stroke_width,
+        stroke_fill=(*stroke_color, fill_opacity),  # Same opacity for stroke
+    )
+    return tile
+
+
+def _composite_clipped(base: Image.Image, tile: Image.Image, origin: Tuple[int, int]) -> None:
+    """
+    Alpha-composites tile onto an RGBA base in place, clipped to the base.
+    """
+    left, top = max(0, -origin[0]), max(0, -origin[1])
+    right = min(tile.width, base.width - origin[0])
+    bottom = min(tile.height, base.height - origin[1])
+    if right > left and bottom > top:
+        base.alpha_composite(
+            tile, dest=(origin[0] + left, origin[1] + top), source=(left, top, right, bottom)
+        )
+
+
 def crop_image(img: Image.Image, box: Dict[str, int]) -> Image.Image:
     """
     Crops an image to a specified box.
@@ -22,11 +148,12 @@ def watermark_text(
     text: str,
     pos: Literal["top-left", "top-right", "bottom-left", "bottom-right", "center"],
     opacity: float = 0.4,  # Reduced opacity for centered watermarks
-    font_size: int = None, # Dynamic sizing based on image dimensions
+    font_size: Optional[int] = None, # Dynamic sizing based on image dimensions
     margin_px: int = 20,   # Larger margin for centered placement
     stroke_width: int = 2, # 2px stroke for contrast
     stroke_color: tuple = (0, 0, 0),  # Black stroke
     scale_factor: float = 0.08,  # Font size as fraction of image width (8%)
+    output_mode: Literal["RGB", "RGBA"] = "RGB",
 ) -> Image.Image:
     """
     Adds a text watermark to an image with dynamic sizing and optimal placement.
@@ -41,9 +168,16 @@ def watermark_text(
         stroke_width: Outline stroke width for contrast
         stroke_color: Outline color
         scale_factor: Font size as fraction of image width (used when font_size=None)
+        output_mode: "RGB" (default) or "RGBA" to keep the input's alpha
+    
+    An empty text or an opacity that rounds to zero alpha draws nothing, so an
+    input already in output_mode is returned as-is without copying.
     """
-    base = img.convert("RGBA")
-    txt_layer = Image.new("RGBA", base.size, (255, 255, 255, 0))
+    if not text or int(255 * opacity) <= 0:
+        return img if img.mode == output_mode else img.convert(output_mode)
+    
+    # convert() to the same mode copies, so the input is never modified
+    base = img.convert(output_mode)
 
     # Calculate dynamic font size if not specified
     if font_size is None:
@@ -56,54 +190,26 @@ def watermark_text(
         font_size = min(font_size, base.height // 8)  # Not larger than 1/8 image height
         font_size = max(font_size, 16)  # Minimum readable size
 
-    try:
-        font = ImageFont.truetype(FONT_PATH, font_size)
-    except IOError:
-        font = ImageFont.load_default()
-
-    draw = ImageDraw.Draw(txt_layer)
-
-    text_bbox = draw.textbbox((0, 0), text, font=font)
-    text_width = text_bbox[2] - text_bbox[0]
-    text_height = text_bbox[3] - text_bbox[1]
-
-    # Calculate position with improved centering and margins
-    if pos == "center":
-        # Perfect center with slight bias to avoid critical map elements
-        x = (base.width - text_width) / 2
-        y = (base.height - text_height) / 2
-        # Add subtle offset if needed to avoid covering central features
-        # For maps, slightly lower is often better than dead center
-        y += text_height * 0.1  # Slight downward bias
-    elif pos == "top-left":
-        x, y = margin_px, margin_px
-    elif pos == "top-right":
-        x, y = base.width - text_width - margin_px, margin_px
-    elif pos == "bottom-left":
-        x, y = margin_px, base.height - text_height - margin_px
-    elif pos == "bottom-right":
-        x, y = (
-            base.width - text_width - margin_px,
-            base.height - text_height - margin_px,
-        )
-    else:
-        # Default to center if position not recognized
-        x, y = (base.width - text_width) / 2, (base.height - text_height) / 2
-
+    # Identical frames get the same placement; the layout is memoized
+    origin, offset = _watermark_layout(
+        base.size, text, font_size, pos, margin_px, stroke_width
+    )
+    
     fill_opacity = int(255 * opacity)
     
-    # Draw stroke/outline if requested
-    if stroke_width > 0:
-        stroke_opacity = int(255 * opacity)  # Same opacity for stroke
-        stroke_fill = (*stroke_color, stroke_opacity)
-        
-        # Draw stroke by drawing text slightly offset in all directions
-        for dx in range(-stroke_width, stroke_width + 1):
-            for dy in range(-stroke_width, stroke_width + 1):
-                if dx != 0 or dy != 0:  # Don't draw at center position yet
-                    draw.text((x + dx, y + dy), text, font=font, fill=stroke_fill)
+    # Only the text's bounding box is blended: a tile that covers the glyphs
+    # plus the stroke is pasted through its own alpha
+    tile = _watermark_tile(
+        text,
+        font_size,
+        offset,
+        fill_opacity,
+        stroke_width,
+        tuple(stroke_color),
+    )
     
-    # Draw the main text on top
-    draw.text((x, y), text, font=font, fill=(255, 255, 255, fill_opacity))
-
-    return Image.alpha_composite(base, txt_layer).convert("RGB")
+    if output_mode == "RGBA":
+        _composite_clipped(base, tile, origin)
+    else:
+        base.paste(tile, origin, tile)
+    return base
@@ -2,13 +2,190 @@
 Advanced page rendering wait utilities for reliable screenshot capture.
 """
 
+from __future__ import annotations
+
 import asyncio
-from typing import Dict, List, Optional
-from playwright.async_api import Page
+import json
+from typing import TYPE_CHECKING, Dict, List, Optional
 from app.logger import get_logger
 
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
 logger = get_logger(__name__)
 
+# Selector lists are joined once here and inlined into the scripts as string
+# literals, so the page doesn't rebuild them on every poll
+MAP_CONTAINER_SELECTORS = (
+    '[class*="map"]',     # Elements with "map" in class name
+    '[id*="map"]',        # Elements with "map" in id
+    '.leaflet-container', # Leaflet maps
+    '.mapboxgl-map',      # Mapbox maps
+    '.ol-viewport',       # OpenLayers maps
+)
+LOADING_INDICATOR_SELECTORS = (
+    '[class*="loading"]',
+    '[class*="spinner"]',
+    '[class*="loader"]',
+    '.loading',
+    '.spinner',
+    '.loader',
+    '[aria-label*="loading" i]',
+    '[aria-label*="Loading" i]',
+)
+
+# JavaScript to check if all images are loaded
+IMAGES_LOADED_JS = """
+() => {
+    // document.images is already a live collection; walk it without copying
+    const images = document.images;
+    for (let i = 0, n = images.length; i < n; i++) {
+        const img = images[i];
+        // Check if image is complete and has valid dimensions
+        if (!img.complete) return false;
+        if (img.naturalWidth === 0 || img.naturalHeight === 0) return false;
+    }
+    return true;
+}
+"""
+
+# Resolves once every image still loading fires load or error, then reports
+# whether they all decoded; no polling of document.images
+IMAGES_SETTLED_JS = f"""
+async () => {{
+    const pending = Array.from(document.images).filter(img => !img.complete);
+    await Promise.all(pending.map(img => new Promise(resolve => {{
+        img.addEventListener('load', resolve, {{once: true}});
+        img.addEventListener('error', resolve, {{once: true}});
+    }})));
+    return ({IMAGES_LOADED_JS.strip()})();
+}}
+"""
+
+# JavaScript to check if fonts are ready
+FONTS_LOADED_JS = """
+() => {
+    // Check if document.fonts API is available
+    if (!document.fonts) return true;
+
+    // Return true if fonts are ready
+    return document.fonts.status === 'loaded';
+}
+"""
+
+# JavaScript to check for common map indicators
+MAP_READY_JS = """
+() => {
+    const hasContent = (elem) => {
+        const rect = elem.getBoundingClientRect();
+        return rect.width > 0 && rect.height > 0;
+    };
+
+    // Map canvas elements: a tag lookup returns a live collection with no
+    // selector matching, and usually settles the check on its own
+    const canvases = document.getElementsByTagName('canvas');
+    for (let i = 0, n = canvases.length; i < n; i++) {
+        if (hasContent(canvases[i])) return true;
+    }
+
+    // Remaining map container selectors in one traversal
+    const elements = document.querySelectorAll(%s);
+    for (let i = 0, n = elements.length; i < n; i++) {
+        if (hasContent(elements[i])) return true;
+    }
+
+    // If no map elements found, assume it's ready
+    return true;
+}
+""" % json.dumps(",".join(MAP_CONTAINER_SELECTORS))
+
+# JavaScript to check for loading indicators
+NO_LOADING_INDICATORS_JS = """
+() => {
+    // One traversal for all selectors, stopping at the first visible indicator
+    const elements = document.querySelectorAll(%s);
+    for (let i = 0, n = elements.length; i < n; i++) {
+        const elem = elements[i];
+        // checkVisibility() reads the already-computed style tree, and also
+        // catches indicators hidden by a display:none ancestor
+        if (elem.checkVisibility) {
+            if (elem.checkVisibility({ opacityProperty: true, visibilityProperty: true })) {
+                return false;
+            }
+            continue;
+        }
+        // Check if element is visible
+        const style = window.getComputedStyle(elem);
+        if (style.display !== 'none' && 
+            style.visibility !== 'hidden' && 
+            style.opacity !== '0') {
+            return false;
+        }
+    }
+
+    return true;
+}
+""" % json.dumps(",".join(LOADING_INDICATOR_SELECTORS))
+
+# Per-condition status for comprehensive_render_wait; disabled checks pass
+RENDER_STATUS_KEYS = ("images_loaded", "fonts_loaded", "map_ready", "no_loading_indicators")
+RENDER_STATUS_JS = f"""
+(enabled) => ({{
+    images_loaded: !enabled.images || ({IMAGES_LOADED_JS})(),
+    fonts_loaded: !enabled.fonts || ({FONTS_LOADED_JS})(),
+    map_ready: !enabled.map || ({MAP_READY_JS})(),
+    no_loading_indicators: ({NO_LOADING_INDICATORS_JS})()
+}})
+"""
+
+# Compact fingerprint of what the page is still doing: image count and how
+# many have completed, font status, loading-indicator count and map size
+PAGE_STATE_JS = """
+() => {
+    const images = document.images;
+    let complete = 0;
+    for (let i = 0, n = images.length; i < n; i++) {
+        if (images[i].complete) complete++;
+    }
+    const loading = document.querySelectorAll(%s).length;
+    const map = document.querySelector(%s);
+    const rect = map ? map.getBoundingClientRect() : {width: 0, height: 0};
+    const fonts = document.fonts ? document.fonts.status : '';
+    return [images.length, complete, fonts, loading, Math.round(rect.width), Math.round(rect.height)].join('|');
+}
+""" % (
+    json.dumps(",".join(LOADING_INDICATOR_SELECTORS)),
+    json.dumps(",".join(MAP_CONTAINER_SELECTORS)),
+)
+
+# Polls the status in the page with exponential backoff: the interval starts
+# short, doubles while the page state is unchanged and drops back once it
+# moves. The page counts as ready when every check passes on two polls in a
+# row with the same state, so conditions that flicker don't end the wait early
+RENDER_WAIT_JS = f"""
+async ({{enabled, timeoutMs, minIntervalMs, maxIntervalMs}}) => {{
+    const check = {RENDER_STATUS_JS.strip()};
+    const pageState = {PAGE_STATE_JS.strip()};
+    const deadline = performance.now() + timeoutMs;
+    let interval = minIntervalMs;
+    let previous = null;
+    while (true) {{
+        const status = check(enabled);
+        const passed = Object.values(status).every(Boolean);
+        const current = pageState() + '|' + passed;
+        if (passed && current === previous) return {{ready: true, status}};
+        const remaining = deadline - performance.now();
+        if (remaining <= 0) return {{ready: passed, status}};
+        interval = current === previous ? Math.min(interval * 2, maxIntervalMs) : minIntervalMs;
+        previous = current;
+        await new Promise(resolve => setTimeout(resolve, Math.min(interval, remaining)));
+    }}
+}}
+"""
+RENDER_POLL_MIN_MS = 50
+RENDER_POLL_MAX_MS = 1000
+PAINT_SETTLE_MS = 50
+
 
 async def wait_for_images_loaded(page: Page, timeout_ms: int = 10000) -> bool:
     """
@@ -18,23 +195,13 @@ async def wait_for_images_loaded(page: Page, timeout_ms: int = 10000) -> bool:
         bool: True if all images loaded, False if timeout occurred
     """
     try:
-        # JavaScript to check if all images are loaded
-        js_code = """
-        () => {
-            const images = Array.from(document.images);
-            if (images.length === 0) return true;
-            
-            return images.every(img => {
-                // Check if image is complete and has valid dimensions
-                if (!img.complete) return false;
-                if (img.naturalWidth === 0 || img.naturalHeight === 0) return false;
-                return true;
-            });
-        }
-        """
-        
-        # Wait for the condition with polling
-        await page.wait_for_function(js_code, timeout=timeout_ms)
+        loaded = await asyncio.wait_for(
+            page.evaluate(IMAGES_SETTLED_JS),
+            timeout=timeout_ms / 1000
+        )
+        if not loaded:
+            logger.warning("Some images failed to load")
+            return False
         logger.debug("All images loaded successfully")
         return True
         
@@ -51,22 +218,12 @@ async def wait_for_fonts_loaded(page: Page, timeout_ms: int = 10000) -> bool:
         bool: True if all fonts loaded, False if timeout occurred
     """
     try:
-        # JavaScript to check if fonts are ready
-        js_code = """
-        () => {
-            // Check if document.fonts API is available
-            if (!document.fonts) return true;
-            
-            // Return true if fonts are ready
-            return document.fonts.status === 'loaded';
-        }
-        """
-        
-        # First wait for document.fonts.ready promise
-        await page.evaluate("document.fonts ? document.fonts.ready : Promise.resolve()")
-        
-        # Then verify the status
-        await page.wait_for_function(js_code, timeout=timeout_ms)
+        # document.fonts.ready only resolves once loading is done, so no
+        # status polling is needed afterwards
+        await asyncio.wait_for(
+            page.evaluate("document.fonts ? document.fonts.ready.then(() => true) : true"),
+            timeout=timeout_ms / 1000
+        )
         logger.debug("All fonts loaded successfully")
         return True
         
@@ -83,37 +240,7 @@ async def wait_for_map_ready(page: Page, timeout_ms: int = 15000) -> bool:
         bool: True if map is ready, False if timeout occurred
     """
     try:
-        # JavaScript to check for common map indicators
-        js_code = """
-        () => {
-            // Check for common map container selectors
-            const mapSelectors = [
-                'canvas',           // Map canvas elements
-                '[class*="map"]',   // Elements with "map" in class name
-                '[id*="map"]',      // Elements with "map" in id
-                '.leaflet-container', // Leaflet maps
-                '.mapboxgl-map',    // Mapbox maps
-                '.ol-viewport'      // OpenLayers maps
-            ];
-            
-            for (const selector of mapSelectors) {
-                const elements = document.querySelectorAll(selector);
-                if (elements.length > 0) {
-                    // Check if at least one map element has content
-                    for (const elem of elements) {
-                        if (elem.offsetWidth > 0 && elem.offsetHeight > 0) {
-                            return true;
-                        }
-                    }
-                }
-            }
-            
-            // If no map elements found, assume it's ready
-            return true;
-        }
-        """
-        
-        await page.wait_for_function(js_code, timeout=timeout_ms)
+        await page.wait_for_function(MAP_READY_JS, timeout=timeout_ms)
         logger.debug("Map elements ready")
         return True
         
@@ -130,38 +257,7 @@ async def wait_for_no_loading_indicators(page: Page, timeout_ms: int = 10000) ->
         bool: True if no loading indicators, False if timeout occurred
     """
     try:
-        # JavaScript to check for loading indicators
-        js_code = """
-        () => {
-            const loadingSelectors = [
-                '[class*="loading"]',
-                '[class*="spinner"]',
-                '[class*="loader"]',
-                '.loading',
-                '.spinner',
-                '.loader',
-                '[aria-label*="loading" i]',
-                '[aria-label*="Loading" i]'
-            ];
-            
-            for (const selector of loadingSelectors) {
-                const elements = document.querySelectorAll(selector);
-                for (const elem of elements) {
-                    // Check if element is visible
-                    const style = window.getComputedStyle(elem);
-                    if (style.display !== 'none' && 
-                        style.visibility !== 'hidden' && 
-                        style.opacity !== '0') {
-                        return false;
-                    }
-                }
-            }
-            
-            return true;
-        }
-        """
-        
-        await page.wait_for_function(js_code, timeout=timeout_ms)
+        await page.wait_for_function(NO_LOADING_INDICATORS_JS, timeout=timeout_ms)
         logger.debug("No loading indicators visible")
         return True
         
@@ -170,6 +266,48 @@ async def wait_for_no_loading_indicators(page: Page, timeout_ms: int = 10000) ->
         return False
 
 
+async def _wait_render_status(page: Page, enabled: Dict[str, bool], budget_ms: int) -> Dict[str, bool]:
+    """
+    Run the page-side render loop and return the last per-condition status.
+    """
+    try:
+        # The page enforces the budget; the outer timeout only guards a hung evaluate
+        outcome = await asyncio.wait_for(
+            page.evaluate(RENDER_WAIT_JS, {
+                "enabled": enabled,
+                "timeoutMs": budget_ms,
+                "minIntervalMs": RENDER_POLL_MIN_MS,
+                "maxIntervalMs": RENDER_POLL_MAX_MS,
+            }),
+            timeout=(budget_ms + RENDER_POLL_MAX_MS) / 1000
+        )
+        if not outcome["ready"]:
+            logger.warning(f"Render wait timed out after {budget_ms}ms")
+        return outcome["status"]
+    except Exception as e:
+        logger.warning(f"Render status check failed: {e}")
+        return {
+            "images_loaded": not enabled["images"],
+            "fonts_loaded": not enabled["fonts"],
+            "map_ready": not enabled["map"],
+        }
+
+
+async def _wait_custom_selector(page: Page, custom_selector: Optional[str], timeout_ms: int) -> bool:
+    """
+    Wait for the custom selector if one was given.
+    """
+    if not custom_selector:
+        return True
+    try:
+        logger.debug(f"Waiting for custom selector: {custom_selector}")
+        await page.wait_for_selector(custom_selector, timeout=timeout_ms)
+        return True
+    except Exception as e:
+        logger.warning(f"Custom selector wait failed: {e}")
+        return False
+
+
 async def comprehensive_render_wait(
     page: Page,
     render_wait_config: Dict,
@@ -199,45 +337,32 @@ async def comprehensive_render_wait(
     
     timeout_ms = render_wait_config.get("timeout_ms", 30000)
     
-    # Stage 1: Wait for images if enabled
-    if render_wait_config.get("ensure_images_loaded", True):
-        logger.debug("Waiting for images to load...")
-        results["images_loaded"] = await wait_for_images_loaded(page, timeout_ms // 3)
-    else:
-        results["images_loaded"] = True
-    
-    # Stage 2: Wait for fonts if enabled
-    if render_wait_config.get("ensure_fonts_loaded", True):
-        logger.debug("Waiting for fonts to load...")
-        results["fonts_loaded"] = await wait_for_fonts_loaded(page, timeout_ms // 3)
-    else:
-        results["fonts_loaded"] = True
-    
-    # Stage 3: Wait for map to be ready
-    logger.debug("Waiting for map elements...")
-    results["map_ready"] = await wait_for_map_ready(page, timeout_ms // 2)
-    
-    # Stage 4: Wait for loading indicators to disappear
-    logger.debug("Waiting for loading indicators to disappear...")
-    results["no_loading_indicators"] = await wait_for_no_loading_indicators(page, timeout_ms // 3)
-    
-    # Stage 5: Wait for custom selector if provided
-    if custom_selector:
-        try:
-            logger.debug(f"Waiting for custom selector: {custom_selector}")
-            await page.wait_for_selector(custom_selector, timeout=timeout_ms // 3)
-            results["custom_selector"] = True
-        except Exception as e:
-            logger.warning(f"Custom selector wait failed: {e}")
-            results["custom_selector"] = False
-    else:
-        results["custom_selector"] = True
+    # Stages 1-4 share one page-side polling loop; stage 5 doesn't depend on
+    # it, so both run concurrently and cost max() rather than sum() of the waits
+    enabled = {
+        "images": render_wait_config.get("ensure_images_loaded", True),
+        "fonts": render_wait_config.get("ensure_fonts_loaded", True),
+        # The map check passes on pages without a map, so it's opt-in
+        "map": render_wait_config.get("ensure_map_ready", False),
+    }
+    logger.debug(f"Waiting for render conditions: {enabled}")
+    status, results["custom_selector"] = await asyncio.gather(
+        _wait_render_status(page, enabled, timeout_ms // 2),
+        _wait_custom_selector(page, custom_selector, timeout_ms // 3)
+    )
+    results.update({key: bool(status.get(key, False)) for key in RENDER_STATUS_KEYS})
     
-    # Stage 6: Extra stabilization wait
+    # Stage 6: Extra stabilization wait, capped at extra_wait_ms but ending
+    # as soon as the network goes idle
     extra_wait_ms = render_wait_config.get("extra_wait_ms", 300)
     if extra_wait_ms > 0:
-        logger.debug(f"Extra stabilization wait: {extra_wait_ms}ms")
-        await asyncio.sleep(extra_wait_ms / 1000)
+        logger.debug(f"Extra stabilization wait: up to {extra_wait_ms}ms")
+        try:
+            await page.wait_for_load_state("networkidle", timeout=extra_wait_ms)
+        except Exception as e:
+            logger.debug(f"Network still busy after {extra_wait_ms}ms: {e}")
+        # Let the last responses paint
+        await asyncio.sleep(PAINT_SETTLE_MS / 1000)
         results["extra_wait"] = True
     
     # Log summary
@@ -1,34 +1,67 @@
+import re
 from datetime import date
-from urllib.parse import urlparse, urlunparse, parse_qs, urlencode
+from functools import lru_cache
+from typing import Tuple
+from urllib.parse import urlparse, urlunparse, parse_qs, urlencode, quote_plus
 
 
-def with_query_param(url: str, key: str, value: str) -> str:
+@lru_cache(maxsize=256)
+def _parse(
+    url: str,
+) -> Tuple[str, str, str, str, str, Tuple[Tuple[str, Tuple[str, ...]], ...], str]:
     """
-    Adds or replaces a query parameter in a URL.
+    Parses a URL once per distinct string; the query is kept as immutable pairs
+    so callers can't alter the cached entry. Blank values are kept so a key
+    present as "d=" is replaced rather than appended a second time.
     """
     parsed_url = urlparse(url)
-    query_params = parse_qs(parsed_url.query)
-    query_params[key] = [value]
-    new_query = urlencode(query_params, doseq=True)
-
-    return urlunparse(
-        (
-            parsed_url.scheme,
-            parsed_url.netloc,
-            parsed_url.path,
-            parsed_url.params,
-            new_query,
-            parsed_url.fragment,
-        )
+    query_items = tuple(
+        (name, tuple(values))
+        for name, values in parse_qs(parsed_url.query, keep_blank_values=True).items()
+    )
+    return (
+        parsed_url.scheme,
+        parsed_url.netloc,
+        parsed_url.path,
+        parsed_url.params,
+        parsed_url.query,
+        query_items,
+        parsed_url.fragment,
     )
 
 
+def with_query_param(url: str, key: str, value: str) -> str:
+    """
+    Adds or replaces a query parameter in a URL.
+    """
+    scheme, netloc, path, params, query, query_items, fragment = _parse(url)
+    query_params = dict(query_items)
+    existing = query_params.get(key)
+    if existing == (value,):
+        # Already set to this value; nothing to rebuild
+        return url
+    if existing is None:
+        # New key: append it and leave the existing query untouched
+        pair = f"{quote_plus(key)}={quote_plus(value)}"
+        new_query = f"{query}&{pair}" if query else pair
+    else:
+        query_params[key] = (value,)
+        new_query = urlencode(query_params, doseq=True)
+
+    return urlunparse((scheme, netloc, path, params, new_query, fragment))
+
+
+_FMT_RE = re.compile(r"YYYY|MM|DD")
+_FMT_MAP = {"YYYY": "%Y", "MM": "%m", "DD": "%d"}
+
+
+@lru_cache(maxsize=32)
 def _translate_date_format(format_str: str) -> str:
     """
     Translates a common, non-Python date format string to a strftime-compatible format.
     Example: "YYYY-MM-DD" -> "%Y-%m-%d"
     """
-    return format_str.replace("YYYY", "%Y").replace("MM", "%m").replace("DD", "%d")
+    return _FMT_RE.sub(lambda match: _FMT_MAP[match.group(0)], format_str)
 
 
 def ensure_date_param(
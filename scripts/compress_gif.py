@@ -11,19 +11,20 @@ Usage:
 """
 
 import argparse
+import os
 import sys
 from pathlib import Path
 
 # Add app to Python path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from app.services.compression_service import CompressionService
+from app.services.compression_service import get_compression_service
 from app.logger import get_logger
 
 logger = get_logger(__name__)
 
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(
         description="Compress GIF files with advanced optimization techniques",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -84,25 +85,27 @@ Examples:
         help="Use conservative settings to preserve maximum quality"
     )
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     # Validate input file
-    input_path = Path(args.input)
-    if not input_path.exists():
+    input_path = args.input
+    input_dir, input_name = os.path.split(input_path)
+    input_stem, input_ext = os.path.splitext(input_name)
+    if not os.path.exists(input_path):
         print(f"❌ Error: Input file not found: {input_path}", file=sys.stderr)
         return 1
     
-    if not input_path.suffix.lower() == '.gif':
+    if input_ext.lower() != '.gif':
         print(f"❌ Error: Input file must be a GIF: {input_path}", file=sys.stderr)
         return 1
     
     # Initialize compression service
-    compression_service = CompressionService()
+    compression_service = get_compression_service()
     
     # Analyze mode
     if args.analyze_only:
-        print(f"🔍 Analyzing GIF: {input_path.name}")
-        analysis = compression_service.analyze_gif(str(input_path))
+        print(f"🔍 Analyzing GIF: {input_name}")
+        analysis = compression_service.analyze_gif(input_path)
         
         if 'error' in analysis:
             print(f"❌ Analysis failed: {analysis['error']}", file=sys.stderr)
@@ -126,15 +129,15 @@ Examples:
         return 0
     
     # Compression mode
-    print(f"🎬 Compressing GIF: {input_path.name}")
+    print(f"🎬 Compressing GIF: {input_name}")
     print(f"📏 Target size: {args.max_size:.2f} MB")
     
     # Determine output path
     output_path = args.output
     if not output_path and not args.rename:
-        output_path = str(input_path.parent / f"{input_path.stem}_compressed.gif")
+        output_path = os.path.join(input_dir, f"{input_stem}_compressed.gif")
     elif not output_path and args.rename:
-        output_path = str(input_path.parent / f"{args.rename}.gif")
+        output_path = os.path.join(input_dir, f"{args.rename}.gif")
     
     # Custom settings based on flags
     custom_settings = {}
@@ -159,7 +162,7 @@ Examples:
     
     # Perform compression
     result = compression_service.compress_gif_file(
-        input_path=str(input_path),
+        input_path=input_path,
         output_path=output_path,
         target_filename=args.rename,
         max_size_mb=args.max_size,
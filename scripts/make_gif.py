@@ -4,18 +4,19 @@ Script to create GIFs from scraped screenshots.
 """
 
 import argparse
+import hashlib
+import os
+from functools import partial
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 import sys
 from PIL import Image
 
 # Add app to path so we can import modules
 sys.path.append(str(Path(__file__).parent.parent))
 
-from app.models.requests import GifJobRequest, DriveUpload
 from app.services.gif_service import GifAgent
 from app.services.ordering import order_images
-from app.services.drive_service import GoogleDriveUploader
 from app.utils.files import list_images
 from app.logger import get_logger
 from app.config import settings
@@ -24,6 +25,66 @@ logger = get_logger(__name__)
 
 IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".bmp")
 
+# Bump when the GIF output for the same inputs changes, to drop old .cache files
+BUILD_CACHE_VERSION = 4
+
+
+def _build_digest(images: List[Path], **settings) -> str:
+    """Fingerprint the ordered inputs (name, size, mtime) and build settings."""
+    digest = hashlib.blake2b(digest_size=16, usedforsecurity=False)
+    digest.update(repr((BUILD_CACHE_VERSION, sorted(settings.items()))).encode())
+    for image_path in images:
+        stat = os.stat(image_path)
+        digest.update(f"{image_path.name}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def _build_cache_path(output_path: Path) -> Path:
+    """Sidecar holding the build digest for a GIF, e.g. clip.gif.cache."""
+    return output_path.with_name(output_path.name + ".cache")
+
+
+def _build_stamp(digest: str, output_path: Path) -> str:
+    """Cache line: the input digest plus the GIF's own size and mtime, so a GIF
+    rewritten after the build (or left half-written) doesn't count as fresh."""
+    stat = os.stat(output_path)
+    return f"{digest} {stat.st_size} {stat.st_mtime_ns}"
+
+
+def _watermark_label(stem: str, watermark_prefix: str) -> str:
+    """Build the watermark text for an image from its filename stem."""
+    from datetime import datetime
+    
+    try:
+        # Parse date from filename (e.g., "2025-08-01" -> "GPSJAM 08-01-25")
+        date_obj = datetime.strptime(stem, "%Y-%m-%d")
+        short_date = date_obj.strftime("%m-%d-%y")  # Format as MM-DD-YY
+        watermark_text_str = f"{watermark_prefix} {short_date}"
+        logger.debug(f"Processing {stem} -> watermark: '{watermark_text_str}'")
+    except ValueError:
+        # Fallback if date parsing fails
+        watermark_text_str = f"{watermark_prefix} {stem}"
+        logger.warning(f"Could not parse date from filename: {stem}, using fallback")
+    return watermark_text_str
+
+
+def _watermark_frame(img_path: Path, frame: Image.Image, watermark_prefix: str, watermark_position: str) -> Image.Image:
+    """Watermark one decoded frame, labelled from its source filename."""
+    from app.utils.image_ops import watermark_text
+    
+    # Add watermark with dynamic sizing and optimal placement
+    return watermark_text(
+        frame, 
+        _watermark_label(img_path.stem, watermark_prefix), 
+        watermark_position,
+        opacity=0.4,  # Lower opacity for centered watermarks (less distracting)
+        font_size=None,  # Dynamic sizing based on image dimensions
+        margin_px=20,    # Generous margin for centered placement
+        stroke_width=2,  # 2px black stroke for contrast
+        stroke_color=(0, 0, 0),  # Black stroke
+        scale_factor=0.08  # 8% of image width for optimal scaling
+    )
+
 
 def create_gif_from_directory(
     input_dir: str,
@@ -36,9 +97,15 @@ def create_gif_from_directory(
     drive_folder_id: Optional[str] = None,
     make_public: bool = False,
     watermark_prefix: Optional[str] = None,
-    watermark_position: str = "top-left"  # Updated default to top-left
+    watermark_position: str = "top-left",  # Updated default to top-left
+    reuse_existing: bool = True
 ) -> str:
-    """Create a GIF from images in a directory."""
+    """
+    Create a GIF from images in a directory.
+
+    With reuse_existing, a GIF whose inputs and settings match its .cache
+    sidecar is kept as-is instead of being rebuilt.
+    """
     
     # Find all images in the directory
     images_glob = f"{input_dir}/*"
@@ -52,75 +119,54 @@ def create_gif_from_directory(
     # Order the images
     ordered = order_images(source_images, order_strategy)
     
-    # Add watermarks if requested
-    final_images = ordered
-    if watermark_prefix:
-        import tempfile
-        import shutil
-        from datetime import datetime
-        from app.utils.image_ops import watermark_text
-        
-        # Create temporary directory for watermarked images
-        temp_dir = Path(tempfile.mkdtemp())
-        logger.info(f"Creating watermarked images in {temp_dir}")
-        
-        watermarked_images = []
-        for img_path in ordered:
-            # Extract date from filename (assuming format like "2025-08-01.png")
-            stem = img_path.stem
-            try:
-                # Parse date from filename (e.g., "2025-08-01" -> "GPSJAM 08-01-25")
-                date_obj = datetime.strptime(stem, "%Y-%m-%d")
-                short_date = date_obj.strftime("%m-%d-%y")  # Format as MM-DD-YY
-                watermark_text_str = f"{watermark_prefix} {short_date}"
-                logger.debug(f"Processing {stem} -> watermark: '{watermark_text_str}'")
-            except ValueError:
-                # Fallback if date parsing fails
-                watermark_text_str = f"{watermark_prefix} {stem}"
-                logger.warning(f"Could not parse date from filename: {stem}, using fallback")
-            
-            # Load image and add watermark with dynamic sizing and optimal placement
-            img = Image.open(img_path)
-            watermarked_img = watermark_text(
-                img, 
-                watermark_text_str, 
-                watermark_position,
-                opacity=0.4,  # Lower opacity for centered watermarks (less distracting)
-                font_size=None,  # Dynamic sizing based on image dimensions
-                margin_px=20,    # Generous margin for centered placement
-                stroke_width=2,  # 2px black stroke for contrast
-                stroke_color=(0, 0, 0),  # Black stroke
-                scale_factor=0.08  # 8% of image width for optimal scaling
+    gif_path = Path(output_path)
+    cache_path = _build_cache_path(gif_path)
+    digest = _build_digest(
+        ordered,
+        seconds_per_image=seconds_per_image,
+        loop=loop,
+        optimize=optimize,
+        watermark_prefix=watermark_prefix,
+        watermark_position=watermark_position,
+    )
+    if (reuse_existing and gif_path.exists() and cache_path.exists()
+            and cache_path.read_text().strip() == _build_stamp(digest, gif_path)):
+        logger.info(f"GIF is up to date, skipping build: {gif_path}")
+    else:
+        # Watermarks are drawn on each frame as GifAgent decodes it, on its
+        # prefetch threads, so no watermarked copies are written to disk
+        prepare_frame = None
+        if watermark_prefix:
+            prepare_frame = partial(
+                _watermark_frame,
+                watermark_prefix=watermark_prefix,
+                watermark_position=watermark_position,
             )
-            
-            # Save watermarked image to temp directory
-            temp_img_path = temp_dir / img_path.name
-            watermarked_img.save(temp_img_path)
-            watermarked_images.append(temp_img_path)
+            logger.info(f"Adding watermarks to {len(ordered)} images")
         
-        final_images = watermarked_images
-        logger.info(f"Added watermarks to {len(watermarked_images)} images")
-    
-    # Create GIF
-    agent = GifAgent()
-    gif_path = agent.build_gif(
-        final_images,
-        Path(output_path),
-        seconds_per_image,
-        loop,
-        optimize,
-    )
-    
-    # Clean up temporary directory if watermarks were used
-    if watermark_prefix and 'temp_dir' in locals():
-        shutil.rmtree(temp_dir)
-        logger.info("Cleaned up temporary watermarked images")
+        # Create GIF
+        agent = GifAgent()
+        agent.build_gif(
+            ordered,
+            gif_path,
+            seconds_per_image,
+            loop,
+            optimize,
+            prepare_frame=prepare_frame,
+        )
+        try:
+            cache_path.write_text(_build_stamp(digest, gif_path))
+        except OSError as e:
+            logger.debug(f"Could not write build cache {cache_path}: {e}")
     
     logger.info(f"GIF created: {gif_path}")
     
     # Upload to Google Drive if requested
     drive_file_id = None
     if upload_to_drive:
+        # The Google API client is slow to import; only load it when uploading
+        from app.services.drive_service import GoogleDriveUploader
+        
         uploader = GoogleDriveUploader()
         drive_file_id = uploader.upload(
             gif_path,
@@ -145,6 +191,7 @@ def main():
     parser.add_argument("--drive-folder-id", help="Google Drive folder ID")
     parser.add_argument("--make-public", action="store_true", help="Make Google Drive file public")
     parser.add_argument("--watermark-prefix", help="Add watermark prefix (e.g., 'GPSJAM' will add 'GPSJAM MM/DD' to each image)")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the GIF even if its inputs haven't changed")
     parser.add_argument("--watermark-position", default="center", choices=["top-left", "top-right", "bottom-left", "bottom-right", "center"], help="Watermark position (default: center for optimal visibility)")
     
     # Compression options
@@ -168,15 +215,16 @@ def main():
             drive_folder_id=args.drive_folder_id,
             make_public=args.make_public,
             watermark_prefix=args.watermark_prefix,
-            watermark_position=args.watermark_position
+            watermark_position=args.watermark_position,
+            reuse_existing=not args.rebuild
         )
         
         # Optional compression
         if args.compress:
-            from app.services.compression_service import CompressionService
+            from app.services.compression_service import get_compression_service
             
             logger.info(f"🎬 Analyzing GIF for compression (target: {args.max_size_mb:.2f} MB)...")
-            compression_service = CompressionService()
+            compression_service = get_compression_service()
             
             # Prepare custom settings based on user preferences
             custom_settings = {}
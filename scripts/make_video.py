@@ -11,10 +11,8 @@ import sys
 # Add app to path so we can import modules
 sys.path.append(str(Path(__file__).parent.parent))
 
-from app.models.requests import VideoJobRequest, DriveUpload
 from app.services.video_service import VideoAgent
 from app.services.ordering import order_images
-from app.services.drive_service import GoogleDriveUploader
 from app.utils.files import list_images
 from app.logger import get_logger
 from app.config import settings
@@ -70,6 +68,9 @@ def create_video_from_directory(
     # Upload to Google Drive if requested
     drive_file_id = None
     if upload_to_drive:
+        # The Google API client is slow to import; only load it when uploading
+        from app.services.drive_service import GoogleDriveUploader
+        
         uploader = GoogleDriveUploader()
         drive_file_id = uploader.upload(
             video_path,
@@ -5,37 +5,54 @@ This provides a cross-platform solution.
 """
 
 import asyncio
+import os
 import subprocess
 import sys
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from datetime import datetime, timedelta
 
-# Add app to path so we can import modules
-sys.path.append(str(Path(__file__).parent.parent))
+# Put the project root first so app and scripts resolve as packages
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.logger import get_logger
+from app.utils.event_loop import run
+from scripts.make_gif import create_gif_from_directory
 
 logger = get_logger(__name__)
 
+# Days are built in parallel; capped so GIF writes don't swamp the disk
+MAX_GIF_JOBS = 8
+
 
 def run_command(cmd: list[str], description: str) -> bool:
-    """Run a command and return success status."""
+    """Run a command, echoing its output as it arrives, and return success status."""
     logger.info(f"Running: {description}")
     logger.info(f"Command: {' '.join(cmd)}")
     
+    # Stream rather than capture, so a long scrape shows progress live and
+    # its log never piles up in memory
+    with subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1
+    ) as proc:
+        assert proc.stdout is not None  # Always set with stdout=PIPE
+        for line in proc.stdout:
+            print(line, end="", flush=True)
+    
+    if proc.returncode != 0:
+        logger.error(f"Command failed: {description}")
+        logger.error(f"Exit code: {proc.returncode}")
+        return False
+    return True
+
+
+def build_day_gif(date_name: str, gif_kwargs: dict) -> bool:
+    """Build one day's GIF in this process and return success status."""
     try:
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-        if result.stdout:
-            print(result.stdout)
+        create_gif_from_directory(**gif_kwargs)
         return True
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Command failed: {description}")
-        logger.error(f"Exit code: {e.returncode}")
-        if e.stdout:
-            logger.error(f"Stdout: {e.stdout}")
-        if e.stderr:
-            logger.error(f"Stderr: {e.stderr}")
+    except Exception as e:
+        logger.error(f"Creating GIF for {date_name} failed: {e}")
         return False
 
 
@@ -46,6 +63,7 @@ async def main():
     parser.add_argument("--drive-folder-id", help="Google Drive folder ID")
     parser.add_argument("--make-public", action="store_true", help="Make Google Drive files public")
     parser.add_argument("--seconds-per-image", type=float, default=0.5, help="Seconds per image in GIF")
+    parser.add_argument("--jobs", type=int, default=min(os.cpu_count() or 1, MAX_GIF_JOBS), help="GIFs to build in parallel")
     
     args = parser.parse_args()
     
@@ -96,36 +114,53 @@ async def main():
     
     logger.info(f"Found {len(date_dirs)} directories to process.")
     
+    job_limit = max(1, min(args.jobs, len(date_dirs)))
+    
+    # Each worker process imports PIL and the app modules once and then
+    # builds several days, instead of one interpreter start per GIF
+    logger.info(f"Building GIFs with up to {job_limit} parallel jobs...")
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(max_workers=job_limit) as pool:
+        jobs = []
+        for date_dir in date_dirs:
+            gif_kwargs = {
+                "input_dir": str(date_dir),
+                "output_path": str(results_dir / f"{date_dir.name}.gif"),
+                "seconds_per_image": args.seconds_per_image,
+            }
+            jobs.append(loop.run_in_executor(pool, build_day_gif, date_dir.name, gif_kwargs))
+        outcomes = await asyncio.gather(*jobs)
+    
     success_count = 0
     error_count = 0
-    
-    for date_dir in date_dirs:
-        output_path = results_dir / f"{date_dir.name}.gif"
-        
-        logger.info(f"Processing {date_dir.name}...")
-        
-        gif_cmd = [
-            sys.executable,
-            str(project_root / "scripts" / "make_gif.py"),
-            "--input-dir", str(date_dir),
-            "--output-path", str(output_path),
-            "--seconds-per-image", str(args.seconds_per_image)
-        ]
-        
-        if args.upload_to_drive:
-            gif_cmd.append("--upload-to-drive")
-            if args.drive_folder_id:
-                gif_cmd.extend(["--drive-folder-id", args.drive_folder_id])
-            if args.make_public:
-                gif_cmd.append("--make-public")
-        
-        if run_command(gif_cmd, f"Creating GIF for {date_dir.name}"):
+    built_gifs = []
+    for date_dir, ok in zip(date_dirs, outcomes):
+        if ok:
             success_count += 1
+            built_gifs.append(results_dir / f"{date_dir.name}.gif")
             logger.info(f"✓ Successfully created GIF for {date_dir.name}")
         else:
             error_count += 1
             logger.error(f"✗ Failed to create GIF for {date_dir.name}")
     
+    # Step 3: Upload after all builds, so uploads overlap each other rather
+    # than each day's upload waiting on its own build
+    if args.upload_to_drive and built_gifs:
+        from app.config import settings
+        from app.services.drive_service import GoogleDriveUploader
+        
+        logger.info(f"Step 3: Uploading {len(built_gifs)} GIFs to Google Drive...")
+        file_ids = GoogleDriveUploader().upload_many(
+            built_gifs,
+            args.drive_folder_id or settings.GOOGLE_DRIVE_DEFAULT_FOLDER_ID,
+            args.make_public or settings.GOOGLE_DRIVE_SHARE_ANYONE,
+        )
+        for gif_path, file_id in zip(built_gifs, file_ids):
+            if file_id:
+                logger.info(f"GIF uploaded to Google Drive: {gif_path.name} -> {file_id}")
+            else:
+                logger.warning(f"Upload failed for {gif_path.name}")
+    
     # Summary
     logger.info("=== SUMMARY ===")
     logger.info(f"Total directories processed: {len(date_dirs)}")
@@ -141,4 +176,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run(main())
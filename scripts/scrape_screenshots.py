@@ -3,7 +3,6 @@
 Script to scrape screenshots from gpsjam.org for specific dates.
 """
 
-import asyncio
 import argparse
 from datetime import date
 from pathlib import Path
@@ -14,6 +13,7 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from app.services.screenshot_service import ScreenshotAgent
 from app.logger import get_logger
+from app.utils.event_loop import run
 from app.config import settings
 
 logger = get_logger(__name__)
@@ -59,6 +59,7 @@ async def main():
         "wait_until": ["domcontentloaded", "networkidle"],
         "ensure_images_loaded": True,
         "ensure_fonts_loaded": True,
+        "ensure_map_ready": True,
         "extra_wait_ms": 1000,  # Extra wait for map animations
         "timeout_ms": settings.PLAYWRIGHT_TIMEOUT_MS
     }
@@ -90,4 +91,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run(main())
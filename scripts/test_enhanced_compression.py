@@ -5,15 +5,18 @@ Test script for the enhanced GIF compression system.
 Tests watermark scaling, compression quality, and external tool integration.
 """
 
+import os
 import sys
 import tempfile
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Add app to Python path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.services.compression_service import CompressionService
+from app.compressor import GifOptimizer
 from app.compressor.external_tools import ExternalToolManager
 from app.utils.image_ops import watermark_text
 from PIL import Image
@@ -22,8 +25,8 @@ from app.logger import get_logger
 logger = get_logger(__name__)
 
 
-def test_dynamic_watermarks():
-    """Test dynamic watermark scaling across different image sizes."""
+def _write_watermark_samples(out_dir: Path) -> list[Path]:
+    """Watermark map-like images at several sizes into out_dir; returns the files written."""
     print("🔍 Testing Dynamic Watermark Scaling...")
     
     # Test different image sizes
@@ -31,9 +34,14 @@ def test_dynamic_watermarks():
         (640, 480, "SD"),
         (1280, 720, "HD"),
         (1920, 1080, "Full HD"),
-        (3840, 2160, "4K")
     ]
+    # The 4K case is the slowest in the script; opt in with GIFER_SLOW_TESTS=1
+    if os.environ.get("GIFER_SLOW_TESTS"):
+        test_sizes.append((3840, 2160, "4K"))
+    else:
+        print("  ⏭️ Skipping 4K (set GIFER_SLOW_TESTS=1 to include it)")
     
+    written = []
     for width, height, label in test_sizes:
         # Create test image with map-like colors
         img = Image.new('RGB', (width, height), color=(70, 130, 180))  # Steel blue background
@@ -54,12 +62,22 @@ def test_dynamic_watermarks():
             scale_factor=0.08
         )
         
-        # Save for manual inspection
-        output_path = f"test_watermark_{label.lower().replace(' ', '_')}.png"
-        watermarked.save(output_path)
+        # Save for manual inspection; these are deleted after the run, so
+        # light deflate is enough (the 4K save dominated this test)
+        output_path = out_dir / f"test_watermark_{label.lower().replace(' ', '_')}.png"
+        watermarked.save(output_path, optimize=False, compress_level=1)
+        written.append(output_path)
         print(f"  ✅ {label} ({width}×{height}): Dynamic watermark saved to {output_path}")
     
-    print("📝 Review the generated test files to verify watermark scaling\n")
+    return written
+
+
+def test_dynamic_watermarks():
+    """Test dynamic watermark scaling across different image sizes."""
+    # Under pytest nothing is kept for inspection, so write to a temp dir
+    with tempfile.TemporaryDirectory() as temp_dir:
+        written = _write_watermark_samples(Path(temp_dir))
+        assert written and all(path.stat().st_size > 0 for path in written)
 
 
 def test_external_tools():
@@ -113,28 +131,18 @@ def test_compression_pipeline():
     original_size = test_gif.stat().st_size
     print(f"  📂 Testing with: {test_gif.name} ({original_size / 1024 / 1024:.2f} MB)")
     
-    # Test adaptive compression (should skip if already small)
-    compression_service = CompressionService()
-    
-    with tempfile.TemporaryDirectory() as temp_dir:
+    # The three runs read the same GIF and write separate outputs, so they
+    # run side by side. Each gets its own service: compress_gif swaps the
+    # optimizer's settings per call, so one instance can't be shared.
+    jobs = {
         # Test 1: Adaptive compression (may skip)
-        print("  🧪 Test 1: Adaptive compression...")
-        result1 = compression_service.compress_gif_file(
-            input_path=str(test_gif),
-            output_path=str(Path(temp_dir) / "adaptive_test.gif"),
+        'adaptive': dict(
+            output_name="adaptive_test.gif",
             max_size_mb=20.0  # High limit to test adaptive behavior
-        )
-        
-        if result1.get('skipped_compression'):
-            print(f"    ✅ Correctly skipped compression (already {result1['final_size_mb']:.2f} MB < 20.0 MB)")
-        else:
-            print(f"    ✅ Applied compression: {result1['compression_ratio']:.1f}% reduction")
-        
+        ),
         # Test 2: Forced compression with quality preservation
-        print("  🧪 Test 2: Quality-preserving compression...")
-        result2 = compression_service.compress_gif_file(
-            input_path=str(test_gif),
-            output_path=str(Path(temp_dir) / "quality_test.gif"),
+        'quality': dict(
+            output_name="quality_test.gif",
             max_size_mb=10.0,  # Lower limit to force compression
             custom_settings={
                 'enable_lossy': False,
@@ -142,19 +150,10 @@ def test_compression_pipeline():
                 'allow_resize': False
             },
             force_compression=True
-        )
-        
-        if result2.get('success'):
-            print(f"    ✅ Quality compression: {result2['compression_ratio']:.1f}% reduction")
-            print(f"    📊 Techniques: {', '.join(result2.get('techniques_used', []))}")
-        else:
-            print(f"    ❌ Quality compression failed: {result2.get('error')}")
-        
+        ),
         # Test 3: Aggressive compression
-        print("  🧪 Test 3: Aggressive compression...")
-        result3 = compression_service.compress_gif_file(
-            input_path=str(test_gif),
-            output_path=str(Path(temp_dir) / "aggressive_test.gif"),
+        'aggressive': dict(
+            output_name="aggressive_test.gif",
             max_size_mb=5.0,  # Very low limit
             custom_settings={
                 'enable_lossy': True,
@@ -164,8 +163,41 @@ def test_compression_pipeline():
                 'min_colors': 16
             },
             force_compression=True
-        )
+        ),
+    }
+    
+    # Decode once; every job re-encodes from the same read-only frames
+    frames = GifOptimizer().load_gif_frames_cached(str(test_gif))
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        def run_job(output_name, **kwargs):
+            return CompressionService().compress_gif_file(
+                input_path=str(test_gif),
+                output_path=str(Path(temp_dir) / output_name),
+                preloaded_frames=frames,
+                **kwargs
+            )
+        
+        print(f"  🧪 Running {len(jobs)} compression tests in parallel...")
+        with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+            futures = {name: pool.submit(run_job, **job) for name, job in jobs.items()}
+            results = {name: future.result() for name, future in futures.items()}
+        result1, result2, result3 = results['adaptive'], results['quality'], results['aggressive']
+        
+        print("  🧪 Test 1: Adaptive compression...")
+        if result1.get('skipped_compression'):
+            print(f"    ✅ Correctly skipped compression (already {result1['final_size_mb']:.2f} MB < 20.0 MB)")
+        else:
+            print(f"    ✅ Applied compression: {result1['compression_ratio']:.1f}% reduction")
+        
+        print("  🧪 Test 2: Quality-preserving compression...")
+        if result2.get('success'):
+            print(f"    ✅ Quality compression: {result2['compression_ratio']:.1f}% reduction")
+            print(f"    📊 Techniques: {', '.join(result2.get('techniques_used', []))}")
+        else:
+            print(f"    ❌ Quality compression failed: {result2.get('error')}")
         
+        print("  🧪 Test 3: Aggressive compression...")
         if result3.get('success'):
             print(f"    ✅ Aggressive compression: {result3['compression_ratio']:.1f}% reduction")
             print(f"    📊 Final size: {result3['final_size_mb']:.2f} MB")
@@ -186,7 +218,8 @@ def main():
     print("🚀 Enhanced GIF Compression System Tests\n")
     
     # Test 1: Dynamic watermarks
-    test_dynamic_watermarks()
+    watermark_files = _write_watermark_samples(Path())
+    print("📝 Review the generated test files to verify watermark scaling\n")
     
     # Test 2: External tools
     available_tools = test_external_tools()
@@ -200,10 +233,9 @@ def main():
     print("   2. Install missing external tools for better compression")
     print("   3. Generate a full GIF with the enhanced pipeline")
     
-    # Cleanup test files
-    test_files = Path().glob("test_watermark_*.png")
-    for file in test_files:
-        file.unlink()
+    # Cleanup test files: exactly what Test 1 wrote, no directory scan
+    for file in watermark_files:
+        file.unlink(missing_ok=True)
     print("   4. Test files cleaned up")
 
 
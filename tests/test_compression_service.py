@@ -0,0 +1,138 @@
+"""
+Tests for the compression service batch helpers.
+"""
+
+import numpy as np
+import pytest
+from PIL import Image
+from app.compressor import CompressionService, CompressionSettings, GifOptimizer
+from app.compressor.compression_service import analyze_batch, PREVIEW_TECHNIQUES
+from app.services.compression_service import CompressionService as AppCompressionService
+
+
+def test_analyze_batch_mask_shape():
+    """One row per file, one column per technique."""
+    mask = analyze_batch(
+        np.array([1, 20, 5]), np.array([0.5, 1.0, 0.5]), np.array([1.0, 25.0, 40.0])
+    )
+
+    assert mask.shape == (3, len(PREVIEW_TECHNIQUES))
+
+
+def test_analyze_batch_rules():
+    """Each column follows the single-file preview thresholds."""
+    mask = analyze_batch(
+        np.array([1, 20, 5]), np.array([0.5, 1.0, 0.5]), np.array([1.0, 25.0, 40.0])
+    )
+
+    # Short average frame duration -> timing optimization
+    assert mask[:, 0].tolist() == [False, True, False]
+    # More than 10 frames -> duplicate removal
+    assert mask[:, 1].tolist() == [False, True, False]
+    # Over 20 MB -> color reduction, over 30 MB -> dimension reduction
+    assert mask[:, 2].tolist() == [False, True, True]
+    assert mask[:, 3].tolist() == [False, False, True]
+
+
+def test_analyze_batch_handles_zero_frames():
+    """Files with no frames don't divide by zero."""
+    mask = analyze_batch(np.array([0]), np.array([0.0]), np.array([1.0]))
+
+    assert mask[0, 0]
+
+
+def test_compress_gif_uses_preloaded_frames(tmp_path, monkeypatch):
+    """Frames handed in by the caller are encoded without decoding the file."""
+    frames = [Image.new("RGB", (16, 16), (index * 60, 0, 0)) for index in range(3)]
+    gif_path = tmp_path / "clip.gif"
+    frames[0].save(
+        gif_path, save_all=True, append_images=frames[1:], duration=100, loop=0
+    )
+    service = CompressionService()
+    monkeypatch.setattr(
+        service.optimizer,
+        "_iter_gif_frames",
+        lambda path: pytest.fail("GIF was decoded"),
+    )
+
+    result = service.compress_gif(
+        str(gif_path),
+        str(tmp_path / "out.gif"),
+        settings=CompressionSettings(
+            max_file_size=1_000_000, use_external_tools=False, remove_duplicates=False
+        ),
+        preloaded=(frames, [0.1, 0.1, 0.1]),
+    )
+
+    assert result["success"]
+    with Image.open(tmp_path / "out.gif") as gif:
+        assert gif.n_frames == 3
+
+
+@pytest.fixture(scope="module")
+def decoded_gif(tmp_path_factory):
+    """A small generated GIF, decoded once for every escalation scenario."""
+    frames = [
+        Image.linear_gradient("L").resize((96, 72)).convert("RGB").rotate(index * 15)
+        for index in range(12)
+    ]
+    gif_path = tmp_path_factory.mktemp("escalation") / "clip.gif"
+    frames[0].save(
+        gif_path, save_all=True, append_images=frames[1:], duration=100, loop=0
+    )
+    return gif_path, GifOptimizer().load_gif_frames_cached(str(gif_path))
+
+
+ADAPTIVE = {"max_size_mb": 20.0}
+QUALITY = {
+    "max_size_mb": 10.0,
+    "custom_settings": {
+        "enable_lossy": False,
+        "use_external_tools": False,
+        "allow_resize": False,
+    },
+    "force_compression": True,
+}
+AGGRESSIVE = {
+    "max_size_mb": 0.008,
+    "custom_settings": {
+        "enable_lossy": True,
+        "use_external_tools": False,
+        "enable_frame_subsampling": True,
+        "allow_resize": True,
+        "min_colors": 16,
+    },
+    "force_compression": True,
+}
+
+
+@pytest.mark.parametrize(
+    "scenario",
+    [ADAPTIVE, QUALITY, AGGRESSIVE],
+    ids=["adaptive", "quality", "aggressive"],
+)
+def test_compression_escalation_from_shared_frames(
+    decoded_gif, scenario, tmp_path, monkeypatch
+):
+    """Each scenario re-encodes the one shared decode, escalating only as the target demands."""
+    gif_path, frames = decoded_gif
+    monkeypatch.setattr(
+        GifOptimizer,
+        "_iter_gif_frames",
+        lambda self, path: pytest.fail("GIF was decoded"),
+    )
+
+    result = AppCompressionService().compress_gif_file(
+        str(gif_path), str(tmp_path / "out.gif"), preloaded_frames=frames, **scenario
+    )
+
+    if scenario is ADAPTIVE:
+        assert result["skipped_compression"]
+    elif scenario is QUALITY:
+        assert result["success"]
+        assert not any(
+            t.startswith("color_reduction") for t in result["techniques_used"]
+        )
+    else:
+        assert any(t.startswith("color_reduction") for t in result["techniques_used"])
+        assert result["final_size"] < gif_path.stat().st_size
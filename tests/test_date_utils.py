@@ -17,3 +17,9 @@ def test_inclusive_date_range(start, end, expected_len):
     if expected_len > 0:
         assert result[0] == start
         assert result[-1] == end
+
+
+def test_inclusive_date_range_returns_consecutive_dates():
+    result = inclusive_date_range(date(2024, 2, 27), date(2024, 3, 2))
+    assert all(type(d) is date for d in result)
+    assert [d.day for d in result] == [27, 28, 29, 1, 2]
@@ -0,0 +1,20 @@
+import asyncio
+from app.utils import event_loop
+
+
+async def _answer():
+    await asyncio.sleep(0)
+    return 42
+
+
+def test_run_returns_the_coroutine_result():
+    assert event_loop.run(_answer()) == 42
+
+
+def test_run_falls_back_to_asyncio_without_uvloop(monkeypatch):
+    monkeypatch.setattr(event_loop, "uvloop", None)
+
+    async def loop_type():
+        return type(asyncio.get_running_loop())
+
+    assert issubclass(event_loop.run(loop_type()), asyncio.BaseEventLoop)
@@ -0,0 +1,57 @@
+"""
+Tests for external GIF tool helpers.
+"""
+
+import math
+import pytest
+from app.compressor.external_tools import (
+    _predict_lossy,
+    GIFSICLE_LOSSY_MIN,
+    GIFSICLE_LOSSY_MAX,
+)
+
+
+def test_predict_lossy_needs_two_attempts():
+    """A single point can't define a size curve."""
+    assert _predict_lossy([(60, 10_000)], 5_000) is None
+
+
+def test_predict_lossy_solves_log_linear_curve():
+    """On an exactly log-linear curve the prediction lands just under the target."""
+
+    def size_at(lossy):
+        return 10_000 * math.exp(-0.01 * (lossy - 60))
+
+    attempts = [(60, size_at(60)), (100, size_at(100))]
+    target = size_at(130)
+
+    predicted = _predict_lossy(attempts, target)
+
+    assert predicted == pytest.approx(132, abs=1)
+    assert size_at(predicted) <= target
+
+
+def test_predict_lossy_stays_inside_known_bracket():
+    """Predictions never retry levels already known to be too large or to fit."""
+    attempts = [(60, 10_000), (100, 4_000), (80, 6_000)]
+
+    predicted = _predict_lossy(attempts, 5_000)
+
+    assert 80 < predicted < 100
+
+
+def test_predict_lossy_gives_up_when_size_does_not_shrink():
+    """If more loss doesn't shrink the file there is nothing to predict."""
+    assert _predict_lossy([(60, 10_000), (100, 10_500)], 5_000) is None
+
+
+def test_predict_lossy_gives_up_on_closed_bracket():
+    """Adjacent too-large and fitting levels leave no level to try."""
+    assert _predict_lossy([(100, 6_000), (101, 4_000)], 5_000) is None
+
+
+def test_predict_lossy_is_clamped():
+    """Predictions stay within Gifsicle's accepted lossy range."""
+    predicted = _predict_lossy([(60, 100_000), (100, 99_000)], 1_000)
+
+    assert GIFSICLE_LOSSY_MIN <= predicted <= GIFSICLE_LOSSY_MAX
@@ -0,0 +1,54 @@
+from pathlib import Path
+from app.utils.files import list_images
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+
+def _touch(root: Path, *names: str) -> None:
+    for name in names:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"")
+
+
+def test_list_images_flat_pattern_filters_extensions(tmp_path):
+    _touch(tmp_path, "a.png", "b.JPG", "notes.txt", ".hidden.png", "sub/c.png")
+
+    found = list_images(str(tmp_path / "*"), IMAGE_EXTENSIONS)
+
+    assert sorted(p.name for p in found) == ["a.png", "b.JPG"]
+
+
+def test_list_images_matches_name_pattern(tmp_path):
+    _touch(tmp_path, "2025-01-01.png", "2025-02-01.png", "cover.png")
+
+    found = list_images(str(tmp_path / "2025-01-*.png"), IMAGE_EXTENSIONS)
+
+    assert found == [tmp_path / "2025-01-01.png"]
+
+
+def test_list_images_recursive_pattern_uses_glob(tmp_path):
+    _touch(tmp_path, "a.png", "sub/deeper/c.jpeg", "sub/d.txt")
+
+    found = list_images(str(tmp_path / "**" / "*"), IMAGE_EXTENSIONS)
+
+    assert sorted(p.name for p in found) == ["a.png", "c.jpeg"]
+
+
+def test_list_images_missing_directory(tmp_path):
+    assert list_images(str(tmp_path / "missing" / "*.png"), IMAGE_EXTENSIONS) == []
+
+
+def test_link_or_copy_hardlinks_and_is_idempotent(tmp_path):
+    from app.utils.files import link_or_copy
+
+    source = tmp_path / "a.gif"
+    source.write_bytes(b"GIF89a")
+    destination = tmp_path / "out.gif"
+
+    link_or_copy(source, destination)
+    link_or_copy(source, destination)
+    link_or_copy(source, source)
+
+    assert destination.read_bytes() == b"GIF89a"
+    assert destination.stat().st_ino == source.stat().st_ino
@@ -0,0 +1,203 @@
+"""
+Tests for the in-memory GIF optimizer helpers.
+"""
+
+import io
+import pytest
+from PIL import Image, ImageFile
+from app.compressor.gif_optimizer import GifOptimizer, CompressionSettings
+
+
+def _gradient_frames(count=3, size=(64, 48)):
+    frames = []
+    for index in range(count):
+        frame = Image.linear_gradient("L").resize(size).convert("RGB")
+        frames.append(frame.rotate(index * 30))
+    return frames
+
+
+def test_quantize_frames_respects_color_limit():
+    """Quantized frames are palette images with at most the requested colors."""
+    optimizer = GifOptimizer()
+
+    quantized = optimizer._quantize_frames(_gradient_frames(), 16)
+
+    for frame in quantized:
+        assert frame.mode == "P"
+        assert len(frame.getcolors(256)) <= 16
+
+
+def test_search_colors_prefers_full_palette_when_it_fits():
+    """No reduction happens when the full palette is already small enough."""
+    optimizer = GifOptimizer(CompressionSettings(max_file_size=10_000_000))
+
+    colors, data = optimizer._search_colors(_gradient_frames(), [0.1, 0.1, 0.1])
+
+    assert colors == 256
+    assert data[:6] == b"GIF89a"
+
+
+def test_search_colors_falls_back_to_minimum():
+    """An unreachable limit yields the smallest allowed palette."""
+    optimizer = GifOptimizer(CompressionSettings(max_file_size=1, min_colors=32))
+
+    colors, data = optimizer._search_colors(_gradient_frames(), [0.1, 0.1, 0.1])
+
+    assert colors == 32
+    assert len(data) > 1
+
+
+def test_quantize_frames_share_one_palette():
+    """Every frame is mapped onto the same global palette."""
+    optimizer = GifOptimizer()
+
+    quantized = optimizer._quantize_frames(_gradient_frames(), 64)
+
+    palettes = {bytes(frame.getpalette()) for frame in quantized}
+    assert len(palettes) == 1
+
+
+def test_map_frames_keeps_order_on_thread_pool(monkeypatch):
+    """Frames come back in input order when processed in parallel."""
+    monkeypatch.setattr("os.cpu_count", lambda: 4)
+    optimizer = GifOptimizer()
+    frames = [Image.new("L", (1, 1), value) for value in range(20)]
+
+    mapped = optimizer._map_frames(lambda frame: frame.point(lambda v: v + 1), frames)
+
+    assert [frame.getpixel((0, 0)) for frame in mapped] == list(range(1, 21))
+    assert optimizer._frame_pool is not None
+
+
+def test_load_unique_frames_matches_batch_dedup(tmp_path):
+    """Streaming dedup drops the same frames as the vectorized pass."""
+    frames = _gradient_frames(4)
+    # Near-duplicate: Pillow's writer would merge an identical frame on save
+    near_copy = frames[0].copy()
+    near_copy.putpixel((0, 0), (255, 0, 0))
+    frames.insert(1, near_copy)
+    gif_path = tmp_path / "dup.gif"
+    frames[0].save(
+        gif_path, save_all=True, append_images=frames[1:], duration=100, loop=0
+    )
+    optimizer = GifOptimizer()
+
+    unique, durations, original_count = optimizer._load_unique_frames(str(gif_path))
+    expected = optimizer._remove_duplicates(*optimizer._load_gif_frames(str(gif_path)))
+
+    assert original_count == 5
+    assert len(unique) == len(expected[0]) == 4
+    assert durations == expected[1]
+
+
+def test_search_colors_bisects_the_ladder(monkeypatch):
+    """The color search needs only a logarithmic number of trial encodes."""
+    optimizer = GifOptimizer(CompressionSettings(max_file_size=100, min_colors=16))
+    tried = []
+
+    def fake_encode(colors, durations):
+        tried.append(colors)
+        return b"x" * colors  # size grows with palette size
+
+    # Pass the palette size straight through as the "frames"
+    monkeypatch.setattr(optimizer, "_quantize_frames", lambda frames, colors: colors)
+    monkeypatch.setattr(optimizer, "_encode_gif", fake_encode)
+
+    colors, data = optimizer._search_colors(_gradient_frames(1), [0.1])
+
+    assert colors == 96
+    assert len(data) == 96
+    assert len(set(tried)) == len(tried)  # no palette size is encoded twice
+    assert len(tried) <= 5
+
+
+def test_resize_works_from_in_memory_frames(monkeypatch):
+    """Resizing downscales the given frames without decoding any GIF."""
+    optimizer = GifOptimizer(
+        CompressionSettings(max_file_size=1_000, use_external_tools=False)
+    )
+    monkeypatch.setattr(
+        optimizer, "_iter_gif_frames", lambda path: pytest.fail("GIF was decoded")
+    )
+    frames = _gradient_frames(2, size=(200, 100))
+
+    resized = optimizer._resize_gif_if_needed(frames, [0.1, 0.1], 4_000, 64)
+
+    with Image.open(io.BytesIO(resized)) as gif:
+        assert gif.size == (100, 50)
+
+
+def test_resize_skipped_when_already_small():
+    """No re-encode happens for a GIF that already fits."""
+    optimizer = GifOptimizer(CompressionSettings(max_file_size=10_000))
+
+    assert (
+        optimizer._resize_gif_if_needed(_gradient_frames(1), [0.1], 5_000, 64) is None
+    )
+
+
+def _write_gif(path, frames):
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=100, loop=0)
+
+
+def test_frame_hashes_are_cached_beside_the_gif(tmp_path, monkeypatch):
+    """A second load reuses the sidecar hashes instead of hashing frames."""
+    gif_path = tmp_path / "clip.gif"
+    _write_gif(gif_path, _gradient_frames(3))
+    optimizer = GifOptimizer()
+
+    first = optimizer._load_unique_frames(str(gif_path))
+    assert (tmp_path / "clip.gif.hashes.npz").exists()
+
+    monkeypatch.setattr(
+        optimizer, "_frame_hashes", lambda frames: pytest.fail("frames were rehashed")
+    )
+    second = optimizer._load_unique_frames(str(gif_path))
+
+    assert second[1] == first[1]
+    assert second[2] == first[2]
+
+
+def test_stale_hash_cache_is_ignored(tmp_path):
+    """Rewriting the GIF invalidates its cached hashes."""
+    gif_path = tmp_path / "clip.gif"
+    _write_gif(gif_path, _gradient_frames(3))
+    optimizer = GifOptimizer()
+    optimizer._load_unique_frames(str(gif_path))
+
+    _write_gif(gif_path, _gradient_frames(5))
+
+    assert optimizer._read_hash_cache(str(gif_path)) is None
+    assert optimizer._load_unique_frames(str(gif_path))[2] == 5
+
+
+def test_quick_gif_info_reads_headers_without_decoding(tmp_path, monkeypatch):
+    """Frame count, delays and size come from the block headers alone."""
+    gif_path = tmp_path / "clip.gif"
+    frames = _gradient_frames(4, size=(80, 60))
+    frames[0].save(
+        gif_path,
+        save_all=True,
+        append_images=frames[1:],
+        duration=[50, 120, 300, 80],
+        loop=0,
+    )
+
+    def fail_load(self):
+        pytest.fail("pixel data was decoded")
+
+    monkeypatch.setattr(ImageFile.ImageFile, "load", fail_load)
+    frame_count, durations, size = GifOptimizer()._quick_gif_info(str(gif_path))
+
+    assert frame_count == 4
+    assert durations == [0.05, 0.12, 0.3, 0.08]
+    assert size == (80, 60)
+
+
+def test_quick_gif_info_rejects_non_gif(tmp_path):
+    """Files that aren't GIFs raise instead of reporting zero frames."""
+    png_path = tmp_path / "frame.png"
+    _gradient_frames(1)[0].save(png_path)
+
+    with pytest.raises(ValueError):
+        GifOptimizer()._quick_gif_info(str(png_path))
@@ -0,0 +1,160 @@
+import subprocess
+from PIL import Image
+from app.compressor.external_tools import ExternalToolManager
+from app.services.gif_service import GifAgent, _build_shared_palette
+
+
+def _write_frames(tmp_path, count=6):
+    paths = []
+    for index in range(count):
+        path = tmp_path / f"{index:02}.png"
+        Image.new("RGBA", (8, 6), (index * 20, 0, 0, 255)).save(path)
+        paths.append(path)
+    return paths
+
+
+def test_build_gif_writes_every_frame(tmp_path):
+    images = _write_frames(tmp_path)
+
+    output = GifAgent().build_gif(images, tmp_path / "out" / "clip.gif", 0.25)
+
+    with Image.open(output) as gif:
+        assert gif.n_frames == len(images)
+        assert gif.info["duration"] == 250
+
+
+def test_prefetched_frames_keep_input_order(tmp_path, monkeypatch):
+    monkeypatch.setattr("os.cpu_count", lambda: 4)
+    images = _write_frames(tmp_path, count=10)
+
+    frames = list(GifAgent()._iter_frames(images))
+
+    assert [frame.getpixel((0, 0))[0] for frame in frames] == [
+        i * 20 for i in range(10)
+    ]
+    assert all(frame.mode == "RGB" for frame in frames)
+
+
+def test_prepare_frame_edits_frames_without_temp_files(tmp_path):
+    images = _write_frames(tmp_path, count=3)
+    seen = []
+
+    def mark(path, frame):
+        seen.append(path)
+        frame.putpixel((0, 0), (0, 255, 0))
+        return frame
+
+    output = GifAgent().build_gif(
+        images, tmp_path / "out" / "clip.gif", prepare_frame=mark
+    )
+
+    assert set(seen) == set(images)
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+        [p.name for p in images] + ["out"]
+    )
+    with Image.open(output) as gif:
+        assert gif.convert("RGB").getpixel((0, 0)) == (0, 255, 0)
+
+
+def test_build_gif_accepts_in_memory_images(tmp_path):
+    frames = [Image.new("RGBA", (8, 6), (0, 0, index * 40, 255)) for index in range(3)]
+
+    output = GifAgent().build_gif(frames, tmp_path / "clip.gif")
+
+    with Image.open(output) as gif:
+        assert gif.n_frames == 3
+
+
+def _fake_gifsicle_detected(monkeypatch):
+    def detect_tools(self):
+        self._tool_cache["gifsicle_path"] = "gifsicle"
+        return {"gifsicle": True}
+
+    monkeypatch.setattr(ExternalToolManager, "detect_tools", detect_tools)
+
+
+def test_gifsicle_post_pass_replaces_larger_output(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_run(cmd, **kwargs):
+        calls.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, stdout=b"GIF89a", stderr=b"")
+
+    _fake_gifsicle_detected(monkeypatch)
+    monkeypatch.setattr("subprocess.run", fake_run)
+
+    output = GifAgent().build_gif(
+        _write_frames(tmp_path), tmp_path / "clip.gif", lossy=80
+    )
+
+    assert calls[0][:2] == ["gifsicle", "-O3"]
+    assert "--lossy=80" in calls[0]
+    assert output.read_bytes() == b"GIF89a"
+    assert not (tmp_path / "clip.gif.tmp").exists()
+
+
+def test_gifsicle_failure_keeps_pillow_output(tmp_path, monkeypatch):
+    def failing_run(cmd, **kwargs):
+        return subprocess.CompletedProcess(
+            cmd, 1, stdout=b"", stderr=b"gifsicle: error"
+        )
+
+    _fake_gifsicle_detected(monkeypatch)
+    monkeypatch.setattr("subprocess.run", failing_run)
+
+    output = GifAgent().build_gif(_write_frames(tmp_path), tmp_path / "clip.gif")
+
+    with Image.open(output) as gif:
+        assert gif.n_frames == 6
+
+
+def test_shared_palette_maps_every_frame_onto_one_palette(tmp_path):
+    images = _write_frames(tmp_path, count=8)
+    agent = GifAgent()
+    palette = _build_shared_palette(images)
+
+    frames = list(agent._iter_frames(images, palette=palette))
+
+    assert all(frame.mode == "P" for frame in frames)
+    assert len({bytes(frame.getpalette()) for frame in frames}) == 1
+    # Every frame is sampled here, so each flat color survives exactly
+    assert [frame.convert("RGB").getpixel((0, 0))[0] for frame in frames] == [
+        i * 20 for i in range(8)
+    ]
+
+
+def test_build_gif_without_shared_palette(tmp_path):
+    output = GifAgent().build_gif(
+        _write_frames(tmp_path), tmp_path / "clip.gif", shared_palette=False
+    )
+
+    with Image.open(output) as gif:
+        assert gif.n_frames == 6
+
+
+def test_unchanged_pixels_are_left_out_of_later_frames(tmp_path):
+    images = []
+    for index in range(3):
+        frame = Image.linear_gradient("L").convert("RGB")
+        frame.paste((255, 0, index * 100), (10, 10, 20, 20))
+        path = tmp_path / f"{index:02}.png"
+        frame.save(path)
+        images.append(path)
+
+    output = GifAgent().build_gif(images, tmp_path / "clip.gif")
+
+    with Image.open(output) as gif:
+        gif.seek(1)
+        # Only the changed patch is stored, and it still decodes intact
+        assert gif.tile[0][1] == (10, 10, 20, 20)
+        assert gif.convert("RGB").getpixel((15, 15)) == (255, 0, 100)
+
+
+def test_shared_palette_keeps_an_index_free_for_transparency(tmp_path):
+    path = tmp_path / "gradient.png"
+    Image.linear_gradient("L").convert("RGB").save(path)
+    palette = _build_shared_palette([path])
+
+    frame = next(GifAgent()._iter_frames([path], palette=palette))
+
+    assert max(frame.getdata()) < 255
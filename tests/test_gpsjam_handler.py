@@ -13,25 +13,37 @@ from app.utils.gpsjam_handler import (
 )
 
 
-def test_is_gpsjam_domain():
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        # Valid GPSJAM domains
+        ("https://gpsjam.org", True),
+        ("https://www.gpsjam.org", True),
+        ("https://gpsjam.org/path", True),
+        ("http://gpsjam.org", True),
+        ("https://sub.gpsjam.org", True),
+        # Non-GPSJAM domains
+        ("https://google.com", False),
+        ("https://example.com", False),
+        ("https://gpsjam-fake.com", False),
+        ("https://notgpsjam.org", False),
+        ("https://fakegpsjam.org", False),
+        # Invalid URLs
+        ("invalid-url", False),
+        ("", False),
+        # Ports, credentials, queries and fragments around the host
+        ("https://gpsjam.org:443/?date=2025-08-01", True),
+        ("https://user:pw@www.gpsjam.org/", True),
+        ("https://gpsjam.org?date=2025-08-01", True),
+        ("HTTPS://GPSJAM.ORG#map", True),
+        ("https://gpsjam.org.evil.com", False),
+        ("https://evil.com/?next=https://gpsjam.org", False),
+        ("https://gpsjam.org@evil.com", False),
+    ],
+)
+def test_is_gpsjam_domain(url, expected):
     """Test GPSJAM domain detection."""
-    # Valid GPSJAM domains
-    assert is_gpsjam_domain("https://gpsjam.org") is True
-    assert is_gpsjam_domain("https://www.gpsjam.org") is True
-    assert is_gpsjam_domain("https://gpsjam.org/path") is True
-    assert is_gpsjam_domain("http://gpsjam.org") is True
-    assert is_gpsjam_domain("https://sub.gpsjam.org") is True
-    
-    # Non-GPSJAM domains
-    assert is_gpsjam_domain("https://google.com") is False
-    assert is_gpsjam_domain("https://example.com") is False
-    assert is_gpsjam_domain("https://gpsjam-fake.com") is False
-    assert is_gpsjam_domain("https://notgpsjam.org") is False
-    assert is_gpsjam_domain("https://fakegpsjam.org") is False
-    
-    # Invalid URLs
-    assert is_gpsjam_domain("invalid-url") is False
-    assert is_gpsjam_domain("") is False
+    assert is_gpsjam_domain(url) is expected
 
 
 @pytest.fixture
@@ -43,6 +55,10 @@ def mock_page():
     page.is_enabled = AsyncMock(return_value=True)
     page.click = AsyncMock()
     page.query_selector_all = AsyncMock(return_value=[])
+    # Generic fallback locator: no matching buttons by default
+    page.locator = MagicMock()
+    page.locator.return_value.filter.return_value.count = AsyncMock(return_value=0)
+    page.locator.return_value.filter.return_value.first.click = AsyncMock()
     page.wait_for_function = AsyncMock()
     page.evaluate = AsyncMock()
     return page
@@ -61,6 +77,33 @@ async def test_click_more_button_success(mock_page):
     mock_page.click.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_click_more_button_waits_once_on_union_selector(mock_page):
+    """All More-button selectors are probed with a single wait."""
+    result = await click_more_button(mock_page, 5000)
+    
+    assert result is True
+    mock_page.wait_for_selector.assert_awaited_once()
+    selector = mock_page.wait_for_selector.call_args.args[0]
+    assert 'button:has-text("More")' in selector and '.more-button' in selector
+    # Any visible match counts, not just the first match in document order
+    assert selector.endswith(">> visible=true")
+    assert mock_page.wait_for_selector.call_args.kwargs['timeout'] == 5000
+
+
+@pytest.mark.asyncio
+async def test_click_more_button_clicks_matched_element_directly(mock_page):
+    """The visible match is clicked in the page without page.click()."""
+    button = AsyncMock()
+    mock_page.wait_for_selector.return_value = button
+    
+    result = await click_more_button(mock_page, 5000)
+    
+    assert result is True
+    button.evaluate.assert_awaited_once_with("el => el.click()")
+    mock_page.click.assert_not_called()
+
+
 @pytest.mark.asyncio
 async def test_click_more_button_not_found(mock_page):
     """Test More button not found."""
@@ -78,36 +121,30 @@ async def test_click_more_button_generic_fallback(mock_page):
     # First selector fails
     mock_page.wait_for_selector.side_effect = Exception("Not found")
     
-    # Mock button with "More" text
-    mock_button = AsyncMock()
-    mock_button.inner_text.return_value = "More"
-    mock_page.query_selector_all.return_value = [mock_button]
+    # One button whose text matches the keyword filter
+    candidates = mock_page.locator.return_value.filter.return_value
+    candidates.count.return_value = 1
     
     result = await click_more_button(mock_page, 5000)
     
     assert result is True
-    mock_button.click.assert_called_once()
+    candidates.first.click.assert_awaited_once()
+    pattern = mock_page.locator.return_value.filter.call_args.kwargs['has_text']
+    assert pattern.search("Show data layer") and not pattern.search("Settings")
+    mock_page.query_selector_all.assert_not_called()
 
 
 @pytest.mark.asyncio
 async def test_wait_for_gpsjam_hexagons_success(mock_page):
     """Test successful hexagon waiting."""
-    # Mock successful hexagon detection
-    hexagon_result = {
-        'ready': True,
-        'count': 50,
-        'validCount': 45,
-        'reason': 'Hexagons loaded'
-    }
-    
+    # The page-side wait resolves once hexagons are ready
     mock_page.wait_for_function.return_value = None
-    mock_page.evaluate.return_value = hexagon_result
     
     result = await wait_for_gpsjam_hexagons(mock_page, 10000)
     
     assert result is True
-    mock_page.wait_for_function.assert_called()
-    mock_page.evaluate.assert_called()
+    mock_page.wait_for_function.assert_called_once()
+    mock_page.evaluate.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -123,32 +160,19 @@ async def test_wait_for_gpsjam_hexagons_timeout(mock_page):
 
 @pytest.mark.asyncio
 async def test_wait_for_gpsjam_hexagons_stabilization(mock_page):
-    """Test hexagon count stabilization logic."""
-    # Mock initial hexagons appearing
+    """Test hexagon count stabilization is polled inside the page."""
     mock_page.wait_for_function.return_value = None
     
-    # Mock progressive hexagon loading then stabilization
-    hexagon_results = [
-        {'ready': False, 'count': 10, 'validCount': 8, 'reason': 'Loading'},
-        {'ready': False, 'count': 20, 'validCount': 18, 'reason': 'Loading'},
-        {'ready': False, 'count': 25, 'validCount': 23, 'reason': 'Loading'},
-        {'ready': False, 'count': 25, 'validCount': 23, 'reason': 'Loading'},  # Stable
-        {'ready': False, 'count': 25, 'validCount': 23, 'reason': 'Loading'},  # Still stable
-        {'ready': False, 'count': 25, 'validCount': 23, 'reason': 'Loading'},  # Still stable
-        {'ready': False, 'count': 25, 'validCount': 23, 'reason': 'Loading'},  # Still stable
-        {'ready': False, 'count': 25, 'validCount': 23, 'reason': 'Loading'},  # Still stable
-        {'ready': False, 'count': 25, 'validCount': 23, 'reason': 'Loading'},  # Still stable
-    ]
-    
-    # Use cycle to handle multiple calls
-    from itertools import cycle
-    result_cycle = cycle(hexagon_results)
-    mock_page.evaluate.side_effect = lambda _: next(result_cycle)
-    
     result = await wait_for_gpsjam_hexagons(mock_page, 10000)
     
     assert result is True
-    assert mock_page.evaluate.call_count >= 2
+    # A single page-side wait with the whole budget and the stability rule
+    wait = mock_page.wait_for_function.call_args
+    assert wait.kwargs['arg'] == 3000
+    assert wait.kwargs['polling'] == 500
+    assert wait.kwargs['timeout'] == 10000
+    assert 'stableSince' in wait.args[0]
+    assert 'result.count === 0' in wait.args[0]
 
 
 @pytest.mark.asyncio
@@ -162,6 +186,20 @@ async def test_hide_gpsjam_ui_elements_success(mock_page):
     mock_page.evaluate.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_hide_gpsjam_ui_elements_uses_one_stylesheet(mock_page):
+    """Test known UI chrome is hidden with a single injected CSS rule."""
+    mock_page.evaluate.return_value = {'hiddenCount': 0, 'success': True}
+    
+    result = await hide_gpsjam_ui_elements(mock_page)
+    
+    assert result is True
+    mock_page.add_style_tag.assert_awaited_once()
+    css = mock_page.add_style_tag.call_args.kwargs['content']
+    assert '.sidebar, .panel' in css
+    assert css.endswith('{ display: none !important; }')
+
+
 @pytest.mark.asyncio
 async def test_hide_gpsjam_ui_elements_error(mock_page):
     """Test UI element hiding with error."""
@@ -187,12 +225,7 @@ async def test_handle_gpsjam_page_full_success(mock_page):
     
     # Mock UI hiding
     hide_result = {'hiddenCount': 2, 'success': True}
-    mock_page.evaluate.side_effect = [
-        # First call for hexagon checking
-        {'ready': True, 'count': 50, 'validCount': 45, 'reason': 'Hexagons loaded'},
-        # Second call for UI hiding
-        hide_result
-    ]
+    mock_page.evaluate.side_effect = [hide_result]
     
     results = await handle_gpsjam_page(mock_page, 10000)
     
@@ -211,10 +244,7 @@ async def test_handle_gpsjam_page_partial_success(mock_page):
     
     # Mock hexagons to succeed
     mock_page.wait_for_function.return_value = None
-    mock_page.evaluate.side_effect = [
-        {'ready': True, 'count': 30, 'validCount': 28, 'reason': 'Hexagons loaded'},
-        {'hiddenCount': 1, 'success': True}
-    ]
+    mock_page.evaluate.side_effect = [{'hiddenCount': 1, 'success': True}]
     
     results = await handle_gpsjam_page(mock_page, 10000)
     
@@ -0,0 +1,73 @@
+from PIL import Image, ImageDraw
+from app.utils import image_ops
+from app.utils.image_ops import crop_image, watermark_text
+
+
+def test_crop_image_uses_box_size():
+    img = Image.new("RGB", (100, 80))
+    cropped = crop_image(img, {"left": 10, "top": 5, "width": 40, "height": 30})
+    assert cropped.size == (40, 30)
+
+
+def test_watermark_reuses_font_measurement_and_tile():
+    image_ops._get_font.cache_clear()
+    image_ops._text_bbox.cache_clear()
+    image_ops._watermark_tile.cache_clear()
+    image_ops._watermark_layout.cache_clear()
+    img = Image.new("RGB", (200, 100), (0, 0, 255))
+
+    outputs = [watermark_text(img, "GPSJAM", "center", font_size=20) for _ in range(3)]
+
+    assert outputs[0].size == img.size and outputs[0].mode == "RGB"
+    assert outputs[0].tobytes() == outputs[2].tobytes()
+    assert image_ops._get_font.cache_info().misses == 1
+    assert image_ops._text_bbox.cache_info().misses == 1
+    # The text is rasterized once and pasted onto every frame
+    assert image_ops._watermark_tile.cache_info().misses == 1
+    assert image_ops._watermark_tile.cache_info().hits == 2
+    assert image_ops._watermark_layout.cache_info().misses == 1
+
+
+def test_cached_bbox_matches_draw_textbbox():
+    font = image_ops._get_font(24)
+    draw = ImageDraw.Draw(Image.new("RGBA", (300, 100)))
+    assert image_ops._text_bbox("Hello 123", 24) == draw.textbbox(
+        (0, 0), "Hello 123", font=font
+    )
+
+
+def test_watermark_blends_only_around_the_text():
+    img = Image.new("RGB", (400, 200), (0, 0, 255))
+
+    out = watermark_text(img, "GPSJAM", "top-left", font_size=20, margin_px=10)
+
+    assert img.getpixel((15, 15)) == (0, 0, 255)  # input is left untouched
+    assert out.getpixel((399, 199)) == (0, 0, 255)
+    assert out.crop((0, 0, 120, 50)).getcolors(4096) != [(120 * 50, (0, 0, 255))]
+
+
+def test_invisible_watermark_returns_input():
+    img = Image.new("RGB", (50, 40))
+
+    assert watermark_text(img, "GPSJAM", "center", opacity=0) is img
+    assert watermark_text(img, "", "center") is img
+    assert watermark_text(img.convert("RGBA"), "", "center").mode == "RGB"
+
+
+def test_watermark_can_keep_alpha():
+    img = Image.new("RGBA", (200, 100), (0, 0, 255, 128))
+
+    out = watermark_text(img, "GPSJAM", "center", font_size=20, output_mode="RGBA")
+
+    assert out.mode == "RGBA" and out is not img
+    assert out.getpixel((0, 0)) == (0, 0, 255, 128)
+    assert img.getpixel((100, 55)) == (0, 0, 255, 128)
+    # Text that hangs off the edge is clipped rather than rejected
+    edge = watermark_text(
+        Image.new("RGBA", (30, 10)),
+        "GPSJAM",
+        "center",
+        font_size=20,
+        output_mode="RGBA",
+    )
+    assert edge.size == (30, 10)
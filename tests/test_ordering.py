@@ -50,3 +50,73 @@ def test_order_explicit():
     explicit_order = [Path("c.png"), Path("a.png"), Path("b.png")]
     ordered = order_images(files, "explicit", explicit=explicit_order)
     assert ordered == explicit_order
+
+
+def test_order_auto_parses_each_name_once(image_files, monkeypatch):
+    from app.services import ordering
+
+    calls = []
+    original = ordering.detect_date_from_name
+
+    def counting(name):
+        calls.append(name)
+        return original(name)
+
+    monkeypatch.setattr(ordering, "detect_date_from_name", counting)
+    order_images(image_files, "auto")
+    assert len(calls) == len(image_files)
+
+
+def test_order_auto_treats_invalid_dates_as_undated():
+    files = [Path("2025-02-30-b.png"), Path("2025-01-01-a.png")]
+    ordered = order_images(files, "auto")
+    assert [p.name for p in ordered] == ["2025-01-01-a.png", "2025-02-30-b.png"]
+
+
+def test_order_auto_keeps_input_order_for_same_day():
+    files = [Path("2025-01-01-z.png"), Path("2025-01-01-a.png")]
+    ordered = order_images(files, "auto")
+    assert ordered == files
+
+
+def test_order_natural_ignores_case_and_leading_digits():
+    files = [
+        Path("Shot10.png"),
+        Path("2shot.png"),
+        Path("shot9.png"),
+        Path("10shot.png"),
+    ]
+    ordered = order_images(files, "natural")
+    assert [p.name for p in ordered] == [
+        "2shot.png",
+        "10shot.png",
+        "shot9.png",
+        "Shot10.png",
+    ]
+
+
+def test_order_auto_stops_parsing_at_first_undated_name(monkeypatch):
+    from app.services import ordering
+
+    calls = []
+    original = ordering.detect_date_from_name
+
+    def counting(name):
+        calls.append(name)
+        return original(name)
+
+    monkeypatch.setattr(ordering, "detect_date_from_name", counting)
+    files = [
+        Path("2025-01-02.png"),
+        Path("img2.png"),
+        Path("2025-01-01.png"),
+        Path("img1.png"),
+    ]
+    ordered = order_images(files, "auto")
+    assert calls == ["2025-01-02.png", "img2.png"]
+    assert [p.name for p in ordered] == [
+        "2025-01-01.png",
+        "2025-01-02.png",
+        "img1.png",
+        "img2.png",
+    ]
@@ -3,6 +3,7 @@ Tests for render wait utilities.
 """
 
 import asyncio
+import json
 import pytest
 from unittest.mock import AsyncMock, MagicMock
 from app.utils.render_wait import (
@@ -10,10 +11,19 @@ from app.utils.render_wait import (
     wait_for_fonts_loaded,
     wait_for_map_ready,
     wait_for_no_loading_indicators,
-    comprehensive_render_wait
+    comprehensive_render_wait,
+    LOADING_INDICATOR_SELECTORS,
+    MAP_CONTAINER_SELECTORS,
+    PAGE_STATE_JS,
 )
 
 
+@pytest.fixture(autouse=True)
+def no_paint_settle(monkeypatch):
+    """Skip the real post-wait paint delay; it was most of this file's runtime."""
+    monkeypatch.setattr("app.utils.render_wait.PAINT_SETTLE_MS", 0)
+
+
 @pytest.fixture
 def mock_page():
     """Create a mock Playwright page object."""
@@ -27,45 +37,59 @@ def mock_page():
 @pytest.mark.asyncio
 async def test_wait_for_images_loaded_success(mock_page):
     """Test successful image loading wait."""
-    mock_page.wait_for_function.return_value = None  # Success
+    mock_page.evaluate.return_value = True  # Every pending image fired load
     
     result = await wait_for_images_loaded(mock_page, 5000)
     
     assert result is True
-    mock_page.wait_for_function.assert_called_once()
+    mock_page.evaluate.assert_called_once()
+    mock_page.wait_for_function.assert_not_called()
 
 
 @pytest.mark.asyncio
 async def test_wait_for_images_loaded_timeout(mock_page):
     """Test image loading wait timeout."""
-    mock_page.wait_for_function.side_effect = Exception("Timeout")
+    async def never_loaded(*args):
+        await asyncio.sleep(1)
+    
+    mock_page.evaluate.side_effect = never_loaded
+    
+    result = await wait_for_images_loaded(mock_page, 10)
+    
+    assert result is False
+
+
+@pytest.mark.asyncio
+async def test_wait_for_images_loaded_broken_image(mock_page):
+    """Test an image that errored out counts as not loaded."""
+    mock_page.evaluate.return_value = False
     
     result = await wait_for_images_loaded(mock_page, 5000)
     
     assert result is False
-    mock_page.wait_for_function.assert_called_once()
 
 
 @pytest.mark.asyncio
 async def test_wait_for_fonts_loaded_success(mock_page):
     """Test successful font loading wait."""
-    mock_page.evaluate.return_value = None  # document.fonts.ready resolved
-    mock_page.wait_for_function.return_value = None  # Success
+    mock_page.evaluate.return_value = True  # document.fonts.ready resolved
     
     result = await wait_for_fonts_loaded(mock_page, 5000)
     
     assert result is True
     mock_page.evaluate.assert_called_once()
-    mock_page.wait_for_function.assert_called_once()
+    mock_page.wait_for_function.assert_not_called()
 
 
 @pytest.mark.asyncio
 async def test_wait_for_fonts_loaded_timeout(mock_page):
     """Test font loading wait timeout."""
-    mock_page.evaluate.return_value = None
-    mock_page.wait_for_function.side_effect = Exception("Timeout")
+    async def never_ready(*args):
+        await asyncio.sleep(1)
     
-    result = await wait_for_fonts_loaded(mock_page, 5000)
+    mock_page.evaluate.side_effect = never_ready
+    
+    result = await wait_for_fonts_loaded(mock_page, 10)
     
     assert result is False
 
@@ -102,12 +126,24 @@ async def test_wait_for_no_loading_indicators_success(mock_page):
     mock_page.wait_for_function.assert_called_once()
 
 
+def _wait_outcome(status, ready=True):
+    """The object the page-side backoff loop resolves with."""
+    return {"ready": ready, "status": status}
+
+
+ALL_READY = {
+    "images_loaded": True,
+    "fonts_loaded": True,
+    "map_ready": True,
+    "no_loading_indicators": True,
+}
+
+
 @pytest.mark.asyncio
 async def test_comprehensive_render_wait_all_success(mock_page):
     """Test comprehensive render wait with all conditions successful."""
-    # Mock all async functions to succeed
-    mock_page.wait_for_function.return_value = None
-    mock_page.evaluate.return_value = None
+    # The page-side loop resolves with every condition met
+    mock_page.evaluate.return_value = _wait_outcome(ALL_READY)
     mock_page.wait_for_selector.return_value = None
     
     config = {
@@ -122,26 +158,21 @@ async def test_comprehensive_render_wait_all_success(mock_page):
     # All conditions should be successful
     assert all(results.values()), f"Failed conditions: {[k for k, v in results.items() if not v]}"
     
-    # Verify all expected calls were made
-    assert mock_page.wait_for_function.call_count >= 3  # images, map, loading indicators
-    mock_page.evaluate.assert_called()  # fonts
+    # Images, fonts, map and loading indicators share one polling loop
+    mock_page.evaluate.assert_called_once()
+    arg = mock_page.evaluate.call_args.args[1]
+    assert arg["enabled"] == {"images": True, "fonts": True, "map": False}
+    assert arg["timeoutMs"] == 10000 // 2
+    assert arg["minIntervalMs"] < arg["maxIntervalMs"]
+    mock_page.wait_for_function.assert_not_called()
     mock_page.wait_for_selector.assert_called_with("#map-canvas", timeout=10000 // 3)
 
 
 @pytest.mark.asyncio
 async def test_comprehensive_render_wait_partial_failure(mock_page):
     """Test comprehensive render wait with some conditions failing."""
-    # Mock images to fail, others to succeed
-    call_count = 0
-    def side_effect(*args, **kwargs):
-        nonlocal call_count
-        call_count += 1
-        if call_count == 1:  # First call (images)
-            raise Exception("Timeout")
-        return None
-    
-    mock_page.wait_for_function.side_effect = side_effect
-    mock_page.evaluate.return_value = None
+    # The loop runs out of time with images still loading
+    mock_page.evaluate.return_value = _wait_outcome(dict(ALL_READY, images_loaded=False), ready=False)
     mock_page.wait_for_selector.return_value = None
     
     config = {
@@ -159,13 +190,34 @@ async def test_comprehensive_render_wait_partial_failure(mock_page):
     assert results["map_ready"]
     assert results["no_loading_indicators"]
     assert results["extra_wait"]
+    mock_page.evaluate.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_comprehensive_render_wait_status_check_failure(mock_page):
+    """Test a failed status check keeps disabled conditions passing."""
+    mock_page.evaluate.side_effect = Exception("Target closed")
+    
+    config = {
+        "ensure_images_loaded": False,
+        "ensure_fonts_loaded": True,
+        "ensure_map_ready": True,
+        "extra_wait_ms": 0,
+        "timeout_ms": 10000
+    }
+    
+    results = await comprehensive_render_wait(mock_page, config)
+    
+    assert results["images_loaded"]
+    assert not results["fonts_loaded"]
+    assert not results["map_ready"]
+    assert not results["no_loading_indicators"]
 
 
 @pytest.mark.asyncio
 async def test_comprehensive_render_wait_disabled_conditions(mock_page):
     """Test comprehensive render wait with some conditions disabled."""
-    mock_page.wait_for_function.return_value = None
-    mock_page.evaluate.return_value = None
+    mock_page.evaluate.return_value = _wait_outcome(ALL_READY)
     
     config = {
         "ensure_images_loaded": False,
@@ -179,11 +231,54 @@ async def test_comprehensive_render_wait_disabled_conditions(mock_page):
     # Disabled conditions should be marked as successful
     assert results["images_loaded"]
     assert results["fonts_loaded"]
-    assert results["map_ready"]  # Always checked
+    assert results["map_ready"]  # Opt-in, off by default
     assert results["no_loading_indicators"]  # Always checked
     assert results["extra_wait"]
     
-    # Fonts and images shouldn't be checked when disabled
-    mock_page.evaluate.assert_not_called()
-    # Only map and loading indicators should be checked
-    assert mock_page.wait_for_function.call_count == 2
+    # Fonts, images and the map check are switched off inside the page-side loop
+    mock_page.wait_for_function.assert_not_called()
+    mock_page.evaluate.assert_called_once()
+    assert mock_page.evaluate.call_args.args[1]["enabled"] == {"images": False, "fonts": False, "map": False}
+
+
+@pytest.mark.asyncio
+async def test_comprehensive_render_wait_selector_runs_alongside_status(mock_page):
+    """Test the custom selector wait doesn't queue behind the render loop."""
+    events = []
+    
+    async def slow_status(*args):
+        events.append("status_start")
+        await asyncio.sleep(0.05)
+        events.append("status_end")
+        return _wait_outcome(ALL_READY)
+    
+    async def selector(*args, **kwargs):
+        events.append("selector")
+    
+    mock_page.evaluate.side_effect = slow_status
+    mock_page.wait_for_selector.side_effect = selector
+    
+    config = {"extra_wait_ms": 0, "timeout_ms": 10000}
+    results = await comprehensive_render_wait(mock_page, config, "#map-canvas")
+    
+    assert all(results.values())
+    assert events.index("selector") < events.index("status_end")
+
+
+@pytest.mark.asyncio
+async def test_comprehensive_render_wait_extra_wait_ends_on_network_idle(mock_page):
+    """Test the stabilization wait is capped by extra_wait_ms and tolerates a busy network."""
+    mock_page.evaluate.return_value = _wait_outcome(ALL_READY)
+    mock_page.wait_for_load_state.side_effect = Exception("Timeout")
+    
+    config = {"extra_wait_ms": 1500, "timeout_ms": 10000}
+    results = await comprehensive_render_wait(mock_page, config)
+    
+    mock_page.wait_for_load_state.assert_called_once_with("networkidle", timeout=1500)
+    assert results["extra_wait"]
+
+
+def test_page_state_uses_the_shared_selector_lists():
+    """The poll fingerprint watches the same elements as the readiness checks."""
+    for selector in LOADING_INDICATOR_SELECTORS + MAP_CONTAINER_SELECTORS:
+        assert json.dumps(selector)[1:-1] in PAGE_STATE_JS
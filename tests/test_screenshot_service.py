@@ -0,0 +1,80 @@
+import asyncio
+from pathlib import Path
+from unittest.mock import AsyncMock
+import pytest
+import tenacity
+from app.services.screenshot_service import (
+    AdaptiveLimit,
+    LOAD_INCREASE_EVERY,
+    LOAD_WINDOW,
+    ScreenshotAgent,
+)
+
+
+@pytest.mark.asyncio
+async def test_limit_grows_while_loads_stay_flat():
+    limit = AdaptiveLimit(4, initial=1)
+
+    for _ in range(LOAD_WINDOW + LOAD_INCREASE_EVERY):
+        await limit.record(1.0)
+
+    assert limit.baseline_p95 == 1.0
+    assert limit.limit == 2
+
+
+@pytest.mark.asyncio
+async def test_limit_halves_when_p95_degrades():
+    limit = AdaptiveLimit(8, initial=4)
+    for _ in range(LOAD_WINDOW):
+        await limit.record(1.0)
+
+    for _ in range(LOAD_WINDOW):
+        await limit.record(2.0)
+
+    assert limit.limit == 2
+
+
+@pytest.mark.asyncio
+async def test_limit_caps_tasks_in_flight():
+    limit = AdaptiveLimit(2)
+    running = 0
+    peak = 0
+
+    async def job():
+        nonlocal running, peak
+        async with limit:
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(job() for _ in range(6)))
+
+    assert peak == 2
+
+
+def test_agent_starts_at_configured_concurrency():
+    assert ScreenshotAgent(concurrency=2).limiter.limit == 2
+
+
+@pytest.mark.asyncio
+async def test_timed_out_loads_bring_the_limit_down():
+    agent = ScreenshotAgent(concurrency=4, timeout_ms=5000)
+    for _ in range(LOAD_WINDOW):
+        await agent.limiter.record(0.5)
+
+    page = AsyncMock()
+    page.goto.side_effect = asyncio.TimeoutError()
+    context = AsyncMock()
+    context.new_page.return_value = page
+    take_screenshot = ScreenshotAgent._take_screenshot.retry_with(
+        stop=tenacity.stop_after_attempt(1)
+    )
+
+    for _ in range(LOAD_WINDOW):
+        with pytest.raises(asyncio.TimeoutError):
+            await take_screenshot(
+                agent, context, "https://example.com", Path("x.png"), False, None, None
+            )
+
+    assert agent.limiter.limit == 2
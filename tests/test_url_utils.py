@@ -20,3 +20,34 @@ def test_ensure_date_param():
     dt = date(2025, 8, 1)
     new_url = ensure_date_param(url, "d", dt, "YYYY-MM-DD", "UTC")
     assert new_url == "http://test.com?d=2025-08-01"
+
+
+def test_repeated_rewrites_leave_cached_url_intact():
+    url = "http://test.com/map?z=3&d=2025-01-01"
+    first = ensure_date_param(url, "d", date(2025, 8, 1), "YYYY-MM-DD", "UTC")
+    second = ensure_date_param(url, "d", date(2025, 8, 2), "YYYY-MM-DD", "UTC")
+    assert first == "http://test.com/map?z=3&d=2025-08-01"
+    assert second == "http://test.com/map?z=3&d=2025-08-02"
+    assert with_query_param(url, "k", "v") == url + "&k=v"
+
+
+def test_new_param_is_appended_with_urlencode_quoting():
+    url = "http://test.com?ad=1"
+    assert with_query_param(url, "d", "a b/c") == "http://test.com?ad=1&d=a+b%2Fc"
+    assert (
+        with_query_param("http://test.com", "d", "a b/c") == "http://test.com?d=a+b%2Fc"
+    )
+
+
+def test_ensure_date_param_keeps_url_already_on_that_date():
+    url = "http://test.com/map?lat=1.5&d=2025-08-01&z=4"
+    assert ensure_date_param(url, "d", date(2025, 8, 1), "YYYY-MM-DD", "UTC") is url
+    assert (
+        ensure_date_param(url, "d", date(2025, 8, 2), "YYYY-MM-DD", "UTC")
+        == "http://test.com/map?lat=1.5&d=2025-08-02&z=4"
+    )
+
+
+def test_blank_existing_param_is_replaced_not_duplicated():
+    url = "http://x.com/?d=&z=1"
+    assert with_query_param(url, "d", "2025-08-01") == "http://x.com/?d=2025-08-01&z=1"
@@ -0,0 +1,67 @@
+import os
+from pathlib import Path
+from app.services import video_service
+from app.services.video_service import VideoAgent
+
+
+def test_build_video_links_frames_instead_of_copying(tmp_path, monkeypatch):
+    images = []
+    for index in range(3):
+        path = tmp_path / f"shot-{index}.png"
+        path.write_bytes(b"png-bytes")
+        images.append(path)
+
+    staged = {}
+
+    def fake_run(command, **kwargs):
+        pattern = Path(command[command.index("-i") + 1])
+        for link in sorted(pattern.parent.iterdir()):
+            staged[link.name] = (link.is_symlink(), os.path.realpath(link))
+
+    monkeypatch.setattr(video_service.subprocess, "run", fake_run)
+
+    VideoAgent().build_video(images, tmp_path / "out" / "clip.mp4")
+
+    assert list(staged) == ["000000.png", "000001.png", "000002.png"]
+    assert all(is_link for is_link, _ in staged.values())
+    assert [target for _, target in staged.values()] == [
+        str(p.resolve()) for p in images
+    ]
+
+
+def test_link_frame_falls_back_to_copy(tmp_path, monkeypatch):
+    source = tmp_path / "a.png"
+    source.write_bytes(b"data")
+
+    def refuse(*args, **kwargs):
+        raise OSError("links not supported")
+
+    monkeypatch.setattr(video_service.os, "symlink", refuse)
+    monkeypatch.setattr(video_service.os, "link", refuse)
+
+    destination = tmp_path / "000000.png"
+    video_service._link_frame(source, destination)
+
+    assert destination.read_bytes() == b"data"
+    assert not destination.is_symlink()
+
+
+def test_build_video_tunes_x264_for_stills(tmp_path, monkeypatch):
+    image = tmp_path / "shot.png"
+    image.write_bytes(b"png-bytes")
+    commands = []
+    monkeypatch.setattr(
+        video_service.subprocess,
+        "run",
+        lambda command, **kwargs: commands.append(command),
+    )
+
+    agent = VideoAgent()
+    agent.build_video([image], tmp_path / "x264.mp4")
+    agent.build_video([image], tmp_path / "vp9.webm", codec="libvpx-vp9")
+
+    x264, vp9 = commands
+    assert x264[x264.index("-tune") + 1] == "stillimage"
+    assert x264[-1] == str(tmp_path / "x264.mp4")
+    assert "-tune" not in vp9
+    assert vp9[vp9.index("-threads") + 1] == "0"